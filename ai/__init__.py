@@ -1,5 +1,10 @@
 from .gpt import GPT
+from .cache import AICache
+from .snapshot import AISnapshot
+from .clients import AIClients
+from .provider import AIProvider, AIProviders, MockProvider
 from .ai import (
     _CostCategory, _CostElement, _CostCtr, _BudgetByCtr, _BudgetByElement,
-    get_prompts_for_ai, get_gpt_models, get_claude_models, analyze_by_claude, analyze_by_gpt
+    get_prompts_for_ai, estimate_tokens, get_gpt_models, get_claude_models,
+    analyze_by_claude, analyze_by_gpt, stream_by_claude, stream_by_gpt, analyze
 )
\ No newline at end of file
@@ -1,7 +1,14 @@
 import json
+from datetime import datetime
+from threading import Event
+from typing import Callable, Iterator, Literal
 from pydantic import BaseModel
-from openai import OpenAI
-from anthropic import Anthropic
+
+from util import ExceptionWithMessage
+from .cache import AICache
+from .clients import AIClients
+from .provider import AIProviders
+from .snapshot import Snapshot
 
 KEYMAP = {
     0: "Cost Category PK",
@@ -20,7 +27,12 @@ KEYMAP = {
     13: "OE Type Name",
     14: "Month",
     15: "계획금액",
-    16: "집행금액"
+    16: "집행금액",
+    17: "기타 항목 수"
+}
+DELTA_KEYMAP = { # 변경분 분석에서만 추가
+    18: "이전 계획금액",
+    19: "이전 집행금액"
 }
 
 class _CostCategory(BaseModel):
@@ -50,14 +62,115 @@ class _BudgetByCtr(BaseModel):
     planned: float
     executed: float
 
+MAX_OUTPUT_TOKENS = 2000
+PROMPT_MAX_TOKENS = 30000 # 입력(system + user) 예상 토큰 상한
+PROMPT_TOP_N = 60 # 원가요소/센터별로 그대로 보낼 최대 항목 수. 나머지는 "기타" 한 줄로 합침
+PROMPT_MIN_TOP_N = 5 # 토큰 상한을 맞추기 위해 줄일 수 있는 최소 항목 수
+DELTA_MIN_RATIO = 0.0001 # 변경분 분석에서 계획/집행 변화가 범위 전체 금액의 이 비율 이상인 항목만 개별로 보냄
+
+_REPORT_SECTIONS = """\
+필수 섹션:
+1) 요약
+2) 센터 관점 요약
+3) 원가요소 관점 요약
+4) 리스크 & 권고안
+5) 부록
+"""
+
+_SUMMARY_INSTRUCTION = """\
+다른 부분의 요약과 합쳐 전체 보고서를 만들 수 있도록 '계획 vs 집행' 핵심 요약을 작성하세요.
+- 계획/집행 합계와 집행률
+- 차이가 큰 센터와 원가요소 (각각 최대 5개, 금액 포함)
+- 주요 리스크
+금액은 원 단위 숫자로 쓰고, 1,500자 이내로 작성하세요.
+"""
+
+def estimate_tokens(text: str) -> int:
+    """입력 토큰 수 추정 (tokenizer 없이 계산)
+    영문/숫자/기호는 4글자당 1토큰, 한글 등 ASCII 외 문자는 1글자당 1토큰으로 봄
+    """
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return (len(text) - non_ascii + 3) // 4 + non_ascii
+
+def _select_items(
+        items: list,
+        top_n: int,
+        previous: list[tuple[float, float]] | None = None,
+        min_change: float = 0.0
+    ) -> tuple[list[tuple], dict | None]:
+    """계획/집행이 모두 0인 항목을 빼고 |집행 - 계획|이 큰 순서로 top_n개 선택
+
+    Args:
+        previous
+            items와 같은 순서의 이전 (계획, 집행). 지정하면 계획 또는 집행이 min_change 이상 바뀐 항목만
+            바뀐 크기(|계획 변화| + |집행 변화|) 순서로 선택하고, 바뀌지 않은 항목은 나머지에 합침
+
+    Returns:
+        선택된 (항목, 이전 (계획, 집행) 또는 None) (원래 순서 유지)
+        나머지를 합친 {17: 개수, 15: 계획, 16: 집행}. previous를 지정하면 {18: 이전 계획, 19: 이전 집행}도 포함
+        나머지가 없으면 None
+    """
+    rest = []
+    if previous is None:
+        pairs = [(item, None) for item in items if item.planned or item.executed]
+        weight = lambda item, prev: abs(item.executed - item.planned)
+    else:
+        pairs = []
+        for item, prev in zip(items, previous):
+            if not (item.planned or item.executed or prev[0] or prev[1]):
+                continue
+            change = max(abs(item.planned - prev[0]), abs(item.executed - prev[1]))
+            (pairs if change and change >= min_change else rest).append((item, prev))
+        weight = lambda item, prev: abs(item.planned - prev[0]) + abs(item.executed - prev[1])
+    if len(pairs) > top_n:
+        ranked = sorted(range(len(pairs)), key=lambda i: weight(*pairs[i]), reverse=True)
+        selected = set(ranked[:top_n])
+        rest.extend(pairs[i] for i in ranked[top_n:])
+        pairs = [pair for i, pair in enumerate(pairs) if i in selected]
+    if not rest:
+        return pairs, None
+    others = {
+        17: len(rest),
+        15: sum(item.planned for item, _ in rest),
+        16: sum(item.executed for item, _ in rest)
+    }
+    if previous is not None:
+        others[18] = sum(prev[0] for _, prev in rest)
+        others[19] = sum(prev[1] for _, prev in rest)
+    return pairs, others
+
+def _format_months(months: list[int]) -> str:
+    months = sorted(months)
+    if len(months) > 1 and months == list(range(months[0], months[-1] + 1)):
+        return f"{months[0]}~{months[-1]}월"
+    return ", ".join(str(month) for month in months) + "월"
+
 def get_prompts_for_ai(
        cost_category_list: list[_CostCategory],
        cost_element_list: list[_CostElement],
        cost_ctr_list: list[_CostCtr],
        budget_by_element: list[_BudgetByElement],
        budget_by_ctr: list[_BudgetByCtr],
+       max_tokens: int = PROMPT_MAX_TOKENS,
+       top_n: int = PROMPT_TOP_N,
+       part: str | None = None,
+       previous: Snapshot | None = None,
+       months: list[int] | None = None,
     ) -> tuple[str, str, str]:
     """
+    계획/집행이 모두 0인 항목과 분석에 쓰이지 않는 카테고리/원가요소/센터는 빼고,
+    차이(|집행 - 계획|)가 큰 top_n개 외의 항목은 "기타" 한 줄로 합침.
+    예상 토큰 수가 max_tokens를 넘으면 top_n을 절반씩 줄임 (PROMPT_MIN_TOP_N까지)
+
+    Args:
+        part
+            전체 범위를 나눠 분석할 때 이 데이터의 부분 이름 (예: BS 이름)
+            지정하면 보고서 대신 get_synthesis_prompts()로 합칠 수 있는 부분 요약을 요청함
+        previous, months
+            변경분 분석. 이전 분석의 기준과 현재 분석 기간
+            이전보다 범위 전체 금액의 DELTA_MIN_RATIO 이상 바뀐 항목만 이전 금액(18, 19)과 함께 보내고,
+            이전 분석 결과를 함께 보내 변경 사항을 반영한 보고서를 요청함
+
     Returns:
         system_prompt
         user_prompt
@@ -91,54 +204,97 @@ def get_prompts_for_ai(
             ctr = ctr_map[pk]
             path.insert(0, str(pk))
 
-    json_data = {
-        "keymap": KEYMAP,
-        "cost_category": [
-            {
-                0: cat.pk,
-                1: cat.name,
-            } for cat in cost_category_list
-        ],
-        "cost_element": [
-            {
-                2: get_category_path(elem.category_pk),
-                3: elem_code_vs_pk[elem.code],
-                4: elem.description
-            } for elem in cost_element_list if elem.category_pk in category_map
-        ],
-        "cost_ctr": [
-            {
-                5: ctr_code_vs_pk[ctr.code],
-                6: ctr.name,
-                7: ctr.rnd,
-                8: ctr.oe
-            } for ctr in cost_ctr_list
-        ],
-        "rnd_type": [
-            {10: 0, 11: "Research"},
-            {10: 1, 11: "Develop"},
-        ],
-        "oe_type": [
-            {12: 0, 13: "공통비"},
-            {12: 1, 13: "RE"},
-            {12: 2, 13: "OE"},
-        ],
-        "budget_by_element": [
-            {
-                3: elem_code_vs_pk[item.cost_element_code],
-                15: item.planned,
-                16: item.executed
-            } for item in budget_by_element if item.cost_element_code in elem_code_vs_pk
-        ],
-        "budget_by_ctr": [
-            {
-                9: get_ctr_path(item.cost_ctr_code),
-                15: item.planned,
-                16: item.executed
-            } for item in budget_by_ctr if item.cost_ctr_code in ctr_code_vs_pk
-        ],
-    }
-    compact_json = json.dumps(json_data, ensure_ascii=False, separators=(",", ":"))
+    budget_by_element = [
+        item for item in budget_by_element
+        if item.cost_element_code in elem_code_vs_pk
+            and cost_element_list[elem_code_vs_pk[item.cost_element_code]].category_pk in category_map
+    ]
+    budget_by_ctr = [item for item in budget_by_ctr if item.cost_ctr_code in ctr_code_vs_pk]
+
+    if previous is None:
+        elem_previous = ctr_previous = None
+        min_change = 0.0
+    else:
+        elem_previous = [previous.by_element.get(item.cost_element_code, (0.0, 0.0)) for item in budget_by_element]
+        ctr_previous = [previous.by_ctr.get(item.cost_ctr_code, (0.0, 0.0)) for item in budget_by_ctr]
+        totals = {
+            15: sum(item.planned for item in budget_by_element),
+            16: sum(item.executed for item in budget_by_element),
+            18: sum(prev[0] for prev in elem_previous),
+            19: sum(prev[1] for prev in elem_previous)
+        }
+        min_change = DELTA_MIN_RATIO * max(abs(val) for val in totals.values())
+
+    def compile_json(top_n: int) -> str:
+        elem_items, elem_others = _select_items(budget_by_element, top_n, elem_previous, min_change)
+        ctr_items, ctr_others = _select_items(budget_by_ctr, top_n, ctr_previous, min_change)
+
+        # 남은 항목이 참조하는 원가요소, 카테고리(경로 포함), 센터(경로 포함)만 보냄
+        elements = [cost_element_list[elem_code_vs_pk[item.cost_element_code]] for item, _ in elem_items]
+        category_pks = set()
+        for elem in elements:
+            category_pks.update(int(pk) for pk in get_category_path(elem.category_pk).split(".")) # type: ignore
+        ctr_paths = {item.cost_ctr_code: get_ctr_path(item.cost_ctr_code) for item, _ in ctr_items}
+        ctr_pks = set()
+        for path in ctr_paths.values():
+            ctr_pks.update(int(pk) for pk in path.split("."))
+
+        json_data = {
+            "keymap": KEYMAP if previous is None else {**KEYMAP, **DELTA_KEYMAP},
+            "cost_category": [
+                {
+                    0: cat.pk,
+                    1: cat.name,
+                } for cat in cost_category_list if cat.pk in category_pks
+            ],
+            "cost_element": [
+                {
+                    2: get_category_path(elem.category_pk), # type: ignore
+                    3: elem_code_vs_pk[elem.code],
+                    4: elem.description
+                } for elem in elements
+            ],
+            "cost_ctr": [
+                {
+                    5: pk,
+                    6: ctr_map[pk].name,
+                    7: ctr_map[pk].rnd,
+                    8: ctr_map[pk].oe
+                } for pk in sorted(ctr_pks)
+            ],
+            "rnd_type": [
+                {10: 0, 11: "Research"},
+                {10: 1, 11: "Develop"},
+            ],
+            "oe_type": [
+                {12: 0, 13: "공통비"},
+                {12: 1, 13: "RE"},
+                {12: 2, 13: "OE"},
+            ],
+            "budget_by_element": [
+                {
+                    3: elem_code_vs_pk[item.cost_element_code],
+                    15: item.planned,
+                    16: item.executed,
+                    **({} if prev is None else {18: prev[0], 19: prev[1]})
+                } for item, prev in elem_items
+            ],
+            "budget_by_ctr": [
+                {
+                    9: ctr_paths[item.cost_ctr_code],
+                    15: item.planned,
+                    16: item.executed,
+                    **({} if prev is None else {18: prev[0], 19: prev[1]})
+                } for item, prev in ctr_items
+            ],
+        }
+        if previous is not None:
+            json_data["totals"] = totals
+        if elem_others is not None:
+            json_data["budget_by_element_others"] = elem_others
+        if ctr_others is not None:
+            json_data["budget_by_ctr_others"] = ctr_others
+        return json.dumps(json_data, ensure_ascii=False, separators=(",", ":"))
 
     system_prompt = """\
 당신은 재무/예산 분석가입니다.
@@ -149,51 +305,108 @@ def get_prompts_for_ai(
 - 'rnd_type': {10: RND타입PK, 11: 이름}, 'oe_type': {12: OE타입PK, 13: 이름}.
 - 'budget_by_element': {3: 원가요소PK, 15: 계획, 16: 집행}.
 - 'budget_by_ctr': {9: 센터PK경로, 15: 계획, 16: 집행}.
+- 'budget_by_element_others', 'budget_by_ctr_others': 계획과 집행의 차이가 작아 개별로 제공하지 않은 항목의 합계 {17: 항목 수, 15: 계획, 16: 집행}. 없으면 모든 항목이 제공된 것입니다.
+계획과 집행이 모두 0인 항목은 제외되어 있습니다.
 숫자 연산/집계는 정확히 수행하되, 불확실한 가정은 하지 마세요.
 PK 요약 내용에 사용하지 말고 항상 이름(Name)을 사용하세요.
 출력은 **마크다운**으로만 작성합니다.
 가능하다면 표를 적극적으로 포함합니다."""
+    if previous is not None:
+        system_prompt += """
+변경분 분석: 이전 분석 이후 바뀐 항목만 제공됩니다.
+- 'budget_by_element', 'budget_by_ctr'의 18, 19: 이전 분석 시점의 계획, 집행.
+- 'budget_by_element_others', 'budget_by_ctr_others': 바뀌지 않았거나 변화가 작아 개별로 제공하지 않은 항목의 합계 {17: 항목 수, 15: 계획, 16: 집행, 18: 이전 계획, 19: 이전 집행}.
+- 'totals': 분석 범위 전체의 {15: 계획, 16: 집행, 18: 이전 계획, 19: 이전 집행}."""
 
-    user_prompt = f"""\
-아래 JSON 데이터를 분석하여 '계획 vs 집행' 재무 분석 보고서를 작성하세요.
-필수 섹션:
-1) 요약
-2) 센터 관점 요약
-3) 원가요소 관점 요약
-4) 리스크 & 권고안
-5) 부록
+    if previous is not None:
+        user_prompt_head = f"""\
+아래 JSON 데이터는 이전 분석({_format_months(previous.months)} 기준) 이후 바뀐 항목입니다. 현재 분석 기간은 {_format_months(months or previous.months)}입니다.
+이전 보고서에 변경 사항(이전 대비 집행 증가, 계획 변경, 계획 대비 집행 차이)을 반영하여 '계획 vs 집행' 재무 분석 보고서를 다시 작성하세요.
+개별로 제공되지 않은 항목은 이전 보고서의 내용을 유지하세요.
+{_REPORT_SECTIONS}
+이전 보고서:
+{previous.summary}
 
 데이터(JSON):
-{json_data}"""
+"""
+    elif part is None:
+        user_prompt_head = f"""\
+아래 JSON 데이터를 분석하여 '계획 vs 집행' 재무 분석 보고서를 작성하세요.
+{_REPORT_SECTIONS}
+데이터(JSON):
+"""
+    else:
+        user_prompt_head = f"""\
+아래 JSON 데이터는 전체 분석 범위 중 '{part}' 부분입니다.
+{_SUMMARY_INSTRUCTION}
+데이터(JSON):
+"""
+    prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(user_prompt_head)
+    compact_json = compile_json(top_n)
+    while top_n > PROMPT_MIN_TOP_N and prompt_tokens + estimate_tokens(compact_json) > max_tokens:
+        top_n = max(PROMPT_MIN_TOP_N, top_n // 2)
+        compact_json = compile_json(top_n)
+
+    return system_prompt, user_prompt_head + compact_json, compact_json
+
+def get_synthesis_prompts(summaries: list[tuple[str, str]], final: bool = True) -> tuple[str, str]:
+    """부분별 요약을 종합하는 프롬프트
 
-    return system_prompt, user_prompt, compact_json
+    Args:
+        summaries
+            [(부분 이름, 요약)]
+        final
+            True이면 get_prompts_for_ai()와 같은 섹션의 보고서, False이면 다시 종합할 수 있는 중간 요약을 요청
+
+    Returns:
+        system_prompt
+        user_prompt
+    """
+    system_prompt = """\
+당신은 재무/예산 분석가입니다.
+전체 분석 범위를 여러 부분으로 나누어 분석한 요약을 받아 하나로 종합합니다.
+부분들은 서로 겹치지 않으므로 전체 합계는 부분 합계를 더해 계산하세요.
+요약에 없는 수치는 만들지 말고, 분석에 실패한 부분은 결과에 그 사실을 밝히세요.
+출력은 **마크다운**으로만 작성합니다."""
+    if final:
+        head = f"""\
+아래 부분별 요약을 종합하여 전체 '계획 vs 집행' 재무 분석 보고서를 작성하세요.
+가능하다면 표를 적극적으로 포함합니다.
+{_REPORT_SECTIONS}"""
+    else:
+        head = f"""\
+아래 부분별 요약을 하나의 요약으로 합치세요.
+{_SUMMARY_INSTRUCTION}"""
+    body = "\n\n".join(f"### {title}\n{summary}" for title, summary in summaries)
+    return system_prompt, f"{head}\n부분별 요약:\n\n{body}"
 
-def get_gpt_models(key: str) -> list[str]:
-    client = OpenAI(api_key=key)
-    models = client.models.list()
-    model_names = [m.id for m in models.data if m.id.startswith("gpt")]
+def _get_models(ai_type: str, key: str, refresh: bool) -> list[str]:
+    model_names = AIClients.get_models(ai_type, key, refresh)
+    if model_names is not None:
+        return model_names
+    try:
+        model_names = AIProviders.get(ai_type, key).list_models()
+    except Exception:
+        # 잘못된 키의 클라이언트는 남겨두지 않음
+        AIClients.discard(ai_type, key)
+        raise
+    AIClients.set_models(ai_type, key, model_names)
     return model_names
 
+def get_gpt_models(key: str, refresh: bool = False) -> list[str]:
+    """키의 GPT 모델 목록. AIClients.MODELS_TTL 동안은 다시 조회하지 않음"""
+    return _get_models("ChatGPT", key, refresh)
+
 def analyze_by_gpt(system_prompt: str, user_prompt: str, key: str, model: str) -> str:
-    client = OpenAI(api_key=key)
-
-    resp = client.responses.create(
-        model=model,
-        input=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        max_output_tokens=2000,
-    )
-
-    markdown = resp.output_text
-    return markdown
-
-def get_claude_models(key: str) -> list[str]:
-    client = Anthropic(api_key=key)
-    models = client.models.list()
-    model_names = [m.id for m in models]
-    return model_names
+    return AIProviders.get("ChatGPT", key).complete(system_prompt, user_prompt, model, MAX_OUTPUT_TOKENS)
+
+def stream_by_gpt(system_prompt: str, user_prompt: str, key: str, model: str) -> Iterator[str]:
+    """analyze_by_gpt와 같은 요청을 streaming으로 보내고 받은 텍스트 조각을 차례로 반환"""
+    return AIProviders.get("ChatGPT", key).stream(system_prompt, user_prompt, model, MAX_OUTPUT_TOKENS)
+
+def get_claude_models(key: str, refresh: bool = False) -> list[str]:
+    """키의 Claude 모델 목록. AIClients.MODELS_TTL 동안은 다시 조회하지 않음"""
+    return _get_models("Claude", key, refresh)
 
 def analyze_by_claude(system_prompt: str, user_prompt: str, key: str, model: str) -> str:
     """
@@ -203,26 +416,68 @@ def analyze_by_claude(system_prompt: str, user_prompt: str, key: str, model: str
     - key           : Anthropic API Key
     - model         : 예) "claude-3-sonnet-20240229", "claude-3-opus-20240229"
     """
-    client = Anthropic(api_key=key)
-
-    resp = client.messages.create(
-        model=model,
-        max_tokens=2000,
-        system=system_prompt,
-        messages=[
-            {"role": "user", "content": user_prompt}
-        ]
-    )
-
-    # Claude의 응답 본문 추출
-    content_blocks = resp.content
-    assert content_blocks, "No content"
-
-    return content_blocks[0].text
-
-    # first = content_blocks[0]
-    # if isinstance(first, dict):
-    #     return first["text"]
-    # else:
-    #     # 객체 블록 (예: TextBlock)
-    #     return first.text
+    return AIProviders.get("Claude", key).complete(system_prompt, user_prompt, model, MAX_OUTPUT_TOKENS)
+
+def stream_by_claude(system_prompt: str, user_prompt: str, key: str, model: str) -> Iterator[str]:
+    """analyze_by_claude와 같은 요청을 streaming으로 보내고 받은 텍스트 조각을 차례로 반환"""
+    return AIProviders.get("Claude", key).stream(system_prompt, user_prompt, model, MAX_OUTPUT_TOKENS)
+
+def analyze(
+        ai_type: Literal["ChatGPT", "Claude"],
+        system_prompt: str,
+        user_prompt: str,
+        key: str,
+        model: str,
+        refresh: bool = False,
+        on_chunk: Callable[[str], None] | None = None,
+        cancel_event: Event | None = None
+    ) -> tuple[str, datetime | None]:
+    """캐시(AICache)를 먼저 확인하고 없으면 AI에 분석 요청
+
+    Args:
+        refresh
+            True이면 캐시를 무시하고 다시 분석하여 캐시를 갱신
+        on_chunk
+            지정하면 streaming으로 요청하고 받은 텍스트 조각마다 호출 (워커 스레드에서 호출됨)
+            캐시된 결과는 호출하지 않고 바로 반환
+        cancel_event
+            streaming 중 설정되면 받기를 멈추고 ExceptionWithMessage를 raise. 중지된 결과는 저장하지 않음
+
+    Returns:
+        분석 결과 (마크다운)
+        캐시된 결과이면 저장 시각, 새로 분석했으면 None
+    """
+    cache_key = AICache.make_key(system_prompt, user_prompt, model, MAX_OUTPUT_TOKENS)
+    if not refresh:
+        cached = AICache.get(cache_key)
+        if cached is not None:
+            return cached
+    if on_chunk is None:
+        match ai_type:
+            case "ChatGPT":
+                result = analyze_by_gpt(system_prompt, user_prompt, key, model)
+            case "Claude":
+                result = analyze_by_claude(system_prompt, user_prompt, key, model)
+            case _:
+                raise RuntimeError
+    else:
+        match ai_type:
+            case "ChatGPT":
+                stream = stream_by_gpt(system_prompt, user_prompt, key, model)
+            case "Claude":
+                stream = stream_by_claude(system_prompt, user_prompt, key, model)
+            case _:
+                raise RuntimeError
+        chunks = []
+        try:
+            for chunk in stream:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ExceptionWithMessage("분석을 중지했습니다.")
+                chunks.append(chunk)
+                on_chunk(chunk)
+        finally:
+            # 중지/오류 시 연결을 바로 닫음
+            stream.close()
+        result = "".join(chunks)
+    AICache.put(cache_key, model, result)
+    return result, None
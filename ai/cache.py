@@ -0,0 +1,119 @@
+"""AI 분석 결과 캐시
+
+같은 프롬프트/모델/최대 토큰으로 다시 분석하면 API를 호출하지 않고 저장된 결과를 반환함
+키: SHA256(system prompt, user prompt, model, max tokens)
+캐시 파일을 쓸 수 없거나 잠겨 있어도(다른 인스턴스 등) 분석은 계속되도록 get/put은 SQLite 오류를 밖으로 내보내지 않음
+데이터 DB(.ndb)는 다른 PC와 주고받는 파일이므로 프로그램 폴더의 별도 SQLite 파일에 저장함
+"""
+import os
+import json
+import sqlite3
+import hashlib
+import pathlib
+
+from contextlib import contextmanager
+from datetime import datetime
+from threading import Lock
+from time import time
+from typing import Iterator
+
+CACHE_PATH = os.path.join(pathlib.Path(__file__).absolute().parent.parent, "ai_cache.sqlite")
+
+_initialized: set[str] = set() # 이번 실행에서 CREATE TABLE을 실행한 DDL
+
+@contextmanager
+def connect(ddl: str) -> Iterator[sqlite3.Connection]:
+    """CACHE_PATH에 대한 연결. commit(오류 시 rollback) 후 닫힘
+    워커 스레드마다 호출되므로 연결을 공유하지 않고 매번 열고 닫음
+
+    Args:
+        ddl
+            사용할 테이블의 CREATE TABLE IF NOT EXISTS 문. 테이블마다 처음 연결할 때 한 번 실행
+    """
+    conn = sqlite3.connect(CACHE_PATH)
+    try:
+        with conn:
+            if ddl not in _initialized:
+                conn.execute(ddl)
+                _initialized.add(ddl)
+            yield conn
+    finally:
+        conn.close()
+
+class AICache:
+    TTL = 7 * 24 * 60 * 60 # 초
+    MAX_ENTRIES = 200
+    MAX_BYTES = 20 * 1024 * 1024 # 결과 텍스트 합계
+
+    DDL = (
+        "CREATE TABLE IF NOT EXISTS ai_cache ("
+        "   key TEXT PRIMARY KEY,"
+        "   model TEXT NOT NULL,"
+        "   result TEXT NOT NULL,"
+        "   size INTEGER NOT NULL,"
+        "   created_at REAL NOT NULL,"
+        "   used_at REAL NOT NULL"
+        ")"
+    )
+
+    _lock = Lock()
+
+    @staticmethod
+    def make_key(system_prompt: str, user_prompt: str, model: str, max_tokens: int) -> str:
+        payload = json.dumps([system_prompt, user_prompt, model, max_tokens], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def get(cls, key: str) -> tuple[str, datetime] | None:
+        """만료되지 않은 (결과, 저장 시각). 없거나 캐시를 읽을 수 없으면 None"""
+        now = time()
+        try:
+            with cls._lock, connect(cls.DDL) as conn:
+                row = conn.execute(
+                    "SELECT result, created_at FROM ai_cache WHERE key = ? AND created_at >= ?",
+                    (key, now - cls.TTL)
+                ).fetchone()
+                if row is None:
+                    return
+                conn.execute("UPDATE ai_cache SET used_at = ? WHERE key = ?", (now, key))
+        except sqlite3.Error:
+            return
+        return row[0], datetime.fromtimestamp(row[1])
+
+    @classmethod
+    def put(cls, key: str, model: str, result: str):
+        """결과를 저장하고 만료된 항목, 개수/크기 상한을 넘는 오래된(최근 사용 기준) 항목을 지움
+        캐시에 쓸 수 없으면 저장하지 않음
+        """
+        now = time()
+        try:
+            with cls._lock, connect(cls.DDL) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ai_cache (key, model, result, size, created_at, used_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, result, len(result.encode("utf-8")), now, now)
+                )
+                conn.execute("DELETE FROM ai_cache WHERE created_at < ?", (now - cls.TTL,))
+                conn.execute(
+                    "DELETE FROM ai_cache WHERE key IN ("
+                    "   SELECT key FROM ("
+                    "       SELECT key,"
+                    "           ROW_NUMBER() OVER (ORDER BY used_at DESC) AS n,"
+                    "           SUM(size) OVER (ORDER BY used_at DESC) AS total"
+                    "       FROM ai_cache"
+                    "   ) WHERE n > ? OR total > ?"
+                    ")",
+                    (cls.MAX_ENTRIES, cls.MAX_BYTES)
+                )
+        except sqlite3.Error:
+            pass # 저장하지 못해도 결과는 그대로 사용
+
+    @classmethod
+    def remove(cls, key: str):
+        with cls._lock, connect(cls.DDL) as conn:
+            conn.execute("DELETE FROM ai_cache WHERE key = ?", (key,))
+
+    @classmethod
+    def clear(cls):
+        with cls._lock, connect(cls.DDL) as conn:
+            conn.execute("DELETE FROM ai_cache")
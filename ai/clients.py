@@ -0,0 +1,106 @@
+"""OpenAI/Anthropic 클라이언트와 모델 목록 재사용
+
+(AI, API 키)별로 클라이언트 하나를 만들어 두고 계속 사용하여 HTTP 연결 풀과 TLS 세션을 재사용함
+모델 목록은 MODELS_TTL 동안 다시 조회하지 않음
+비동기 클라이언트는 이벤트 루프에 묶이므로 저장하지 않고 같은 설정으로 새로 만듦(new_async_*)
+"""
+from threading import Lock
+from time import monotonic
+
+import httpx
+import openai
+import anthropic
+
+class AIClients:
+    TIMEOUT = 120.0 # 초. 응답 생성 시간을 포함한 요청 전체
+    CONNECT_TIMEOUT = 10.0 # 초
+    MAX_CONNECTIONS = 10
+    MAX_KEEPALIVE_CONNECTIONS = 5
+    KEEPALIVE_EXPIRY = 60.0 # 초
+    MAX_RETRIES = 2 # SDK 자체 재시도
+    MODELS_TTL = 6 * 60 * 60 # 초
+
+    _clients: dict[tuple[str, str], openai.OpenAI | anthropic.Anthropic] = {}
+    _models: dict[tuple[str, str], tuple[float, list[str]]] = {} # { (AI, 키): (조회 시각, 모델 목록) }
+    _lock = Lock()
+
+    @classmethod
+    def get_timeout(cls) -> httpx.Timeout:
+        return httpx.Timeout(cls.TIMEOUT, connect=cls.CONNECT_TIMEOUT)
+
+    @classmethod
+    def get_limits(cls) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=cls.MAX_CONNECTIONS,
+            max_keepalive_connections=cls.MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=cls.KEEPALIVE_EXPIRY
+        )
+
+    @classmethod
+    def get_openai(cls, key: str) -> openai.OpenAI:
+        with cls._lock:
+            client = cls._clients.get(("ChatGPT", key))
+            if client is None:
+                client = openai.OpenAI(
+                    api_key=key,
+                    timeout=cls.get_timeout(),
+                    max_retries=cls.MAX_RETRIES,
+                    http_client=openai.DefaultHttpxClient(limits=cls.get_limits())
+                )
+                cls._clients[("ChatGPT", key)] = client
+        return client # type: ignore
+
+    @classmethod
+    def get_anthropic(cls, key: str) -> anthropic.Anthropic:
+        with cls._lock:
+            client = cls._clients.get(("Claude", key))
+            if client is None:
+                client = anthropic.Anthropic(
+                    api_key=key,
+                    timeout=cls.get_timeout(),
+                    max_retries=cls.MAX_RETRIES,
+                    http_client=anthropic.DefaultHttpxClient(limits=cls.get_limits())
+                )
+                cls._clients[("Claude", key)] = client
+        return client # type: ignore
+
+    @classmethod
+    def new_async_openai(cls, key: str, max_retries: int | None = None) -> openai.AsyncOpenAI:
+        return openai.AsyncOpenAI(
+            api_key=key,
+            timeout=cls.get_timeout(),
+            max_retries=cls.MAX_RETRIES if max_retries is None else max_retries,
+            http_client=openai.DefaultAsyncHttpxClient(limits=cls.get_limits())
+        )
+
+    @classmethod
+    def new_async_anthropic(cls, key: str, max_retries: int | None = None) -> anthropic.AsyncAnthropic:
+        return anthropic.AsyncAnthropic(
+            api_key=key,
+            timeout=cls.get_timeout(),
+            max_retries=cls.MAX_RETRIES if max_retries is None else max_retries,
+            http_client=anthropic.DefaultAsyncHttpxClient(limits=cls.get_limits())
+        )
+
+    @classmethod
+    def get_models(cls, ai_type: str, key: str, refresh: bool = False) -> list[str] | None:
+        """MODELS_TTL 안에 조회한 모델 목록. 없거나 refresh면 None"""
+        with cls._lock:
+            cached = cls._models.get((ai_type, key))
+        if refresh or cached is None or monotonic() - cached[0] > cls.MODELS_TTL:
+            return
+        return cached[1].copy()
+
+    @classmethod
+    def set_models(cls, ai_type: str, key: str, models: list[str]):
+        with cls._lock:
+            cls._models[(ai_type, key)] = (monotonic(), models.copy())
+
+    @classmethod
+    def discard(cls, ai_type: str, key: str):
+        """키가 유효하지 않은 경우 등 더 이상 쓰지 않을 클라이언트를 닫고 모델 목록도 지움"""
+        with cls._lock:
+            client = cls._clients.pop((ai_type, key), None)
+            cls._models.pop((ai_type, key), None)
+        if client is not None:
+            client.close()
@@ -1,22 +1,11 @@
-import os
 import json
-import openai
-from io import BytesIO
 from datetime import datetime
 from pydantic import BaseModel
 
-# PDF
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.units import mm
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Table, TableStyle, Spacer
-)
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-
 from util import ExceptionWithMessage
+from util.pdf_report import PDFRenderer
+from .cache import AICache
+from .provider import AIProvider, AIProviders
 
 class BudgetInsightsModel(BaseModel):
     title: str = ""
@@ -28,8 +17,7 @@ class BudgetInsightsModel(BaseModel):
 class GPT:
     MODEL = "o4-mini"
     API_KEY = None
-    _client = None
-    _font_name = "Helvetica"  # 한글 폰트가 등록되면 동적으로 교체
+    _provider: AIProvider | None = None
 
     # ---------- 공개 메서드 ----------
 
@@ -42,12 +30,12 @@ class GPT:
         if not key or not isinstance(key, str):
             raise ValueError("유효한 문자열 형태의 API 키를 제공하세요.")
 
-        # 최신 클라이언트 생성
-        cls._client = openai.OpenAI(api_key=key)
+        # 요청 백엔드 (클라이언트는 키별로 재사용됨)
+        cls._provider = AIProviders.get("ChatGPT", key)
 
         # 키 유효성 확인: lightweight 엔드포인트 호출
         try:
-            _ = cls._client.models.list()  # 인증 실패시 예외 발생
+            _ = cls._provider.list_models()  # 인증 실패시 예외 발생
         except Exception as e:
             # 가능하면 상태코드/메시지를 살펴서 명확한 에러를 던진다.
             msg = getattr(e, "message", None) or str(e)
@@ -56,8 +44,6 @@ class GPT:
                 raise ExceptionWithMessage("API 키가 유효하지 않거나 권한이 없습니다.")
 
         cls.API_KEY = key
-        # 한글 폰트 자동 등록 시도(없으면 기본 Helvetica 사용)
-        cls._try_register_korean_font()
 
     @classmethod
     def make_report(cls, instruction: str, budget_of_categories: dict[str, any], budget_of_teams: dict[str, any]) -> bytes:
@@ -80,64 +66,14 @@ class GPT:
         # 3) GPT 인사이트
         ai = cls._generate_insights_v2(instruction, cat_items, cat_totals, team_items, team_totals)
 
-        # 4) PDF 생성
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(
-            buffer, pagesize=A4,
-            leftMargin=20 * mm, rightMargin=20 * mm,
-            topMargin=18 * mm, bottomMargin=18 * mm
+        # 4) PDF 생성 (워커 프로세스, 한글 폰트는 프로세스당 한 번 등록)
+        return PDFRenderer.render(
+            ai.get("title") or "예산 집행 보고서",
+            datetime.now().strftime("%Y-%m-%d"),
+            ai,
+            cat_totals, team_totals,
+            cat_items, team_items
         )
-        styles = _build_styles(cls._font_name)
-
-        story = []
-
-        # 제목/메타
-        title = ai.get("title") or "예산 집행 보고서"
-        story.append(Paragraph(title, styles["Title"]))
-        story.append(Paragraph(datetime.now().strftime("%Y-%m-%d"), styles["Meta"]))
-        story.append(Spacer(1, 6 * mm))
-
-        # 핵심 KPI (카테고리/조직)
-        story.append(Paragraph("핵심 지표 (카테고리 기준)", styles["Heading"]))
-        story.append(_kpi_table(cat_totals, cls._font_name))
-        story.append(Spacer(1, 3 * mm))
-        story.append(Paragraph("핵심 지표 (조직/팀 기준)", styles["Heading"]))
-        story.append(_kpi_table(team_totals, cls._font_name))
-        story.append(Spacer(1, 6 * mm))
-
-        # 모델 요약
-        if ai.get("executive_summary"):
-            story.append(Paragraph("요약", styles["Heading"]))
-            for p in ai["executive_summary"]:
-                story.append(Paragraph(f"• {p}", styles["Bullet"]))
-            story.append(Spacer(1, 4 * mm))
-
-        # 항목 테이블 (카테고리)
-        story.append(Paragraph("항목별 현황 (카테고리 트리)", styles["Heading"]))
-        story.append(_items_table(cat_items, cls._font_name))
-        story.append(Spacer(1, 6 * mm))
-
-        # 항목 테이블 (팀)
-        story.append(Paragraph("항목별 현황 (조직/팀 트리)", styles["Heading"]))
-        story.append(_items_table(team_items, cls._font_name))
-        story.append(Spacer(1, 6 * mm))
-
-        # 인사이트 / 리스크 / 권고
-        def add_section(title_k: str, key: str):
-            vals = ai.get(key) or []
-            if not vals:
-                return
-            story.append(Paragraph(title_k, styles["Heading"]))
-            for v in vals:
-                story.append(Paragraph(f"• {v}", styles["Bullet"]))
-            story.append(Spacer(1, 4 * mm))
-
-        add_section("인사이트", "insights")
-        add_section("리스크", "risks")
-        add_section("권고사항", "recommendations")
-
-        doc.build(story)
-        return buffer.getvalue()
 
     # ---------- 내부 유틸 ----------
 
@@ -167,47 +103,22 @@ class GPT:
             "team_items": team_items,
         }
 
+        system_prompt = "You are a senior financial analyst. 결과는 단일 JSON으로."
+        user_prompt = json.dumps(prompt, ensure_ascii=False)
+        cache_key = AICache.make_key(system_prompt, user_prompt, cls.MODEL, 4000)
+        cached = AICache.get(cache_key)
+        if cached is not None:
+            return json.loads(cached[0])
+
         try:
-            # 1) 권장 경로: Responses.parse (스키마 강제 + 자동 파싱)
-            if hasattr(cls._client, "responses") and hasattr(cls._client.responses, "parse"):
-                resp = cls._client.responses.parse(
-                    model=cls.MODEL,
-                    reasoning={"effort": "medium"},
-                    input=[
-                        {"role": "system",
-                         "content": "You are a senior financial analyst. 결과는 단일 JSON으로."},
-                        {"role": "user",
-                         "content": json.dumps(prompt, ensure_ascii=False)},
-                    ],
-                    text_format=BudgetInsightsModel,   # ← 파싱 스키마
-                    max_output_tokens=4000
-                )
-                parsed = resp.output_parsed          # Pydantic 객체
-                data = parsed.model_dump()           # dict로 변환
-            else:
-                # 2) 구버전 우회: beta.chat.completions.parse 사용 (Chat 전용 모델 필요)
-                chat_model = "gpt-5-chat-latest"
-                resp = cls._client.beta.chat.completions.parse(
-                    model=chat_model,
-                    temperature=0.2,
-                    messages=[
-                        {"role": "system",
-                         "content": "You are a senior financial analyst. 결과는 단일 JSON으로."},
-                        {"role": "user",
-                         "content": json.dumps(prompt, ensure_ascii=False)},
-                    ],
-                    response_format=BudgetInsightsModel,  # Pydantic 스키마
-                    max_tokens=1100,
-                )
-                parsed = resp.choices[0].message.parsed   # Pydantic 객체
-                data = parsed.model_dump()
+            # Responses.parse(구버전 SDK는 beta.chat.completions.parse)로 스키마를 강제하여 파싱
+            parsed = cls._provider.parse(system_prompt, user_prompt, cls.MODEL, 4000, BudgetInsightsModel)
+            data = parsed.model_dump()           # dict로 변환
 
             # 최소 키 보정
             data.setdefault("title", "")
             for k in ["executive_summary", "insights", "risks", "recommendations"]:
                 data.setdefault(k, [])
-            return data
-
         except Exception:
             # 안전 Fallback
             return {
@@ -226,6 +137,9 @@ class GPT:
                 "risks": [],
                 "recommendations": [],
             }
+        # Fallback 결과는 저장하지 않으며, 저장에 실패해도 받은 결과를 반환
+        AICache.put(cache_key, cls.MODEL, json.dumps(data, ensure_ascii=False))
+        return data
 
     @staticmethod
     def _flatten_budget_tree(tree: any, joiner: str = " / ") -> list[dict]:
@@ -245,7 +159,10 @@ class GPT:
                     return False
             return False
 
-        def walk(node: any, path: list[str]):
+        # 경로는 하나의 리스트에 넣고 빼며 leaf에서만 문자열로 합침
+        path: list[str] = []
+
+        def walk(node: any):
             if is_pair(node):
                 planned, actual = float(node[0] or 0), float(node[1] or 0)
                 items.append({
@@ -257,14 +174,13 @@ class GPT:
                 return
             if isinstance(node, dict):
                 for k, v in node.items():
-                    walk(v, path + [str(k)])
-            else:
-                # 스칼라/알 수 없는 형식은 무시
-                return
+                    path.append(str(k))
+                    walk(v)
+                    path.pop()
+            # 스칼라/알 수 없는 형식은 무시
 
         if isinstance(tree, dict):
-            for k, v in tree.items():
-                walk(v, [str(k)])
+            walk(tree)
         else:
             raise ValueError("트리 입력은 dict 형태여야 합니다.")
 
@@ -299,141 +215,3 @@ class GPT:
             "remaining": remaining,
             "execution_rate": rate,
         }
-
-    @classmethod
-    def _try_register_korean_font(cls):
-        """
-        시스템에 존재할 법한 한글 폰트를 자동 등록.
-        실패 시 기본 Helvetica 사용.
-        """
-        candidates = [
-            r"C:\Windows\Fonts\malgun.ttf",
-            r"C:\Windows\Fonts\malgunbd.ttf",
-        ]
-        for path in candidates:
-            try:
-                if os.path.exists(path):
-                    font_name = "KRBody"
-                    pdfmetrics.registerFont(TTFont(font_name, path))
-                    cls._font_name = font_name
-                    return
-            except Exception:
-                continue
-        # 실패 시 기본 Helvetica 유지
-
-
-# ---------- PDF 빌더/헬퍼 ----------
-
-def _kpi_table(totals: dict, font_name: str) -> Table:
-    rows = [
-        ["총 계획", _fmt_money(totals["planned"])],
-        ["총 집행", _fmt_money(totals["actual"])],
-        ["집행률", f'{totals["execution_rate"]:.1f}%'],
-        ["잔액", _fmt_money(totals["remaining"])],
-    ]
-    t = Table(rows, colWidths=[35 * mm, 120 * mm])
-    t.setStyle(TableStyle([
-        ("FONTNAME", (0, 0), (-1, -1), font_name),
-        ("FONTSIZE", (0, 0), (-1, -1), 10),
-        ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
-        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
-        ("ALIGN", (1, 0), (1, -1), "RIGHT"),
-        ("LEFTPADDING", (0, 0), (-1, -1), 6),
-        ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-        ("TOPPADDING", (0, 0), (-1, -1), 4),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-    ]))
-    return t
-
-
-def _items_table(items: list[dict], font_name: str) -> Table:
-    data = [["경로", "계획", "집행", "집행률", "잔액"]]
-    for it in items:
-        path = it["path"]
-        # 깊이에 따라 살짝 들여쓰기 표기
-        indent = "· " * max(0, it.get("depth", 1) - 1)
-        data.append([
-            indent + path.split(" > ")[-1] if indent else path,
-            _fmt_money(it["planned"]),
-            _fmt_money(it["actual"]),
-            f'{it["execution_rate"]:.1f}%',
-            _fmt_money(it["remaining"]),
-        ])
-    tbl = Table(
-        data,
-        colWidths=[70 * mm, 28 * mm, 28 * mm, 22 * mm, 27 * mm]
-    )
-    tbl.setStyle(TableStyle([
-        ("FONTNAME", (0, 0), (-1, -1), font_name),
-        ("FONTSIZE", (0, 0), (-1, -1), 9),
-        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
-        ("ALIGN", (1, 1), (-1, -1), "RIGHT"),
-        ("ALIGN", (0, 0), (0, -1), "LEFT"),
-        ("TOPPADDING", (0, 0), (-1, -1), 3),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 3),
-    ]))
-    return tbl
-
-
-def _build_styles(font_name: str):
-    styles = getSampleStyleSheet()
-
-    # 기본 폰트/본체
-    styles["Normal"].fontName = font_name
-    styles["Normal"].fontSize = 10
-    styles["Normal"].leading = 14
-
-    # 기존 Title, Bullet이 이미 있음: 추가하지 말고 수정만
-    if "Title" in styles.byName:
-        s = styles["Title"]
-        s.fontName = font_name
-        s.fontSize = 18
-        s.leading = 22
-        s.spaceAfter = 6
-        s.alignment = 0  # LEFT
-    if "Bullet" in styles.byName:
-        s = styles["Bullet"]
-        s.fontName = font_name
-        s.leftIndent = 8
-        s.spaceBefore = 2
-        s.spaceAfter = 0
-        # s.fontSize 그대로 두거나 필요 시 조정
-
-    # Meta: 없으면 생성, 있으면 수정
-    if "Meta" in styles.byName:
-        s = styles["Meta"]
-        s.fontName = font_name
-        s.fontSize = 9
-        s.textColor = colors.grey
-        s.spaceAfter = 6
-    else:
-        styles.add(ParagraphStyle(
-            name="Meta", parent=styles["Normal"],
-            fontSize=9, textColor=colors.grey, spaceAfter=6
-        ))
-
-    # Heading: 없으면 생성, 있으면 수정
-    if "Heading" in styles.byName:
-        s = styles["Heading"]
-        s.fontName = font_name
-        s.fontSize = 12
-        s.leading = 16
-        s.spaceBefore = 6
-        s.spaceAfter = 4
-        s.textColor = colors.black
-    else:
-        styles.add(ParagraphStyle(
-            name="Heading", parent=styles["Normal"],
-            fontSize=12, leading=16, spaceBefore=6, spaceAfter=4,
-            textColor=colors.black
-        ))
-
-    return styles
-
-
-def _fmt_money(x: float) -> str:
-    try:
-        return f"{int(round(x)):,} 원"
-    except Exception:
-        return str(x)
\ No newline at end of file
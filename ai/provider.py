@@ -0,0 +1,386 @@
+"""AI 요청 백엔드(provider)
+
+analyze_by_gpt/analyze_by_claude/stream_by_*/AIRunner/GPT는 AIProviders.get()으로 받은 provider를 통해 요청함
+    OpenAIProvider, AnthropicProvider: 실제 API
+    MockProvider: 네트워크 없이 고정된(프롬프트에 따라 결정되는) 결과를 지연 시간과 함께 반환
+                  인터넷이 없는 빌드 환경에서 프롬프트 생성, PDF, UI 처리 시간을 측정하는 용도
+
+환경 변수로 MockProvider 사용 (또는 AIProviders.use_mock())
+    NEXEN_AI_MOCK=1
+    NEXEN_AI_MOCK_LATENCY=0.5       첫 응답까지 지연 (초)
+    NEXEN_AI_MOCK_CHUNK_DELAY=0.02  streaming 조각 사이 지연 (초)
+    NEXEN_AI_MOCK_STREAMING=0       조각으로 나누지 않고 한 번에 반환
+"""
+import os
+import re
+import json
+import asyncio
+import hashlib
+
+from time import sleep
+from typing import Iterator, get_origin
+
+from pydantic import BaseModel
+
+from .clients import AIClients
+
+class AIProvider:
+    """provider 공통 인터페이스
+    max_tokens는 최대 출력 토큰, 비동기 요청(acomplete)은 재시도하지 않음(호출하는 쪽에서 처리)
+    """
+    def __init__(self, key: str):
+        self.key = key
+
+    def list_models(self) -> list[str]:
+        raise NotImplementedError
+
+    def complete(self, system_prompt: str, user_prompt: str, model: str, max_tokens: int) -> str:
+        raise NotImplementedError
+
+    def stream(self, system_prompt: str, user_prompt: str, model: str, max_tokens: int) -> Iterator[str]:
+        raise NotImplementedError
+
+    def parse(
+            self,
+            system_prompt: str,
+            user_prompt: str,
+            model: str,
+            max_tokens: int,
+            schema: type[BaseModel]
+        ) -> BaseModel:
+        """결과를 schema 형식의 JSON으로 받아 파싱"""
+        raise NotImplementedError
+
+    async def acomplete(self, system_prompt: str, user_prompt: str, model: str, max_tokens: int) -> str:
+        raise NotImplementedError
+
+    async def aclose(self):
+        """acomplete()에서 만든 비동기 클라이언트를 닫음 (같은 이벤트 루프에서 호출)"""
+
+class OpenAIProvider(AIProvider):
+    def __init__(self, key: str):
+        super().__init__(key)
+        self.__async_client = None
+
+    def list_models(self) -> list[str]:
+        models = AIClients.get_openai(self.key).models.list()
+        return [m.id for m in models.data if m.id.startswith("gpt")]
+
+    def complete(self, system_prompt: str, user_prompt: str, model: str, max_tokens: int) -> str:
+        resp = AIClients.get_openai(self.key).responses.create(
+            model=model,
+            input=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            max_output_tokens=max_tokens,
+        )
+        return resp.output_text
+
+    def stream(self, system_prompt: str, user_prompt: str, model: str, max_tokens: int) -> Iterator[str]:
+        stream = AIClients.get_openai(self.key).responses.create(
+            model=model,
+            input=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            max_output_tokens=max_tokens,
+            stream=True,
+        )
+        with stream:
+            for event in stream:
+                if event.type == "response.output_text.delta":
+                    yield event.delta
+
+    def parse(
+            self,
+            system_prompt: str,
+            user_prompt: str,
+            model: str,
+            max_tokens: int,
+            schema: type[BaseModel]
+        ) -> BaseModel:
+        client = AIClients.get_openai(self.key)
+        # 1) 권장 경로: Responses.parse (스키마 강제 + 자동 파싱)
+        if hasattr(client, "responses") and hasattr(client.responses, "parse"):
+            resp = client.responses.parse(
+                model=model,
+                reasoning={"effort": "medium"},
+                input=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                text_format=schema,   # ← 파싱 스키마
+                max_output_tokens=max_tokens
+            )
+            return resp.output_parsed # type: ignore
+        # 2) 구버전 우회: beta.chat.completions.parse 사용 (Chat 전용 모델 필요)
+        chat_model = "gpt-5-chat-latest"
+        resp = client.beta.chat.completions.parse(
+            model=chat_model,
+            temperature=0.2,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            response_format=schema,  # Pydantic 스키마
+            max_tokens=1100,
+        )
+        return resp.choices[0].message.parsed # type: ignore
+
+    async def acomplete(self, system_prompt: str, user_prompt: str, model: str, max_tokens: int) -> str:
+        if self.__async_client is None:
+            self.__async_client = AIClients.new_async_openai(self.key, max_retries=0)
+        resp = await self.__async_client.responses.create(
+            model=model,
+            input=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            max_output_tokens=max_tokens,
+        )
+        return resp.output_text
+
+    async def aclose(self):
+        if self.__async_client is not None:
+            await self.__async_client.close()
+            self.__async_client = None
+
+class AnthropicProvider(AIProvider):
+    def __init__(self, key: str):
+        super().__init__(key)
+        self.__async_client = None
+
+    def list_models(self) -> list[str]:
+        return [m.id for m in AIClients.get_anthropic(self.key).models.list()]
+
+    def complete(self, system_prompt: str, user_prompt: str, model: str, max_tokens: int) -> str:
+        resp = AIClients.get_anthropic(self.key).messages.create(
+            model=model,
+            max_tokens=max_tokens,
+            system=system_prompt,
+            messages=[
+                {"role": "user", "content": user_prompt}
+            ]
+        )
+        # Claude의 응답 본문 추출
+        content_blocks = resp.content
+        assert content_blocks, "No content"
+        return content_blocks[0].text # type: ignore
+
+    def stream(self, system_prompt: str, user_prompt: str, model: str, max_tokens: int) -> Iterator[str]:
+        with AIClients.get_anthropic(self.key).messages.stream(
+            model=model,
+            max_tokens=max_tokens,
+            system=system_prompt,
+            messages=[
+                {"role": "user", "content": user_prompt}
+            ]
+        ) as stream:
+            yield from stream.text_stream
+
+    def parse(
+            self,
+            system_prompt: str,
+            user_prompt: str,
+            model: str,
+            max_tokens: int,
+            schema: type[BaseModel]
+        ) -> BaseModel:
+        # 스키마를 강제하는 API가 없으므로 JSON만 답하도록 지시하고 결과를 검증
+        schema_json = json.dumps(schema.model_json_schema(), ensure_ascii=False)
+        system_prompt = (
+            f"{system_prompt}\n\n"
+            f"다른 설명이나 코드 블록 없이 다음 JSON Schema를 따르는 JSON 객체 하나만 답하세요.\n{schema_json}"
+        )
+        text = self.complete(system_prompt, user_prompt, model, max_tokens)
+        # 지시와 달리 코드 블록이나 설명을 덧붙인 경우 가장 바깥 객체만 사용
+        match = re.search(r"\{.*\}", text, re.DOTALL)
+        return schema.model_validate_json(match.group(0) if match else text)
+
+    async def acomplete(self, system_prompt: str, user_prompt: str, model: str, max_tokens: int) -> str:
+        if self.__async_client is None:
+            self.__async_client = AIClients.new_async_anthropic(self.key, max_retries=0)
+        resp = await self.__async_client.messages.create(
+            model=model,
+            max_tokens=max_tokens,
+            system=system_prompt,
+            messages=[
+                {"role": "user", "content": user_prompt}
+            ]
+        )
+        assert resp.content, "No content"
+        return resp.content[0].text # type: ignore
+
+    async def aclose(self):
+        if self.__async_client is not None:
+            await self.__async_client.close()
+            self.__async_client = None
+
+class MockProvider(AIProvider):
+    """네트워크 없이 결과를 만드는 provider
+    같은 프롬프트에는 항상 같은 결과를 반환하며, 분석 JSON이 있으면 합계/상위 항목 표를 포함한 마크다운을 만듦
+    """
+    LATENCY = 0.5 # 첫 응답까지 (초)
+    CHUNK_DELAY = 0.02 # 조각 사이 (초)
+    CHUNK_SIZE = 16 # 글자
+    STREAMING = True
+
+    def __init__(self, key: str, ai_type: str):
+        super().__init__(key)
+        self.__ai_type = ai_type
+
+    def list_models(self) -> list[str]:
+        sleep(self.LATENCY)
+        return ["mock-gpt"] if self.__ai_type == "ChatGPT" else ["mock-claude"]
+
+    def complete(self, system_prompt: str, user_prompt: str, model: str, max_tokens: int) -> str:
+        text = self.__make_markdown(user_prompt, model)
+        sleep(self.LATENCY + self.CHUNK_DELAY * len(self.__split(text)))
+        return text
+
+    def stream(self, system_prompt: str, user_prompt: str, model: str, max_tokens: int) -> Iterator[str]:
+        text = self.__make_markdown(user_prompt, model)
+        sleep(self.LATENCY)
+        if not self.STREAMING:
+            yield text
+            return
+        for chunk in self.__split(text):
+            yield chunk
+            sleep(self.CHUNK_DELAY)
+
+    def parse(
+            self,
+            system_prompt: str,
+            user_prompt: str,
+            model: str,
+            max_tokens: int,
+            schema: type[BaseModel]
+        ) -> BaseModel:
+        sleep(self.LATENCY)
+        seed = self.__seed(user_prompt)
+        data = {}
+        for name, field in schema.model_fields.items():
+            if get_origin(field.annotation) is list:
+                data[name] = [f"[mock] {name} {i + 1} ({seed})" for i in range(3)]
+            else:
+                data[name] = f"[mock] {name} ({seed})"
+        return schema.model_validate(data)
+
+    async def acomplete(self, system_prompt: str, user_prompt: str, model: str, max_tokens: int) -> str:
+        text = self.__make_markdown(user_prompt, model)
+        await asyncio.sleep(self.LATENCY + self.CHUNK_DELAY * len(self.__split(text)))
+        return text
+
+    def __split(self, text: str) -> list[str]:
+        return [text[i:i + self.CHUNK_SIZE] for i in range(0, len(text), self.CHUNK_SIZE)]
+
+    @staticmethod
+    def __seed(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()[:8]
+
+    def __make_markdown(self, user_prompt: str, model: str) -> str:
+        lines = [f"# 계획 vs 집행 분석 (mock: {model}, {self.__seed(user_prompt)})", ""]
+        match = re.search(r"\{.*\}", user_prompt, re.DOTALL)
+        try:
+            data = json.loads(match.group(0)) if match else None
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            # 부분별 요약의 종합(get_synthesis_prompts)이면 부분 목록만 표시
+            parts = re.findall(r"^### (.+)$", user_prompt, re.MULTILINE)
+            if parts:
+                lines.extend(("## 1) 요약", "", f"- 부분 {len(parts)}개를 종합했습니다.", ""))
+                lines.extend(f"- {part}" for part in parts)
+                return "\n".join(lines)
+            lines.append("분석할 데이터(JSON)를 찾지 못했습니다.")
+            return "\n".join(lines)
+
+        elements = {item["3"]: item.get("4", "") for item in data.get("cost_element", [])}
+        ctrs = {item["5"]: item.get("6", "") for item in data.get("cost_ctr", [])}
+        by_element = data.get("budget_by_element", [])
+        by_ctr = data.get("budget_by_ctr", [])
+        planned = sum(item["15"] for item in by_element) + data.get("budget_by_element_others", {}).get("15", 0)
+        executed = sum(item["16"] for item in by_element) + data.get("budget_by_element_others", {}).get("16", 0)
+        rate = executed / planned * 100 if planned else 0.0
+
+        lines.extend((
+            "## 1) 요약", "",
+            f"- 계획 {planned:,.0f}원, 집행 {executed:,.0f}원 (집행률 {rate:.1f}%)",
+            f"- 원가요소 {len(by_element)}개, 센터 {len(by_ctr)}개",
+            "",
+            "## 2) 센터 관점 요약", "",
+            "| 센터 | 계획 | 집행 | 차이 |", "|---|---:|---:|---:|",
+        ))
+        for item in sorted(by_ctr, key=lambda item: abs(item["16"] - item["15"]), reverse=True)[:5]:
+            name = ctrs.get(int(str(item["9"]).split(".")[-1]), str(item["9"]))
+            lines.append(f"| {name} | {item['15']:,.0f} | {item['16']:,.0f} | {item['16'] - item['15']:,.0f} |")
+        lines.extend((
+            "",
+            "## 3) 원가요소 관점 요약", "",
+            "| 원가요소 | 계획 | 집행 | 차이 |", "|---|---:|---:|---:|",
+        ))
+        for item in sorted(by_element, key=lambda item: abs(item["16"] - item["15"]), reverse=True)[:5]:
+            name = elements.get(item["3"], str(item["3"]))
+            lines.append(f"| {name} | {item['15']:,.0f} | {item['16']:,.0f} | {item['16'] - item['15']:,.0f} |")
+        lines.extend((
+            "",
+            "## 4) 리스크 & 권고안", "",
+            "- (mock) 차이가 큰 항목의 집행 계획을 확인하세요.",
+            "",
+            "## 5) 부록", "",
+            "- 이 결과는 MockProvider가 생성했습니다.",
+        ))
+        return "\n".join(lines)
+
+class AIProviders:
+    _mock = os.environ.get("NEXEN_AI_MOCK", "") not in ("", "0")
+
+    @classmethod
+    def get(cls, ai_type: str, key: str) -> AIProvider:
+        """AI의 provider. 호출할 때마다 새로 만들며 sync 클라이언트는 AIClients에서 공유됨"""
+        if cls._mock:
+            return MockProvider(key, ai_type)
+        match ai_type:
+            case "ChatGPT":
+                return OpenAIProvider(key)
+            case "Claude":
+                return AnthropicProvider(key)
+            case _:
+                raise RuntimeError
+
+    @classmethod
+    def use_mock(
+            cls,
+            latency: float | None = None,
+            chunk_delay: float | None = None,
+            streaming: bool | None = None
+        ):
+        cls._mock = True
+        if latency is not None:
+            MockProvider.LATENCY = latency
+        if chunk_delay is not None:
+            MockProvider.CHUNK_DELAY = chunk_delay
+        if streaming is not None:
+            MockProvider.STREAMING = streaming
+
+    @classmethod
+    def use_live(cls):
+        cls._mock = False
+
+    @classmethod
+    def is_mock(cls) -> bool:
+        return cls._mock
+
+def _read_env():
+    value = os.environ.get("NEXEN_AI_MOCK_LATENCY")
+    if value:
+        MockProvider.LATENCY = float(value)
+    value = os.environ.get("NEXEN_AI_MOCK_CHUNK_DELAY")
+    if value:
+        MockProvider.CHUNK_DELAY = float(value)
+    value = os.environ.get("NEXEN_AI_MOCK_STREAMING")
+    if value:
+        MockProvider.STREAMING = value != "0"
+
+_read_env()
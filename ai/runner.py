@@ -0,0 +1,265 @@
+"""여러 AI 분석(범위 × 모델)을 asyncio로 동시에 실행
+
+provider의 비동기 요청(AsyncOpenAI, AsyncAnthropic)으로 최대 MAX_CONCURRENCY개씩 요청하며,
+rate limit(429), 일시적 서버 오류(5xx), 연결 오류는 Retry-After 또는 지수 backoff 후 다시 시도함
+결과는 build_report()로 하나의 마크다운 보고서로 합침
+analyze_map_reduce()는 한 범위를 나눈 부분들을 같은 방식으로 분석(map)한 뒤 요약을 종합(reduce)함
+"""
+import re
+import random
+import asyncio
+
+from dataclasses import dataclass
+from datetime import datetime
+from threading import Event
+from time import perf_counter
+from typing import Callable, Literal
+
+import openai
+import anthropic
+
+from util import ExceptionWithMessage
+from .ai import MAX_OUTPUT_TOKENS, PROMPT_MAX_TOKENS, estimate_tokens, get_synthesis_prompts, analyze
+from .cache import AICache
+from .provider import AIProvider, AIProviders
+
+@dataclass
+class AITask:
+    title: str # 분석 범위 (예: BS 이름)
+    ai_type: Literal["ChatGPT", "Claude"]
+    model: str
+    key: str
+    system_prompt: str
+    user_prompt: str
+    scope: str = "" # 결과를 모으고 정렬할 때 쓰는 분석 범위 식별자 (예: BS 코드). 이름이 같은 범위가 있을 수 있어 title과 구분
+
+@dataclass
+class AITaskResult:
+    task: AITask
+    result: str | None = None
+    error: str | None = None
+    cached_at: datetime | None = None
+    elapsed: float = 0.0
+    attempts: int = 0
+
+class AIRunner:
+    MAX_CONCURRENCY = 4
+    MAX_ATTEMPTS = 5
+    BACKOFF_BASE = 1.0 # 초. 시도마다 2배
+    BACKOFF_MAX = 30.0
+    CANCEL_POLL = 0.1 # 초
+
+    def __init__(
+            self,
+            tasks: list[AITask],
+            refresh: bool = False,
+            on_progress: Callable[[int, int, AITaskResult], None] | None = None,
+            cancel_event: Event | None = None,
+            max_concurrency: int | None = None
+        ):
+        """
+        Args:
+            refresh
+                True이면 캐시를 무시하고 다시 분석
+            on_progress
+                작업 하나가 끝날 때마다 (완료 수, 전체 수, 결과)로 호출됨 (run()을 호출한 스레드에서 호출)
+            cancel_event
+                설정되면 진행 중인 요청을 취소하고 남은 작업은 '중지됨'으로 끝냄
+        """
+        self.__tasks = tasks
+        self.__refresh = refresh
+        self.__on_progress = on_progress
+        self.__cancel_event = cancel_event or Event()
+        self.__max_concurrency = max_concurrency or self.MAX_CONCURRENCY
+        self.__providers: dict[tuple[str, str], AIProvider] = {}
+        self.__done = 0
+
+    def run(self) -> list[AITaskResult]:
+        """모든 작업이 끝날 때까지 대기 (워커 스레드에서 호출). 결과는 tasks 순서"""
+        return asyncio.run(self.__run_all())
+
+    async def __run_all(self) -> list[AITaskResult]:
+        semaphore = asyncio.Semaphore(self.__max_concurrency)
+        results = [AITaskResult(task) for task in self.__tasks]
+        jobs = [asyncio.create_task(self.__run_one(res, semaphore)) for res in results]
+        watcher = asyncio.create_task(self.__watch_cancel(jobs))
+        try:
+            await asyncio.gather(*jobs, return_exceptions=True)
+        finally:
+            watcher.cancel()
+            for provider in self.__providers.values():
+                await provider.aclose()
+            self.__providers.clear()
+        return results
+
+    async def __watch_cancel(self, jobs: list[asyncio.Task]):
+        while not self.__cancel_event.is_set():
+            await asyncio.sleep(self.CANCEL_POLL)
+        for job in jobs:
+            job.cancel()
+
+    async def __run_one(self, res: AITaskResult, semaphore: asyncio.Semaphore):
+        task = res.task
+        started_at = perf_counter()
+        try:
+            cache_key = AICache.make_key(task.system_prompt, task.user_prompt, task.model, MAX_OUTPUT_TOKENS)
+            cached = None if self.__refresh else AICache.get(cache_key)
+            if cached is not None:
+                res.result, res.cached_at = cached
+            else:
+                async with semaphore:
+                    res.result = await self.__request_with_retry(res)
+                AICache.put(cache_key, task.model, res.result)
+        except asyncio.CancelledError:
+            res.error = "중지됨"
+        except Exception as err:
+            res.error = str(err) or type(err).__name__
+        res.elapsed = perf_counter() - started_at
+        self.__done += 1
+        if self.__on_progress:
+            self.__on_progress(self.__done, len(self.__tasks), res)
+
+    async def __request_with_retry(self, res: AITaskResult) -> str:
+        while True:
+            res.attempts += 1
+            try:
+                return await self.__request(res.task)
+            except Exception as err:
+                delay = self.__get_retry_delay(err, res.attempts)
+                if delay is None or res.attempts >= self.MAX_ATTEMPTS:
+                    raise
+                await asyncio.sleep(delay)
+
+    def __get_retry_delay(self, err: Exception, attempts: int) -> float | None:
+        """다시 시도할 수 있는 오류면 대기 시간(초), 아니면 None"""
+        if isinstance(err, (openai.APIConnectionError, anthropic.APIConnectionError)):
+            status = None
+        elif isinstance(err, (openai.APIStatusError, anthropic.APIStatusError)):
+            status = err.status_code
+            if status not in (408, 409, 429) and status < 500:
+                return
+        else:
+            return
+        backoff = min(self.BACKOFF_MAX, self.BACKOFF_BASE * 2 ** (attempts - 1))
+        if status is not None:
+            retry_after = err.response.headers.get("retry-after") # type: ignore
+            try:
+                return min(self.BACKOFF_MAX, max(0.0, float(retry_after)))
+            except (TypeError, ValueError):
+                pass
+        # 여러 작업이 같은 시각에 다시 몰리지 않도록 jitter
+        return backoff * random.uniform(0.5, 1.0)
+
+    async def __request(self, task: AITask) -> str:
+        return await self.__get_provider(task).acomplete(
+            task.system_prompt, task.user_prompt, task.model, MAX_OUTPUT_TOKENS
+        )
+
+    def __get_provider(self, task: AITask) -> AIProvider:
+        # 같은 실행(이벤트 루프) 안에서는 (AI, 키)별로 하나의 provider(비동기 연결 풀)를 공유
+        key = (task.ai_type, task.key)
+        provider = self.__providers.get(key)
+        if provider is None:
+            provider = AIProviders.get(task.ai_type, task.key)
+            self.__providers[key] = provider
+        return provider
+
+def analyze_map_reduce(
+        ai_type: Literal["ChatGPT", "Claude"],
+        key: str,
+        model: str,
+        parts: list[tuple[str, str, str]],
+        refresh: bool = False,
+        on_progress: Callable[[int, int], None] | None = None,
+        on_chunk: Callable[[str], None] | None = None,
+        cancel_event: Event | None = None
+    ) -> tuple[str, datetime | None]:
+    """부분별 프롬프트를 동시에 분석(map)하고 그 요약들을 종합(reduce)
+    요약이 많아 종합 프롬프트가 PROMPT_MAX_TOKENS를 넘으면 묶음별 중간 종합을 먼저 반복함
+    분석에 실패한 부분은 실패했다는 내용으로 종합에 포함됨
+
+    Args:
+        parts
+            [(부분 이름, system_prompt, user_prompt)]
+        on_progress
+            부분/중간 종합 작업 하나가 끝날 때마다 (단계의 완료 수, 단계의 전체 수)로 호출 (워커 스레드에서 호출됨)
+        refresh, on_chunk, cancel_event
+            analyze()와 같음. on_chunk는 최종 종합 결과에만 호출됨
+
+    Returns:
+        analyze()와 같음. 저장 시각은 최종 종합 결과 기준
+    """
+    cancel_event = cancel_event or Event()
+
+    def run(tasks: list[AITask]) -> list[tuple[str, str]]:
+        results = AIRunner(
+            tasks, refresh,
+            on_progress=None if on_progress is None else lambda done, total, res: on_progress(done, total),
+            cancel_event=cancel_event
+        ).run()
+        if cancel_event.is_set():
+            raise ExceptionWithMessage("분석을 중지했습니다.")
+        if all(res.result is None for res in results):
+            raise ExceptionWithMessage(f"부분 분석에 모두 실패했습니다.\n\n{results[0].error}")
+        return [
+            (res.task.title, res.result if res.result is not None else f"(분석 실패: {res.error})")
+            for res in results
+        ]
+
+    summaries = run([AITask(title, ai_type, model, key, system, user) for title, system, user in parts])
+    while True:
+        batches = _split_summaries(summaries)
+        if len(batches) == 1:
+            break
+        summaries = run([
+            AITask(
+                f"{batch[0][0]} 외 {len(batch) - 1}개", ai_type, model, key,
+                *get_synthesis_prompts(batch, final=False)
+            ) for batch in batches
+        ])
+    system_prompt, user_prompt = get_synthesis_prompts(summaries)
+    return analyze(ai_type, system_prompt, user_prompt, key, model, refresh, on_chunk, cancel_event)
+
+def _split_summaries(summaries: list[tuple[str, str]]) -> list[list[tuple[str, str]]]:
+    """종합 프롬프트가 PROMPT_MAX_TOKENS를 넘지 않도록 요약을 묶음. 줄어들도록 묶음마다 최소 2개"""
+    overhead = sum(estimate_tokens(prompt) for prompt in get_synthesis_prompts([], final=False))
+    batches: list[list[tuple[str, str]]] = [[]]
+    tokens = overhead
+    for title, summary in summaries:
+        size = estimate_tokens(title) + estimate_tokens(summary)
+        if len(batches[-1]) >= 2 and tokens + size > PROMPT_MAX_TOKENS:
+            batches.append([])
+            tokens = overhead
+        batches[-1].append((title, summary))
+        tokens += size
+    if len(batches) > 1 and len(batches[-1]) == 1:
+        batches[-2].extend(batches.pop())
+    return batches
+
+def build_report(results: list[AITaskResult], title: str = "AI 일괄 분석 보고서") -> str:
+    """작업별 상태 표와 결과를 하나의 마크다운으로 합침. 각 결과의 제목 수준은 두 단계 내림"""
+    lines = [f"# {title}", "", "| 분석 범위 | AI | 모델 | 상태 | 소요 시간(초) |", "|---|---|---|---|---:|"]
+    for res in results:
+        if res.error is not None:
+            status = f"실패: {res.error.splitlines()[0]}" if res.error else "실패"
+        elif res.cached_at is not None:
+            status = f"저장된 결과 ({res.cached_at:%Y-%m-%d %H:%M})"
+        else:
+            status = "완료"
+        status = status.replace("|", "\\|")
+        lines.append(f"| {res.task.title} | {res.task.ai_type} | {res.task.model} | {status} | {res.elapsed:.1f} |")
+    for res in results:
+        if res.result is None:
+            continue
+        lines.extend(("", f"## {res.task.title} - {res.task.ai_type} ({res.task.model})", ""))
+        lines.append(_demote_headings(res.result))
+    return "\n".join(lines)
+
+_HEADING = re.compile(r"^(#{1,4}) ", re.MULTILINE)
+
+def _demote_headings(markdown: str) -> str:
+    # 코드 블록 안의 '#'은 건드리지 않음
+    parts = markdown.split("```")
+    for i in range(0, len(parts), 2):
+        parts[i] = _HEADING.sub(r"##\1 ", parts[i])
+    return "```".join(parts)
@@ -0,0 +1,264 @@
+"""LoadedData로부터 분석 범위별 AI 프롬프트 생성
+
+대시보드(전체), 뷰어(선택한 Ctr/카테고리), BS 일괄 분석(BS별)에서 같은 방식으로 프롬프트를 만듦
+항목이 많은 범위는 build_part_prompts()로 BS, 1레벨 카테고리 순서로 나눠 부분별로 분석한 뒤 종합함(runner.analyze_map_reduce)
+analyze_scope()는 분석 결과를 범위별 기준(AISnapshot)으로 저장하여, 변경분 분석에서 이후 바뀐 항목만 보낼 수 있게 함
+"""
+import json
+
+from datetime import datetime
+from threading import Event
+from typing import Callable, Iterable, Literal
+
+from db import LoadedData, CostCategory
+from db.aggregation import aggregate_ai_input
+from util import ExceptionWithMessage
+from .ai import (
+    _CostCategory, _CostElement, _CostCtr, _BudgetByCtr, _BudgetByElement, get_prompts_for_ai, estimate_tokens,
+    analyze
+)
+from .runner import analyze_map_reduce
+from .snapshot import AISnapshot, Snapshot
+
+MAP_REDUCE_MIN_ITEMS = 200 # 계획/집행이 있는 원가요소 또는 센터가 이보다 많으면 나눠서 분석
+
+def build_prompts(
+        months: list[int,],
+        ctr_codes: Iterable[str] | None = None,
+        element_codes: Iterable[str] | None = None,
+        categories: Iterable[CostCategory] | None = None
+    ) -> tuple[str, str, str]:
+    """
+    Args:
+        ctr_codes, element_codes
+            분석할 Ctr/원가요소 코드. None이면 캐시에 있는 전체
+        categories
+            보낼 카테고리. None이면 캐시에 있는 전체
+
+    Returns:
+        get_prompts_for_ai()와 같음
+    """
+    element_codes = None if element_codes is None else set(element_codes)
+    by_elem_code, by_ctr_code = aggregate_ai_input(LoadedData.df, months, ctr_codes, element_codes)
+    if not by_elem_code:
+        raise ExceptionWithMessage("분석할 데이터가 없습니다.")
+    return _make_prompts(by_elem_code, by_ctr_code, element_codes, categories)
+
+def build_part_prompts(
+        months: list[int,],
+        ctr_codes: Iterable[str] | None = None,
+        element_codes: Iterable[str] | None = None,
+        categories: Iterable[CostCategory] | None = None
+    ) -> list[tuple[str, str, str, str]]:
+    """범위가 커서 프롬프트 하나로 보내기 어려우면 나눈 부분별 프롬프트
+    BS별로 나누고, 그래도 큰 BS는 다시 1레벨 카테고리별로 나눔
+
+    Args:
+        build_prompts()와 같음
+
+    Returns:
+        [(부분 이름, system_prompt, user_prompt, json_data)]
+        나눌 필요가 없거나 나눌 수 없으면 빈 리스트 (build_prompts() 사용)
+    """
+    categories = None if categories is None else list(categories)
+    element_codes = None if element_codes is None else set(element_codes)
+    by_elem_code, by_ctr_code = aggregate_ai_input(LoadedData.df, months, ctr_codes, element_codes)
+    if not by_elem_code:
+        raise ExceptionWithMessage("분석할 데이터가 없습니다.")
+    return _split_parts(months, by_elem_code, by_ctr_code, element_codes, categories)
+
+def analyze_scope(
+        ai_type: Literal["ChatGPT", "Claude"],
+        key: str,
+        model: str,
+        months: list[int,],
+        ctr_codes: Iterable[str] | None = None,
+        element_codes: Iterable[str] | None = None,
+        categories: Iterable[CostCategory] | None = None,
+        refresh: bool = False,
+        delta: bool = False,
+        on_data: Callable[[str, int], None] | None = None,
+        on_progress: Callable[[int, int], None] | None = None,
+        on_chunk: Callable[[str], None] | None = None,
+        cancel_event: Event | None = None
+    ) -> tuple[str, datetime | None]:
+    """범위를 분석하고 결과를 다음 변경분 분석의 기준(AISnapshot)으로 저장 (워커 스레드에서 호출)
+    항목이 많으면 나눠서 분석한 뒤 종합함(build_part_prompts)
+
+    Args:
+        ctr_codes, element_codes, categories
+            build_prompts()와 같음
+        delta
+            True이고 이 범위를 분석한 적이 있으면 이전 분석 이후 바뀐 항목과 이전 결과만 보냄
+            바뀐 것이 없으면 이전 결과를 그대로 반환
+        on_data
+            보낼 데이터가 준비되면 (JSON, 예상 입력 토큰 수)로 호출
+        on_progress
+            나눠서 분석할 때 부분 분석이 하나 끝날 때마다 호출 (runner.analyze_map_reduce)
+        refresh, on_chunk, cancel_event
+            analyze()와 같음
+
+    Returns:
+        analyze()와 같음
+    """
+    ctr_codes = None if ctr_codes is None else set(ctr_codes)
+    element_codes = None if element_codes is None else set(element_codes)
+    categories = None if categories is None else list(categories)
+    scope_key = AISnapshot.make_key(
+        ctr_codes, element_codes, None if categories is None else [cat.pk for cat in categories]
+    )
+    by_elem_code, by_ctr_code = aggregate_ai_input(LoadedData.df, months, ctr_codes, element_codes)
+    if not by_elem_code:
+        raise ExceptionWithMessage("분석할 데이터가 없습니다.")
+
+    previous = AISnapshot.get(scope_key) if delta else None
+    if previous is not None:
+        if previous.months == months and previous.by_element == by_elem_code and previous.by_ctr == by_ctr_code:
+            return previous.summary, previous.created_at
+        # 이전에는 있었지만 지금은 없는 항목도 바뀐 항목으로 보냄
+        delta_by_elem = {**{code: (0.0, 0.0) for code in previous.by_element}, **by_elem_code}
+        delta_by_ctr = {**{code: (0.0, 0.0) for code in previous.by_ctr}, **by_ctr_code}
+        system_prompt, user_prompt, json_data = _make_prompts(
+            delta_by_elem, delta_by_ctr, element_codes, categories, previous=previous, months=months
+        )
+        parts = []
+    else:
+        parts = _split_parts(months, by_elem_code, by_ctr_code, element_codes, categories)
+
+    if parts:
+        json_data = json.dumps({name: json.loads(data) for name, _, _, data in parts}, ensure_ascii=False)
+        if on_data:
+            on_data(json_data, sum(estimate_tokens(system) + estimate_tokens(user) for _, system, user, _ in parts))
+        result, cached_at = analyze_map_reduce(
+            ai_type, key, model, [(name, system, user) for name, system, user, _ in parts], refresh,
+            on_progress, on_chunk, cancel_event
+        )
+    else:
+        if previous is None:
+            system_prompt, user_prompt, json_data = _make_prompts(by_elem_code, by_ctr_code, element_codes, categories)
+        if on_data:
+            on_data(json_data, estimate_tokens(system_prompt) + estimate_tokens(user_prompt))
+        result, cached_at = analyze(ai_type, system_prompt, user_prompt, key, model, refresh, on_chunk, cancel_event)
+
+    AISnapshot.put(scope_key, months, by_elem_code, by_ctr_code, result)
+    return result, cached_at
+
+def _split_parts(
+        months: list[int,],
+        by_elem_code: dict[str, tuple[float, float]],
+        by_ctr_code: dict[str, tuple[float, float]],
+        element_codes: set[str] | None,
+        categories: list[CostCategory] | None
+    ) -> list[tuple[str, str, str, str]]:
+    """build_part_prompts()와 같음. by_elem_code, by_ctr_code는 범위 전체의 집계"""
+    if not _is_large(by_elem_code, by_ctr_code):
+        return []
+
+    df = LoadedData.df
+    parts = []
+    for bs_name, bs_ctr_codes in _group_by_bs(by_ctr_code):
+        bs_by_elem, bs_by_ctr = aggregate_ai_input(df, months, bs_ctr_codes, element_codes)
+        if not bs_by_elem:
+            continue
+        if not _is_large(bs_by_elem, bs_by_ctr):
+            parts.append((bs_name, *_make_prompts(bs_by_elem, bs_by_ctr, element_codes, categories, bs_name)))
+            continue
+        for cat_name, cat_elem_codes in _group_by_first_category(bs_by_elem):
+            by_elem, by_ctr = aggregate_ai_input(df, months, bs_ctr_codes, cat_elem_codes)
+            if not by_elem:
+                continue
+            name = f"{bs_name} / {cat_name}"
+            parts.append((name, *_make_prompts(by_elem, by_ctr, cat_elem_codes, categories, name)))
+    return parts if len(parts) > 1 else []
+
+def _is_large(*sums: dict[str, tuple[float, float]]) -> bool:
+    return any(
+        sum(1 for planned, executed in by_code.values() if planned or executed) > MAP_REDUCE_MIN_ITEMS
+        for by_code in sums
+    )
+
+def _group_by_bs(by_ctr_code: dict[str, tuple[float, float]]) -> list[tuple[str, set[str]]]:
+    """[(BS 이름, Ctr 코드)]. 루트 Ctr는 따로 한 부분으로 봄"""
+    groups: dict[str, tuple[str, set[str]]] = {}
+    for code in by_ctr_code:
+        ctr = LoadedData.cached_cost_ctr[code]
+        bs = LoadedData.get_bs(ctr) or ctr
+        groups.setdefault(bs.code, (bs.name, set()))[1].add(code)
+    return [groups[code] for code in sorted(groups)]
+
+def _group_by_first_category(by_elem_code: dict[str, tuple[float, float]]) -> list[tuple[str, set[str]]]:
+    """[(1레벨 카테고리 이름, 원가요소 코드)]. 카테고리가 없는 원가요소는 분석에서 빠지므로 제외"""
+    categories = LoadedData.cached_cost_category
+    groups: dict[int, tuple[str, set[str]]] = {}
+    for code in by_elem_code:
+        cat = categories.get(LoadedData.cached_cost_element[code].category_pk) # type: ignore
+        first = None if cat is None else LoadedData.get_first_category(cat)
+        if first is None:
+            continue
+        groups.setdefault(first.pk, (first.name, set()))[1].add(code)
+    return [groups[pk] for pk in sorted(groups)]
+
+def _make_prompts(
+        by_elem_code: dict[str, tuple[float, float]],
+        by_ctr_code: dict[str, tuple[float, float]],
+        element_codes: set[str] | None,
+        categories: Iterable[CostCategory] | None,
+        part: str | None = None,
+        previous: Snapshot | None = None,
+        months: list[int,] | None = None
+    ) -> tuple[str, str, str]:
+    categories = LoadedData.cached_cost_category.values() if categories is None else categories
+    category_list = [
+        _CostCategory(
+            pk=cat.pk,
+            parent_pk=cat.parent_pk,
+            name=cat.name
+        ) for cat in categories
+    ]
+    element_list = [
+        _CostElement(
+            code=elem.code,
+            description=elem.description,
+            category_pk=elem.category_pk
+        ) for elem in LoadedData.cached_cost_element.values()
+        if element_codes is None or elem.code in element_codes
+    ]
+    ctr_list = [
+        _CostCtr(
+            code=ctr.code,
+            parent_code=ctr.parent_code,
+            name=ctr.name,
+            rnd=["Research", "Develop"].index(ctr.rnd),
+            oe=["공통비", "RE", "OE"].index(ctr.oe)
+        ) for ctr in LoadedData.cached_cost_ctr.values()
+    ]
+
+    return get_prompts_for_ai(
+        category_list,
+        element_list,
+        ctr_list,
+        [
+            _BudgetByElement(
+                cost_element_code=code,
+                planned=planned,
+                executed=executed
+            ) for code, (planned, executed) in by_elem_code.items()
+        ],
+        [
+            _BudgetByCtr(
+                cost_ctr_code=code,
+                planned=planned,
+                executed=executed
+            ) for code, (planned, executed) in by_ctr_code.items()
+        ],
+        part=part,
+        previous=previous,
+        months=months
+    )
+
+def get_bs_ctr_codes(bs_code: str) -> list[str,]:
+    """BS와 소속 Ctr 코드"""
+    return [
+        code for code, ctr in LoadedData.cached_cost_ctr.items()
+        if (bs := LoadedData.get_bs(ctr)) is not None and bs.code == bs_code
+    ]
@@ -0,0 +1,102 @@
+"""분석 범위별 마지막 AI 분석 기준(집계 스냅샷)
+
+변경분 분석(scope.analyze_scope(delta=True))에서 이전 분석 이후 바뀐 항목만 보내기 위해
+범위마다 마지막으로 분석한 기간, 원가요소/Ctr별 (계획, 집행)과 분석 결과를 AICache와 같은 SQLite 파일에 저장함
+"""
+import json
+import hashlib
+
+from dataclasses import dataclass
+from datetime import datetime
+from threading import Lock
+from time import time
+from typing import Iterable
+
+from .cache import connect
+
+@dataclass
+class Snapshot:
+    months: list[int]
+    by_element: dict[str, tuple[float, float]] # { 원가요소 코드: (계획, 집행) }
+    by_ctr: dict[str, tuple[float, float]] # { Ctr 코드: (계획, 집행) }
+    summary: str # 분석 결과 (마크다운)
+    created_at: datetime
+
+class AISnapshot:
+    MAX_ENTRIES = 100
+
+    DDL = (
+        "CREATE TABLE IF NOT EXISTS ai_snapshot ("
+        "   key TEXT PRIMARY KEY,"
+        "   months TEXT NOT NULL,"
+        "   by_element TEXT NOT NULL,"
+        "   by_ctr TEXT NOT NULL,"
+        "   summary TEXT NOT NULL,"
+        "   created_at REAL NOT NULL"
+        ")"
+    )
+
+    _lock = Lock()
+
+    @staticmethod
+    def make_key(
+            ctr_codes: Iterable[str] | None,
+            element_codes: Iterable[str] | None,
+            category_pks: Iterable[int] | None
+        ) -> str:
+        """분석 범위 키. None은 캐시에 있는 전체를 뜻하며 기간은 포함하지 않음"""
+        payload = json.dumps([
+            None if codes is None else sorted(codes)
+            for codes in (ctr_codes, element_codes, category_pks)
+        ], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def get(cls, key: str) -> Snapshot | None:
+        with cls._lock, connect(cls.DDL) as conn:
+            row = conn.execute(
+                "SELECT months, by_element, by_ctr, summary, created_at FROM ai_snapshot WHERE key = ?",
+                (key,)
+            ).fetchone()
+        if row is None:
+            return
+        months, by_element, by_ctr, summary, created_at = row
+        return Snapshot(
+            json.loads(months),
+            {code: tuple(val) for code, val in json.loads(by_element).items()},
+            {code: tuple(val) for code, val in json.loads(by_ctr).items()},
+            summary,
+            datetime.fromtimestamp(created_at)
+        )
+
+    @classmethod
+    def put(
+            cls,
+            key: str,
+            months: list[int],
+            by_element: dict[str, tuple[float, float]],
+            by_ctr: dict[str, tuple[float, float]],
+            summary: str
+        ):
+        """범위의 기준을 바꾸고 오래된 범위부터 MAX_ENTRIES를 넘는 항목을 지움"""
+        with cls._lock, connect(cls.DDL) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ai_snapshot (key, months, by_element, by_ctr, summary, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key, json.dumps(months),
+                    json.dumps(by_element, separators=(",", ":")), json.dumps(by_ctr, separators=(",", ":")),
+                    summary, time()
+                )
+            )
+            conn.execute(
+                "DELETE FROM ai_snapshot WHERE key NOT IN ("
+                "   SELECT key FROM ai_snapshot ORDER BY created_at DESC LIMIT ?"
+                ")",
+                (cls.MAX_ENTRIES,)
+            )
+
+    @classmethod
+    def remove(cls, key: str):
+        with cls._lock, connect(cls.DDL) as conn:
+            conn.execute("DELETE FROM ai_snapshot WHERE key = ?", (key,))
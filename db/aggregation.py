@@ -0,0 +1,386 @@
+"""LoadedData.df 집계 함수
+
+UI 스레드 밖에서 호출되므로 wx 객체에는 접근하지 않고 순수한 값(dict, list, float)만 반환함
+"""
+from collections import defaultdict
+from typing import Callable, Iterable
+
+import numpy as np
+import pandas as pd
+
+from .loaded_data import LoadedData
+from .models import MAXIMUM_DEPTH_OF_CATEGORY
+
+PLAN_COLUMNS = tuple(f"ConvPlan({i})" for i in range(1, 13))
+ACTUAL_COLUMNS = tuple(f"ConvActual({i})" for i in range(1, 13))
+
+def build_fact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """행마다 분류 정보를 붙인 집계용 DF 반환
+
+    컬럼:
+        ctr, elem, currency: 원본 코드
+        cat_pk: Cost Element에 할당된 카테고리 pk (캐시에 없으면 NaN)
+        cat1_pk: cat_pk의 level 2 카테고리 pk
+        rnd, oe: Cost Ctr의 개발/OE 구분
+        bs: Cost Ctr가 소속된 BS 코드 (루트 Ctr는 NaN)
+        ConvPlan(1~12), ConvActual(1~12): 0으로 채운 float64 금액
+    """
+    categories = LoadedData.cached_cost_category
+    elements = LoadedData.cached_cost_element
+    ctrs = LoadedData.cached_cost_ctr
+
+    elem_vs_cat = {
+        code: elem.category_pk
+        for code, elem in elements.items()
+        if elem.category_pk in categories
+    }
+    cat_vs_cat1 = {}
+    for pk, cat in categories.items():
+        first = LoadedData.get_first_category(cat)
+        if first is not None:
+            cat_vs_cat1[pk] = first.pk
+    ctr_vs_bs = {}
+    for code, ctr in ctrs.items():
+        bs = LoadedData.get_bs(ctr)
+        if bs is not None:
+            ctr_vs_bs[code] = bs.code
+
+    ctr_codes = df["Cost Center"].astype(object)
+    elem_codes = df["Cost Element"].astype(object)
+    cat_pks = elem_codes.map(elem_vs_cat).astype("Int64")
+    fact = pd.DataFrame({
+        "ctr": ctr_codes,
+        "elem": elem_codes,
+        "currency": df["Currency"].astype(object),
+        "cat_pk": cat_pks,
+        "cat1_pk": cat_pks.map(cat_vs_cat1).astype("Int64"),
+        "rnd": ctr_codes.map({code: ctr.rnd for code, ctr in ctrs.items()}),
+        "oe": ctr_codes.map({code: ctr.oe for code, ctr in ctrs.items()}),
+        "bs": ctr_codes.map(ctr_vs_bs),
+    }, index=df.index)
+    amounts = df[list(PLAN_COLUMNS + ACTUAL_COLUMNS)].astype("float64").fillna(0)
+    return pd.concat([fact, amounts], axis=1)
+
+def with_period(fact: pd.DataFrame, months: list[int,]) -> pd.DataFrame:
+    """기간 내 월별 금액을 합산한 'plan', 'actual' 컬럼을 추가하여 반환"""
+    fact = fact.copy(deep=False)
+    fact["plan"] = fact[[f"ConvPlan({i})" for i in months]].sum(axis=1)
+    fact["actual"] = fact[[f"ConvActual({i})" for i in months]].sum(axis=1)
+    return fact
+
+def _named(sums: pd.Series) -> dict[str, float]:
+    """{카테고리 pk: 값} Series를 {카테고리 이름: 값}으로 변환"""
+    categories = LoadedData.cached_cost_category
+    return {categories[pk].name: float(val) for pk, val in sums.items()}
+
+def _named_stack(stacked: dict[int, pd.Series]) -> dict[str, list[float,]]:
+    categories = LoadedData.cached_cost_category
+    return {categories[pk].name: [float(v) for v in values] for pk, values in stacked.items()}
+
+def _children_of() -> dict[int, list[int,]]:
+    children = defaultdict(list)
+    for cat in LoadedData.cached_cost_category.values():
+        if cat.parent_pk is not None:
+            children[cat.parent_pk].append(cat.pk)
+    return children
+
+def _get_direct_development_cost_pk() -> int|None:
+    """캐시에서 이름이 '직접개발비'인 카테고리 pk 반환"""
+    for cat in LoadedData.cached_cost_category.values():
+        if cat.name == "직접개발비":
+            return cat.pk
+
+def _stacked_by_group(
+        fact: pd.DataFrame,
+        stack_key: str,
+        stack_pks: list,
+        group_key: str,
+        clip: bool
+    ) -> tuple[dict[int, pd.Series], list[str,]]:
+    """stack_key(카테고리)별로 group_key(BS/팀) 값을 쌓은 막대 데이터
+
+    group은 합계 내림차순으로 정렬하고 합계가 0 이하인 group은 제외함
+
+    Returns:
+        { stack pk: 정렬된 group별 값 }, 정렬된 group 코드
+    """
+    sub = fact.loc[fact[stack_key].isin(stack_pks) & fact[group_key].notna()]
+    table = sub.groupby([stack_key, group_key])["actual"].sum().unstack(fill_value=0)
+    table = table.reindex(index=stack_pks, fill_value=0)
+    if clip:
+        table = table.clip(lower=0)
+    summation = table.sum(axis=0).sort_values(ascending=False, kind="stable")
+    sorted_groups = [code for code, sm in summation.items() if sm > 0]
+    return {pk: table.loc[pk, sorted_groups] for pk in stack_pks}, sorted_groups
+
+def _exe_portion(fact: pd.DataFrame) -> tuple[dict[str, tuple[float, float]], pd.Index]:
+    has_cat1 = fact["cat1_pk"].notna()
+    by_cat1 = fact.loc[has_cat1].groupby("cat1_pk")[["plan", "actual"]].sum()
+    categories = LoadedData.cached_cost_category
+    data = {
+        categories[pk].name: (float(row["plan"]), float(row["actual"]))
+        for pk, row in by_cat1.iterrows()
+    }
+    data = dict(sorted(data.items(), key=lambda item: item[1][0]))
+    return data, by_cat1.index
+
+def _dev_chart(fact: pd.DataFrame, group_key: str) -> dict|None:
+    """'직접개발비' 하위 카테고리의 group별 집행 비율 데이터"""
+    categories = LoadedData.cached_cost_category
+    ctrs = LoadedData.cached_cost_ctr
+    dev_pk = _get_direct_development_cost_pk()
+    child_pks = _children_of().get(dev_pk, []) if dev_pk is not None else []
+    if not child_pks:
+        return
+    sub = fact.loc[fact["cat_pk"].isin(child_pks) & fact[group_key].notna()]
+    table = sub.groupby(["cat_pk", group_key])["actual"].sum().unstack(fill_value=0)
+    table = table.reindex(index=child_pks, fill_value=0)
+    total = table.sum(axis=1)
+    summation = table.sum(axis=0).sort_values(ascending=False, kind="stable")
+    sorted_groups = [code for code, sm in summation.items() if sm > 0]
+    data = {
+        categories[pk].name: [float(total[pk])] + [float(table.loc[pk, code]) for code in sorted_groups]
+        for pk in child_pks
+    }
+    xlabels = ["전체",] + [ctrs[code].name for code in sorted_groups]
+    return {"data": data, "xlabels": xlabels}
+
+def _pie_and_bars(fact: pd.DataFrame, cat1_pks) -> list[dict]:
+    """level 2 카테고리별 하위 카테고리 구성 데이터 (이름순 정렬)"""
+    categories = LoadedData.cached_cost_category
+    children = _children_of()
+    leaf_sums = fact.groupby("cat_pk")["actual"].sum()
+    ret = []
+    for cat1_pk in cat1_pks:
+        lv2_data: dict[str, float] = {}
+        lv3_data: dict[str, float] = {}
+        for lv2_pk in children.get(cat1_pk, []):
+            lv2_value = 0.0
+            for lv3_pk in children.get(lv2_pk, []):
+                value = float(leaf_sums.get(lv3_pk, 0.0))
+                lv3_data[categories[lv3_pk].name] = value
+                lv2_value += value
+            lv2_data[categories[lv2_pk].name] = lv2_value
+        ret.append({
+            "name": categories[cat1_pk].name,
+            "lv2_data": dict(sorted(lv2_data.items(), key=lambda item: -item[1])),
+            "lv3_data": dict(sorted(lv3_data.items(), key=lambda item: -item[1])),
+        })
+    ret.sort(key=lambda item: item["name"])
+    return ret
+
+def aggregate_dashboard(fact: pd.DataFrame, months: list[int,]) -> dict:
+    """대시보드 차트 데이터"""
+    fact = with_period(fact, months)
+    ctrs = LoadedData.cached_cost_ctr
+
+    exe_portion, cat1_pks = _exe_portion(fact)
+    has_cat1 = fact["cat1_pk"].notna()
+    fact_cat1 = fact.loc[has_cat1]
+    currency = fact_cat1["currency"]
+    def by_cat1(mask: pd.Series|None = None) -> dict[str, float]:
+        sub = fact_cat1 if mask is None else fact_cat1.loc[mask]
+        return _named(sub.groupby("cat1_pk")["actual"].sum().reindex(cat1_pks, fill_value=0))
+
+    stacked, sorted_bs = _stacked_by_group(fact, "cat1_pk", list(cat1_pks), "bs", True)
+    return {
+        "exe_portion": exe_portion,
+        "total_plan": float(np.sum([value[0] for value in exe_portion.values()])),
+        "total_actual": float(np.sum([value[1] for value in exe_portion.values()])),
+        "lv1": {
+            "R&D": by_cat1(),
+            "개발 비용 구성": {key: float(val) for key, val in fact.groupby("rnd")["actual"].sum().items()},
+            "OE 비용 구성": {key: float(val) for key, val in fact.groupby("oe")["actual"].sum().items()},
+        },
+        "donut": {
+            "R&D": by_cat1(),
+            "국내": by_cat1(currency == "KRW"),
+            "해외": by_cat1(currency != "KRW"),
+            "NATC": by_cat1(currency == "USD"),
+            "NETC": by_cat1(currency == "EUR"),
+            "NCTC": by_cat1(currency == "CNY"),
+        },
+        "bs": {
+            "data": _named_stack(stacked),
+            "xlabels": [ctrs[code].name for code in sorted_bs],
+        },
+        "dev": _dev_chart(fact, "bs"),
+        "pie_and_bars": _pie_and_bars(fact, cat1_pks),
+    }
+
+def aggregate_bs(fact: pd.DataFrame, months: list[int,], bs_code: str) -> dict|None:
+    """BS별 차트 데이터. 해당 BS의 데이터가 없으면 None 반환"""
+    ctrs = LoadedData.cached_cost_ctr
+    team_codes = [ctr.code for ctr in ctrs.values() if ctr.parent_code == bs_code]
+    fact = fact.loc[fact["ctr"].isin([bs_code] + team_codes)]
+    if fact.empty:
+        return
+    fact = with_period(fact, months)
+    fact["team"] = fact["ctr"].where(fact["ctr"].isin(team_codes))
+
+    exe_portion, cat1_pks = _exe_portion(fact)
+    stacked, sorted_teams = _stacked_by_group(fact, "cat1_pk", list(cat1_pks), "team", True)
+    return {
+        "exe_portion": exe_portion,
+        "total_plan": float(np.sum([value[0] for value in exe_portion.values()])),
+        "total_actual": float(np.sum([value[1] for value in exe_portion.values()])),
+        "team": {
+            "data": _named_stack(stacked),
+            "xlabels": [ctrs[code].name for code in sorted_teams],
+        },
+        "dev": _dev_chart(fact, "team"),
+        "pie_and_bars": _pie_and_bars(fact, cat1_pks),
+    }
+
+def compact_fact_frame(fact: pd.DataFrame) -> pd.DataFrame:
+    """BS 차트에 필요한 키(ctr, cat_pk, cat1_pk, bs)별로 월별 금액을 미리 합산한 fact
+    aggregate_bs 결과는 원본 fact와 같으며, 여러 BS/기간을 반복 집계할 때 행 수를 줄임
+    """
+    keys = ["ctr", "cat_pk", "cat1_pk", "bs"]
+    columns = list(PLAN_COLUMNS + ACTUAL_COLUMNS)
+    return fact.groupby(keys, dropna=False, sort=False)[columns].sum().reset_index()
+
+def aggregate_bs_batch(
+        fact: pd.DataFrame,
+        periods: dict[str, list[int,]],
+        bs_codes: list[str,],
+        on_progress: Callable[[int, int], None] | None = None
+    ) -> dict[tuple[str, str], dict]:
+    """여러 BS와 기간의 BS별 차트 데이터를 한 번에 집계
+
+    fact를 한 번만 합산하고 BS별로 나눈 뒤 기간마다 aggregate_bs를 적용함
+
+    Args:
+        periods
+            { 기간 이름: 월 목록 }
+        on_progress
+            BS 하나의 집계가 끝날 때마다 (완료 수, 전체 수)로 호출됨
+
+    Returns:
+        { (BS 코드, 기간 이름): aggregate_bs 결과 }. 데이터가 없는 조합은 제외됨
+    """
+    compact = compact_fact_frame(fact)
+    by_bs = dict(tuple(compact.loc[compact["bs"].notna()].groupby("bs", sort=False)))
+    ret = {}
+    for i, bs_code in enumerate(bs_codes, 1):
+        sub = by_bs.get(bs_code)
+        if sub is not None:
+            for period, months in periods.items():
+                data = aggregate_bs(sub, months, bs_code)
+                if data is not None:
+                    ret[(bs_code, period)] = data
+        if on_progress:
+            on_progress(i, len(bs_codes))
+    return ret
+
+def aggregate_viewer(
+        fact: pd.DataFrame,
+        months: list[int,],
+        ctr_codes: list[str,],
+        element_codes: list[str,]
+    ) -> tuple[dict[int, tuple[float, float]], dict[str, tuple[int, int]]]:
+    """뷰어 트리의 계획/실적 값
+
+    카테고리 트리는 Ctr 필터만, Ctr 트리는 Category 필터만 적용됨
+
+    Returns:
+        { category pk: (plan, actual) } (하위 카테고리 합산 포함)
+        { ctr code 또는 'TOTAL-'+ctr code: (plan, actual) }
+    """
+    fact = with_period(fact, months)
+    categories = LoadedData.cached_cost_category
+    ctrs = LoadedData.cached_cost_ctr
+
+    # 카테고리: 최하위 근처(level >= MAXIMUM_DEPTH_OF_CATEGORY) 카테고리에 직접 할당된 값을 상위로 누적
+    sub = fact.loc[fact["ctr"].isin(ctr_codes)]
+    direct = sub.groupby("cat_pk")[["plan", "actual"]].sum()
+    cat_amounts = {pk: [0.0, 0.0] for pk in categories}
+    for pk, row in direct.iterrows():
+        cat = categories.get(pk)
+        if cat is None or LoadedData.get_level_of_category_from_cache(cat) < MAXIMUM_DEPTH_OF_CATEGORY:
+            continue
+        plan, actual = float(row["plan"]), float(row["actual"])
+        while cat is not None:
+            cat_amounts[cat.pk][0] += plan
+            cat_amounts[cat.pk][1] += actual
+            cat = categories.get(cat.parent_pk) if cat.parent_pk is not None else None
+
+    # Ctr: 각 Ctr 값은 정수로 절사 후 'TOTAL-' 키로 상위 누적
+    sub = fact.loc[fact["elem"].isin(element_codes)]
+    direct = sub.groupby("ctr")[["plan", "actual"]].sum()
+    ctr_amounts = {}
+    for code in ctrs:
+        ctr_amounts[code] = [0, 0]
+        ctr_amounts[f"TOTAL-{code}"] = [0, 0]
+    for code, row in direct.iterrows():
+        if code not in ctrs:
+            continue
+        plan, actual = int(row["plan"]), int(row["actual"])
+        ctr_amounts[code] = [plan, actual]
+        ctr = ctrs[code]
+        while ctr is not None:
+            ctr_amounts[f"TOTAL-{ctr.code}"][0] += plan
+            ctr_amounts[f"TOTAL-{ctr.code}"][1] += actual
+            ctr = ctrs.get(ctr.parent_code) if ctr.parent_code else None
+
+    return (
+        {pk: tuple(val) for pk, val in cat_amounts.items()},
+        {key: tuple(val) for key, val in ctr_amounts.items()},
+    )
+
+def aggregate_ai_input(
+        df: pd.DataFrame,
+        months: list[int,],
+        ctr_codes: Iterable[str] | None = None,
+        element_codes: Iterable[str] | None = None
+    ) -> tuple[dict[str, tuple[float, float]], dict[str, tuple[float, float]]]:
+    """AI 분석에 보낼 원가요소별, Ctr별 기간 계획/집행 합계
+
+    캐시(LoadedData.cached_*)에 있는 Ctr/원가요소의 행만 합산하며, 코드 컬럼(category)을 그대로 묶어 합산함
+
+    Args:
+        ctr_codes, element_codes
+            포함할 Ctr/원가요소 코드. None이면 캐시에 있는 전체
+
+    Returns:
+        { 원가요소 코드: (plan, actual) }
+        { ctr code: (plan, actual) }
+    """
+    ctrs = LoadedData.cached_cost_ctr.keys()
+    elements = LoadedData.cached_cost_element.keys()
+    ctr_codes = ctrs if ctr_codes is None else ctrs & set(ctr_codes)
+    element_codes = elements if element_codes is None else elements & set(element_codes)
+
+    mask = df["Cost Center"].isin(ctr_codes) & df["Cost Element"].isin(element_codes)
+    sub = df.loc[mask]
+    amounts = pd.DataFrame({
+        "plan": sub[[f"ConvPlan({i})" for i in months]].astype("float64").sum(axis=1),
+        "actual": sub[[f"ConvActual({i})" for i in months]].astype("float64").sum(axis=1),
+        "ctr": sub["Cost Center"],
+        "elem": sub["Cost Element"],
+    })
+
+    def by(key: str) -> dict[str, tuple[float, float]]:
+        sums = amounts.groupby(key, observed=True, sort=False)[["plan", "actual"]].sum()
+        return {
+            str(code): (float(plan), float(actual))
+            for code, plan, actual in zip(sums.index, sums["plan"], sums["actual"])
+        }
+
+    return by("elem"), by("ctr")
+
+def summarize_classification(df: pd.DataFrame) -> dict[str, int]|None:
+    """전체/분류/미분류 건의 연간 계획, 실적 합계. 데이터가 없으면 None 반환"""
+    if df.empty:
+        return
+    mask = LoadedData.get_available_mask(df)
+    plan = df[list(PLAN_COLUMNS)].astype("float64").fillna(0).sum(axis=1)
+    actual = df[list(ACTUAL_COLUMNS)].astype("float64").fillna(0).sum(axis=1)
+    return {
+        "plan_total": int(plan.sum()),
+        "plan_avail": int(plan[mask].sum()),
+        "plan_na": int(plan[~mask].sum()),
+        "act_total": int(actual.sum()),
+        "act_avail": int(actual[mask].sum()),
+        "act_na": int(actual[~mask].sum()),
+    }
@@ -0,0 +1,298 @@
+"""LoadedData 전체를 파일로 내보내기
+
+원본 데이터(관리 화면의 Raw Data 표와 같은 컬럼)와 카테고리/Cost Ctr별 월별 집계를
+CSV, Parquet, 엑셀(write-only)로 저장
+원본 데이터 표는 LoadedData.df를 CHUNK_ROWS행씩 나눠 분류 정보를 붙이고 바로 쓰므로,
+수십만 행에서도 변환된 표 전체를 메모리에 만들지 않음 (집계 표는 행 수가 Ctr/카테고리 수 정도라 한 번에 만듦)
+"""
+import os
+
+from typing import Callable, Iterable, Iterator, Literal
+
+import numpy as np
+import pandas as pd
+
+from util import ExceptionWithMessage
+from util.excel import Sheet, write_xlsx_sheets
+from .loaded_data import LoadedData
+from .models import MAXIMUM_DEPTH_OF_CATEGORY
+
+CHUNK_ROWS = 50000
+
+MONTH_HEADERS = tuple(
+    header
+    for i in range(1, 13)
+    for header in (f"계획({i}월)", f"실적({i}월)")
+)
+MONTH_COLUMNS = tuple(
+    col
+    for i in range(1, 13)
+    for col in (f"ConvPlan({i})", f"ConvActual({i})")
+)
+
+# { 표 이름: 파일/시트 이름 }
+TABLES = {
+    "data": "Raw Data",
+    "category": "Category 집계",
+    "ctr": "Cost Ctr 집계",
+}
+
+DATA_TEXT_HEADERS = (
+    "미집계", "대계정", "계정항목", "Cost Ctr", "개발 비중", "OE 비중", "BS", "팀", "Cost Element", "Cost Category", "통화코드",
+)
+DATA_HEADERS = DATA_TEXT_HEADERS + MONTH_HEADERS
+
+def build_data_frame(df: pd.DataFrame | None = None) -> pd.DataFrame:
+    """관리 화면의 Raw Data 표와 같은 컬럼으로 분류 정보를 붙인 DF 반환 (미분류 건 포함)"""
+    df = LoadedData.df if df is None else df
+    return _build_data_chunk(df, _get_data_maps())
+
+def iter_data_frames(df: pd.DataFrame | None = None, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """build_data_frame()을 chunk_rows행씩 나눠 만듦. 행이 없어도 빈 DF 하나를 반환"""
+    df = LoadedData.df if df is None else df
+    maps = _get_data_maps()
+    for start in range(0, max(1, len(df)), chunk_rows):
+        yield _build_data_chunk(df.iloc[start:start+chunk_rows], maps)
+
+def _get_data_maps() -> dict[str, dict]:
+    """Ctr/원가요소 코드별 BS, 팀, 카테고리 경로 등 (chunk마다 다시 만들지 않도록 한 번만 계산)"""
+    categories = LoadedData.cached_cost_category
+    elements = LoadedData.cached_cost_element
+    ctrs = LoadedData.cached_cost_ctr
+
+    ctr_vs_bs = {}
+    ctr_vs_team = {}
+    for code, ctr in ctrs.items():
+        level = LoadedData.get_level_of_ctr_from_cache(ctr)
+        if level == 2:
+            ctr_vs_bs[code] = ctr.name
+        elif level == 3:
+            ctr_vs_bs[code] = ctrs[ctr.parent_code].name
+            ctr_vs_team[code] = ctr.name
+    elem_vs_path = {
+        code: LoadedData.get_category_path_from_cache(categories[elem.category_pk])
+        for code, elem in elements.items()
+        if elem.category_pk in categories
+    }
+    return {
+        "rnd": {code: ctr.rnd for code, ctr in ctrs.items()},
+        "oe": {code: ctr.oe for code, ctr in ctrs.items()},
+        "bs": ctr_vs_bs,
+        "team": ctr_vs_team,
+        "path": elem_vs_path,
+    }
+
+def _build_data_chunk(df: pd.DataFrame, maps: dict[str, dict]) -> pd.DataFrame:
+    ctr_codes = df["Cost Center"].astype(object)
+    elem_codes = df["Cost Element"].astype(object)
+    frame = pd.DataFrame({
+        "미집계": np.where(LoadedData.get_available_mask(df), "", "●"),
+        "대계정": df["대계정"].astype(object),
+        "계정항목": df["계정항목"].astype(object),
+        "Cost Ctr": ctr_codes,
+        "개발 비중": ctr_codes.map(maps["rnd"]),
+        "OE 비중": ctr_codes.map(maps["oe"]),
+        "BS": ctr_codes.map(maps["bs"]),
+        "팀": ctr_codes.map(maps["team"]),
+        "Cost Element": elem_codes,
+        "Cost Category": elem_codes.map(maps["path"]),
+        "통화코드": df["Currency"].astype(object),
+    }, index=df.index).astype(object) # 모두 빈 chunk도 같은 dtype이 되도록
+    amounts = df[list(MONTH_COLUMNS)].astype("float64")
+    amounts.columns = list(MONTH_HEADERS)
+    return pd.concat([frame, amounts], axis=1).reset_index(drop=True)
+
+def _monthly_sums(df: pd.DataFrame, key: pd.Series) -> pd.DataFrame:
+    return df[list(MONTH_COLUMNS)].astype("float64").fillna(0).groupby(key.astype(object)).sum()
+
+def _with_totals(frame: pd.DataFrame, values: np.ndarray) -> pd.DataFrame:
+    amounts = pd.DataFrame(values, columns=list(MONTH_HEADERS), index=frame.index)
+    amounts["계획(합계)"] = values[:, 0::2].sum(axis=1)
+    amounts["실적(합계)"] = values[:, 1::2].sum(axis=1)
+    return pd.concat([frame, amounts], axis=1)
+
+def build_category_rollup(df: pd.DataFrame | None = None) -> pd.DataFrame:
+    """카테고리별 월별 계획/실적 (하위 카테고리 합산, 분류 건만)
+    뷰어와 같이 level >= MAXIMUM_DEPTH_OF_CATEGORY 카테고리에 할당된 값을 상위로 누적
+    """
+    df = LoadedData.get_filtered_df(df)
+    categories = LoadedData.cached_cost_category
+    elem_vs_cat = {code: elem.category_pk for code, elem in LoadedData.cached_cost_element.items()}
+    direct = _monthly_sums(df, df["Cost Element"].astype(object).map(elem_vs_cat))
+
+    pks = list(categories)
+    pk_vs_idx = {pk: i for i, pk in enumerate(pks)}
+    values = np.zeros((len(pks), len(MONTH_COLUMNS)))
+    for pk, row in zip(direct.index, direct.to_numpy()):
+        cat = categories.get(pk)
+        if cat is None or LoadedData.get_level_of_category_from_cache(cat) < MAXIMUM_DEPTH_OF_CATEGORY:
+            continue
+        while cat is not None:
+            values[pk_vs_idx[cat.pk]] += row
+            cat = categories.get(cat.parent_pk) if cat.parent_pk is not None else None
+
+    frame = pd.DataFrame({
+        "Cost Category": [LoadedData.get_category_path_from_cache(categories[pk]) for pk in pks],
+        "Level": [LoadedData.get_level_of_category_from_cache(categories[pk]) for pk in pks],
+    })
+    frame = _with_totals(frame, values)
+    return frame.sort_values("Cost Category", kind="stable").reset_index(drop=True)
+
+def build_ctr_rollup(df: pd.DataFrame | None = None) -> pd.DataFrame:
+    """Cost Ctr별 월별 계획/실적 (분류 건만)
+    각 Ctr 자신의 값과 하위 Ctr를 합산한 값을 모두 행으로 가짐 (구분: '개별', '합계')
+    """
+    df = LoadedData.get_filtered_df(df)
+    ctrs = LoadedData.cached_cost_ctr
+    direct = _monthly_sums(df, df["Cost Center"])
+
+    codes = list(ctrs)
+    code_vs_idx = {code: i for i, code in enumerate(codes)}
+    own = np.zeros((len(codes), len(MONTH_COLUMNS)))
+    total = np.zeros((len(codes), len(MONTH_COLUMNS)))
+    for code, row in zip(direct.index, direct.to_numpy()):
+        if code not in ctrs:
+            continue
+        own[code_vs_idx[code]] = row
+        ctr = ctrs[code]
+        while ctr is not None:
+            total[code_vs_idx[ctr.code]] += row
+            ctr = ctrs.get(ctr.parent_code) if ctr.parent_code else None
+
+    def frame_of(kind: str, values: np.ndarray) -> pd.DataFrame:
+        frame = pd.DataFrame({
+            "Cost Ctr": codes,
+            "이름": [ctrs[code].name for code in codes],
+            "상위 Cost Ctr": [ctrs[code].parent_code or "" for code in codes],
+            "Level": [LoadedData.get_level_of_ctr_from_cache(ctrs[code]) for code in codes],
+            "구분": kind,
+        })
+        return _with_totals(frame, values)
+
+    frame = pd.concat([frame_of("개별", own), frame_of("합계", total)], ignore_index=True)
+    return frame.sort_values(["Level", "Cost Ctr", "구분"], kind="stable").reset_index(drop=True)
+
+def build_export_frames(df: pd.DataFrame | None = None) -> dict[str, pd.DataFrame]:
+    """{ 표 이름: DF } (TABLES 순서). 원본 데이터 표 전체를 메모리에 만들므로 파일 저장은 export_all() 사용"""
+    df = LoadedData.df if df is None else df
+    return {
+        "data": build_data_frame(df),
+        "category": build_category_rollup(df),
+        "ctr": build_ctr_rollup(df),
+    }
+
+def _iter_rows(frames: Iterable[pd.DataFrame], chunk_rows: int) -> Iterator[tuple]:
+    """엑셀용 행 generator. NaN은 빈 셀로 변환하며 chunk 단위로만 object 변환하여 메모리를 제한"""
+    for frame in frames:
+        for start in range(0, len(frame), chunk_rows):
+            chunk = frame.iloc[start:start+chunk_rows].astype(object)
+            chunk = chunk.where(chunk.notna(), None)
+            yield from chunk.itertuples(index=False, name=None)
+
+def _iter_chunks(frame: pd.DataFrame, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    for start in range(0, max(1, len(frame)), chunk_rows):
+        yield frame.iloc[start:start+chunk_rows]
+
+def _write_csv(frames: Iterable[pd.DataFrame], filepath: str):
+    # 엑셀에서 한글이 깨지지 않도록 BOM 포함 (BOM은 처음 한 번만)
+    with open(filepath, "w", encoding="utf-8-sig", newline="") as f:
+        for i, frame in enumerate(frames):
+            frame.to_csv(f, index=False, header=i == 0)
+
+def _write_parquet(frames: Iterable[pd.DataFrame], filepath: str, text_columns: Iterable[str] = ()):
+    """
+    Args:
+        text_columns
+            chunk에 따라 값이 모두 비어 있을 수 있는 컬럼. 첫 chunk와 관계없이 string으로 저장
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExceptionWithMessage("Parquet 파일로 저장하려면 pyarrow 패키지가 필요합니다.")
+    text_columns = set(text_columns)
+    writer = None
+    try:
+        for frame in frames:
+            if writer is None:
+                schema = pa.Schema.from_pandas(frame, preserve_index=False)
+                for i, field in enumerate(schema):
+                    if field.name in text_columns:
+                        schema = schema.set(i, pa.field(field.name, pa.string()))
+                writer = pq.ParquetWriter(filepath, schema)
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+    finally:
+        if writer is not None:
+            writer.close()
+
+def get_export_paths(filepath: str, fmt: Literal["xlsx", "csv", "parquet"]) -> dict[str, str]:
+    """{ 표 이름: 저장 경로 }
+    엑셀은 한 파일에 표별로 시트를 만들고, CSV/Parquet는 '파일명_표이름.확장자'로 표별 파일을 만듦
+    """
+    stem, _ = os.path.splitext(filepath)
+    if fmt == "xlsx":
+        return {name: f"{stem}.xlsx" for name in TABLES}
+    return {name: f"{stem}_{title}.{fmt}" for name, title in TABLES.items()}
+
+def export_all(
+        filepath: str,
+        fmt: Literal["xlsx", "csv", "parquet"],
+        df: pd.DataFrame | None = None,
+        on_progress: Callable[[str], None] | None = None,
+        chunk_rows: int = CHUNK_ROWS
+    ) -> list[str,]:
+    """원본 데이터와 집계 표를 모두 저장하고 저장된 파일 경로 목록 반환
+
+    Args:
+        fmt
+            "xlsx", "csv", "parquet"
+        df
+            None이면 현재 로드된 DF
+        on_progress
+            진행 상황 메시지를 받을 함수 (워커 스레드에서 호출됨)
+    """
+    df = LoadedData.df if df is None else df
+    if on_progress:
+        on_progress("데이터를 집계 중입니다.")
+    rollups = {
+        "category": build_category_rollup(df),
+        "ctr": build_ctr_rollup(df),
+    }
+    paths = get_export_paths(filepath, fmt)
+
+    def iter_frames(name: str) -> Iterator[pd.DataFrame]:
+        """원본 데이터는 chunk마다 만들고, 집계 표는 chunk로 나눔"""
+        if name == "data":
+            return iter_data_frames(df, chunk_rows)
+        return _iter_chunks(rollups[name], chunk_rows)
+
+    match fmt:
+        case "xlsx":
+            def report(title: str, count: int):
+                if on_progress:
+                    on_progress(f"'{title}' 시트를 저장 중입니다. ({count:,}행)")
+            headers = {"data": list(DATA_HEADERS), **{name: list(frame.columns) for name, frame in rollups.items()}}
+            sheets = [
+                Sheet(
+                    title,
+                    headers[name],
+                    _iter_rows(iter_frames(name), chunk_rows),
+                    [max(10, min(40, len(str(col))*2)) for col in headers[name]],
+                    style_body=False
+                )
+                for name, title in TABLES.items()
+            ]
+            write_xlsx_sheets(paths["data"], sheets, report)
+        case "csv":
+            for name, title in TABLES.items():
+                if on_progress:
+                    on_progress(f"'{title}' 파일을 저장 중입니다.")
+                _write_csv(iter_frames(name), paths[name])
+        case "parquet":
+            for name, title in TABLES.items():
+                if on_progress:
+                    on_progress(f"'{title}' 파일을 저장 중입니다.")
+                _write_parquet(iter_frames(name), paths[name], DATA_TEXT_HEADERS if name == "data" else ())
+        case _:
+            raise ExceptionWithMessage(f"지원하지 않는 형식입니다: {fmt}")
+    return list(dict.fromkeys(paths.values()))
@@ -1,9 +1,10 @@
 import re
 import hashlib
-import openpyxl as xl
+from threading import Lock
 import numpy as np
 import pandas as pd
 from .models import Currency, CostCategory, CostElement, CostCtr
+from .snapshot import save_snapshot, load_snapshot, find_stale_files
 from util import ExceptionWithMessage
 
 REQUIRED_COLUMNS = ( # 엑셀 로우 데이터에 반드시 존재해야 하는 컬럼
@@ -59,6 +60,10 @@ class LoadedData:
     )
 
     file_hash: dict = {} # { hash (str): filepath (str) }
+    restored_files: dict[str, dict] = {} # 스냅샷에서 복원한 원본 파일 정보 { hash: {path, size, mtime} }
+    restore_error: str | None = None # 스냅샷을 불러오지 못한 경우 안내 메시지
+    _snapshot_lock = Lock()
+    _snapshot_dirty = False # 마지막 스냅샷 저장 이후 DF나 파일 목록이 바뀜
 
     cached_cost_category: dict[int, CostCategory] = {}
     cached_cost_element: dict[str, CostElement] = {}
@@ -95,13 +100,15 @@ class LoadedData:
             data_frames.append(df)
 
         cls.df = pd.concat(data_frames)
-        cls.file_hash.update(sha256_vs_filepath)
+        cls.file_hash = {**cls.file_hash, **sha256_vs_filepath}
+        cls._snapshot_dirty = True
 
     @classmethod
     def _load_old_format(cls, filepath: str, sha256: str) -> pd.DataFrame|None:
         """예전 포맷의 파일을 읽고 DataFrame으로 반환
         올바른 포맷이 아닌 경우 None 반환
         """
+        import openpyxl as xl
         fixed_columns = {
             "Cost Ctr": 3,
             "Cost Elem.": 8,
@@ -188,6 +195,7 @@ class LoadedData:
 
     @classmethod
     def _load_new_format(cls, filepath: str, sha256: str) -> pd.DataFrame:
+        import openpyxl as xl
         regex_yymm = re.compile(r"(\d{2})\.(\d{2})") # yy.mm 형식
         currencies = LoadedData.cached_currency
         wb = xl.load_workbook(filepath)
@@ -291,6 +299,7 @@ class LoadedData:
                 df = cls._load_new_format(filepath, sha256)
             data_frames.append(df)
         cls.df = pd.concat(data_frames)
+        cls._snapshot_dirty = True
 
     @classmethod
     def remove_raw_data(cls, file_hash: str):
@@ -300,9 +309,11 @@ class LoadedData:
             file_hash
                 삭제하고자 하는 데이터의 출처 파일의 SHA256 해시
         """
+        # 워커 스레드가 읽고 있을 수 있으므로 DF와 파일 목록은 수정하지 않고 새 객체로 교체
         df = cls.df
-        df.drop(df[df["SHA256"]==file_hash].index, inplace=True)
-        del cls.file_hash[file_hash]
+        cls.df = df[df["SHA256"] != file_hash]
+        cls.file_hash = {sha256: filepath for sha256, filepath in cls.file_hash.items() if sha256 != file_hash}
+        cls._snapshot_dirty = True
 
     @classmethod
     def get_all_currencies(cls) -> set[str,]:
@@ -311,8 +322,10 @@ class LoadedData:
 
     @classmethod
     def update_currency(cls):
-        """DB에서 환율 정보를 불러와 현재 DF의 Conv 컬럼들을 업데이트"""
-        df = cls.df
+        """DB에서 환율 정보를 불러와 현재 DF의 Conv 컬럼들을 업데이트
+        워커 스레드가 읽고 있을 수 있으므로 복사본을 수정한 뒤 교체함
+        """
+        df = cls.df.copy()
         currencies = cls.cached_currency
         for curr in currencies.values():
             mask = df["Currency"] == curr.code
@@ -323,6 +336,46 @@ class LoadedData:
         for month in range(1, 13):
             df.loc[mask, f"ConvPlan({month})"] = np.nan
             df.loc[mask, f"ConvActual({month})"] = np.nan
+        cls.df = df
+        cls._snapshot_dirty = True
+
+    @classmethod
+    def save_snapshot(cls):
+        """다음 실행 때 엑셀을 다시 읽지 않도록 현재 DF와 파일 목록을 저장 (바뀐 것이 없으면 생략)
+        전체를 다시 쓰므로 데이터를 바꿀 때마다 부르지 않고 작업 단위가 끝난 뒤 워커 스레드에서 호출
+        저장에 실패해도 현재 작업에는 영향이 없으므로 무시하고 다음 저장 때 다시 시도함
+        """
+        with cls._snapshot_lock:
+            if not cls._snapshot_dirty:
+                return
+            cls._snapshot_dirty = False
+            df, file_hash = cls.df, cls.file_hash
+            try:
+                save_snapshot(df, file_hash)
+            except OSError:
+                cls._snapshot_dirty = True
+
+    @classmethod
+    def restore_snapshot(cls) -> bool:
+        """이전 실행의 스냅샷이 있으면 DF와 파일 목록을 복원
+        원본 파일이 바뀌었는지는 find_stale_files()로 따로 확인해야 함
+        스냅샷을 읽을 수 없으면 빈 상태로 시작하고 restore_error에 메시지를 남김
+        """
+        try:
+            snapshot = load_snapshot()
+        except ExceptionWithMessage as e:
+            cls.restore_error = str(e)
+            return False
+        if snapshot is None:
+            return False
+        cls.df, cls.file_hash, cls.restored_files = snapshot
+        return True
+
+    @classmethod
+    def find_stale_files(cls) -> list[str,]:
+        """스냅샷에서 복원한 원본 파일 중 바뀌었거나 없어진 파일 경로 (해시 계산이 있어 워커 스레드에서 호출)"""
+        restored = {sha256: info for sha256, info in cls.restored_files.items() if sha256 in cls.file_hash}
+        return find_stale_files(restored)
 
     @classmethod
     def get_level_of_ctr_from_cache(cls, ctr: CostCtr) -> int:
@@ -377,18 +430,21 @@ class LoadedData:
         return cls.cached_cost_ctr[ctr.parent_code]
 
     @classmethod
-    def get_available_mask(cls) -> pd.Series:
-        """캐시를 참고하여 '분류' 건에 대한 마스크 반환"""
-        df = cls.df
+    def get_available_mask(cls, df: pd.DataFrame|None = None) -> pd.Series:
+        """캐시를 참고하여 '분류' 건에 대한 마스크 반환
+        df를 넘기지 않으면 현재 로드된 DF 기준
+        """
+        df = cls.df if df is None else df
         mask = (df["Cost Center"].isin(LoadedData.cached_cost_ctr)) \
             & (df["Cost Element"].isin(LoadedData.cached_cost_element)) \
             & (df["Currency"].isin(LoadedData.cached_currency))
         return mask
 
     @classmethod
-    def get_filtered_df(cls) -> pd.DataFrame:
+    def get_filtered_df(cls, df: pd.DataFrame|None = None) -> pd.DataFrame:
         """'미분류' 건들을 제외한 df 반환"""
-        return cls.df.loc[cls.get_available_mask()]
+        df = cls.df if df is None else df
+        return df.loc[cls.get_available_mask(df)]
 
     @classmethod
     def cache_all(cls):
@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-import openpyxl as xl
-
 from collections import defaultdict
 from enum import StrEnum
 from sqlalchemy import Column, Integer, Float, String, DateTime, \
@@ -719,6 +717,7 @@ class Currency(Base):
 
 
 def read_ctr_excel(excel_file_path: str) -> list[CostCtr]:
+    import openpyxl as xl
     root_code = "K710000"
     ret: list[CostCtr] = []
     wb = xl.load_workbook(excel_file_path, data_only=True)
@@ -785,6 +784,7 @@ def read_ctr_excel(excel_file_path: str) -> list[CostCtr]:
     return ret
 
 def read_element_excel(excel_file_path: str) -> tuple[list[CostCategory], list[CostElement]]:
+    import openpyxl as xl
     cats: list[CostCategory] = []
     cat1_by_name: dict[str, CostCategory] = {}
     cat2_by_name: dict[str, CostCategory] = {}
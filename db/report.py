@@ -0,0 +1,80 @@
+"""모든 BS × 기간의 BS별 차트 이미지 일괄 생성
+
+집계는 aggregate_bs_batch로 한 번에 수행하고 이미지는 util.chart_render의 프로세스 풀에서 병렬로 그림
+저장 구조: 폴더/BS 이름/기간/01.png, 02.png, ...
+"""
+import os
+import re
+
+from typing import Callable
+
+import pandas as pd
+
+from util import Config
+from util.chart_render import EXPORT_DPI, RenderJob, bs_jobs, summary_header
+from .aggregation import build_fact_frame, aggregate_bs_batch
+from .loaded_data import LoadedData
+from .models import CostCtr
+
+REPORT_PERIODS = ("전체", "1Q", "2Q", "3Q", "4Q")
+
+def _safe_name(name: str) -> str:
+    """파일/폴더 이름에 쓸 수 없는 문자를 '_'로 바꿈"""
+    return re.sub(r'[\\/:*?"<>|]', "_", name).strip().rstrip(".") or "_"
+
+def get_bs_list() -> list[CostCtr,]:
+    """캐시의 BS(level 2 Ctr) 목록 (이름순)"""
+    bs_list = [
+        ctr for ctr in LoadedData.cached_cost_ctr.values()
+        if LoadedData.get_level_of_ctr_from_cache(ctr) == 2
+    ]
+    bs_list.sort(key=lambda ctr: ctr.name)
+    return bs_list
+
+def build_bs_report_jobs(
+        dir_path: str,
+        fmt: str,
+        header_colors: dict[str, str],
+        bs_list: list[CostCtr,] | None = None,
+        periods: tuple[str,] = REPORT_PERIODS,
+        df: pd.DataFrame | None = None,
+        on_progress: Callable[[str], None] | None = None,
+        dpi: int = EXPORT_DPI
+    ) -> list[RenderJob]:
+    """BS × 기간 조합마다 BS별 차트 화면과 같은 이미지 job 생성. 데이터가 없는 조합은 제외됨
+
+    Args:
+        header_colors
+            총계 표 색상. summary_header 참고
+        bs_list
+            None이면 get_bs_list()
+        df
+            None이면 현재 로드된 DF
+        on_progress
+            진행 상황 메시지를 받을 함수 (워커 스레드에서 호출됨)
+    """
+    df = LoadedData.df if df is None else df
+    bs_list = get_bs_list() if bs_list is None else bs_list
+
+    def report(done: int, total: int):
+        if on_progress:
+            on_progress(f"BS별 데이터를 집계 중입니다. ({done}/{total})")
+
+    report(0, len(bs_list))
+    fact = build_fact_frame(LoadedData.get_filtered_df(df))
+    aggregated = aggregate_bs_batch(
+        fact,
+        {period: Config.get_months(period) for period in periods},
+        [bs.code for bs in bs_list],
+        report
+    )
+    jobs = []
+    for bs in bs_list:
+        for period in periods:
+            data = aggregated.get((bs.code, period))
+            if data is None:
+                continue
+            sub_dir = os.path.join(dir_path, _safe_name(bs.name), _safe_name(period))
+            header = summary_header(f"{period} 총계", data["total_plan"], data["total_actual"], header_colors)
+            jobs.extend(bs_jobs(data, header, lambda no: os.path.join(sub_dir, f"{no:02}.{fmt}"), dpi))
+    return jobs
@@ -0,0 +1,145 @@
+"""로드된 raw data(LoadedData.df, file_hash)의 세션 스냅샷
+
+엑셀을 다시 파싱하지 않도록 DF를 컬럼별 .npy 파일로 저장하고, 다음 실행 시 memory-map으로 불러옴
+    category 컬럼: 코드(int32) .npy + 카테고리 목록(meta.json)
+        문자열 등 숫자가 아닌 컬럼도 category로 바꿔 저장 (object 배열은 pickle이 필요하여 memory-map 불가)
+    숫자 컬럼: .npy 그대로
+    index(Key): ASCII 바이트 배열 .npy
+저장할 때마다 새 폴더(generation)에 쓰고 current.json을 교체하므로 저장 도중 종료되어도 이전 스냅샷이 유지되며,
+이전 폴더는 memory-map이 해제되어 삭제 가능할 때 지워짐
+"""
+import os
+import json
+import shutil
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from .database import DATABASE_PATH
+from util import ExceptionWithMessage
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_DIR = os.path.join(os.path.dirname(DATABASE_PATH), "session")
+_POINTER_PATH = os.path.join(SNAPSHOT_DIR, "current.json")
+
+def _file_stat(filepath: str) -> tuple[int, float] | None:
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return
+    return st.st_size, st.st_mtime
+
+def save_snapshot(df: pd.DataFrame, file_hash: dict[str, str]):
+    """DF와 파일 목록 저장. 파일이 없으면 스냅샷을 지움"""
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    if not file_hash:
+        _write_pointer(None)
+        _remove_old_generations(None)
+        return
+
+    generation = f"{int.from_bytes(os.urandom(4), 'little'):08x}"
+    dir_path = os.path.join(SNAPSHOT_DIR, generation)
+    os.makedirs(dir_path)
+    columns = []
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        filename = f"{i:03}.npy"
+        if not isinstance(series.dtype, pd.CategoricalDtype) and series.dtype.kind not in "biuf":
+            # 카테고리가 다른 파일끼리 concat하면 category 컬럼도 object가 됨
+            series = series.astype("category")
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            np.save(os.path.join(dir_path, filename), series.cat.codes.to_numpy(dtype=np.int32), allow_pickle=False)
+            columns.append({"name": col, "file": filename, "categories": series.cat.categories.tolist()})
+        else:
+            np.save(os.path.join(dir_path, filename), series.to_numpy(), allow_pickle=False)
+            columns.append({"name": col, "file": filename})
+    np.save(os.path.join(dir_path, "index.npy"), df.index.to_numpy(dtype=str).astype("S"), allow_pickle=False)
+
+    files = {}
+    for sha256, filepath in file_hash.items():
+        stat = _file_stat(filepath)
+        files[sha256] = {"path": filepath, "size": stat and stat[0], "mtime": stat and stat[1]}
+    meta = {"format": SNAPSHOT_FORMAT, "rows": len(df), "columns": columns, "files": files}
+    with open(os.path.join(dir_path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    _write_pointer(generation)
+    _remove_old_generations(generation)
+
+def load_snapshot() -> tuple[pd.DataFrame, dict[str, str], dict[str, dict]] | None:
+    """저장된 스냅샷을 memory-map으로 불러와 (DF, file_hash, 파일별 크기/수정 시각) 반환
+    스냅샷이 없으면 None이며, 있는데 읽을 수 없거나 형식이 맞지 않으면 ExceptionWithMessage
+    """
+    generation = _read_pointer()
+    if generation is None:
+        return
+    dir_path = os.path.join(SNAPSHOT_DIR, generation)
+    error = ExceptionWithMessage(
+        "이전 실행의 Raw Data를 불러오지 못했습니다.\n" \
+            "'Raw Data 관리'에서 파일을 다시 업로드하세요.\n\n" + dir_path
+    )
+    try:
+        with open(os.path.join(dir_path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != SNAPSHOT_FORMAT:
+            raise error
+        data = {}
+        for col in meta["columns"]:
+            # copy-on-write: DF를 수정해도 파일은 바뀌지 않음
+            arr = np.load(os.path.join(dir_path, col["file"]), mmap_mode="c")
+            if "categories" in col:
+                data[col["name"]] = pd.Categorical.from_codes(arr, categories=col["categories"])
+            else:
+                data[col["name"]] = arr
+        keys = np.load(os.path.join(dir_path, "index.npy"), mmap_mode="r")
+        index = pd.Index(keys.astype(str), name="Key", dtype="string")
+        df = pd.DataFrame(data, index=index, copy=False)
+    except (OSError, ValueError, KeyError) as e:
+        raise error from e
+    if len(df) != meta["rows"]:
+        raise error
+    files = meta["files"]
+    return df, {sha256: info["path"] for sha256, info in files.items()}, files
+
+def find_stale_files(files: dict[str, dict]) -> list[str]:
+    """스냅샷 이후 내용이 바뀌었거나 없어진 원본 파일 경로
+    크기와 수정 시각이 같으면 해시를 다시 계산하지 않음
+
+    Args:
+        files
+            load_snapshot()이 반환한 파일별 정보
+    """
+    stale = []
+    for sha256, info in files.items():
+        filepath = info["path"]
+        stat = _file_stat(filepath)
+        if stat is None:
+            stale.append(filepath)
+            continue
+        if [info["size"], info["mtime"]] == list(stat):
+            continue
+        with open(filepath, "rb") as f:
+            if hashlib.file_digest(f, "sha256").hexdigest() != sha256:
+                stale.append(filepath)
+    return stale
+
+def _read_pointer() -> str | None:
+    try:
+        with open(_POINTER_PATH, encoding="utf-8") as f:
+            return json.load(f).get("generation")
+    except (OSError, ValueError):
+        return
+
+def _write_pointer(generation: str | None):
+    tmp_path = _POINTER_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"generation": generation}, f)
+    os.replace(tmp_path, _POINTER_PATH)
+
+def _remove_old_generations(current: str | None):
+    for name in os.listdir(SNAPSHOT_DIR):
+        path = os.path.join(SNAPSHOT_DIR, name)
+        if name != current and os.path.isdir(path):
+            # 아직 memory-map 중인 파일은 Windows에서 지울 수 없으므로 다음 저장 때 다시 시도
+            shutil.rmtree(path, ignore_errors=True)
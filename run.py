@@ -1,21 +1,95 @@
+from util.startup import StartupProfile
+if __name__ == "__main__":
+    StartupProfile.start() # 이후 import와 시작 단계별 시간 측정 (정보 창에서 확인)
+
 import wx
 
+from multiprocessing import freeze_support
+from threading import Thread
 from traceback import format_exc
-from ui import FrameMain
-from db import initialize_db, LoadedData
-from util import initialize_matplotlib
+from ui import FrameSplash
+
+STARTUP_STEPS = 3
+
+def warm_up(splash: FrameSplash):
+    """워커 스레드에서 DB와 데이터 캐시를 준비하고 끝나면 UI 스레드에서 메인 창을 띄움
+    이전 Raw Data와 차트 글꼴은 메인 창이 뜬 뒤 warm_up_pages()에서 준비함
+    """
+    def progress(step: int, message: str):
+        wx.CallAfter(splash.set_progress, step, message)
 
-def main():
-    app = wx.App()
     try:
+        progress(0, "DB를 점검하는 중입니다.")
+        from db import initialize_db, LoadedData
         initialize_db()
-        initialize_matplotlib()
+        StartupProfile.mark("DB 초기화")
+
+        progress(1, "데이터를 불러오는 중입니다.")
         LoadedData.cache_all()
+        StartupProfile.mark("데이터 캐시")
     except:
-        wx.MessageBox(format_exc(), '오류')
+        wx.CallAfter(on_fail, splash, format_exc())
     else:
-        FrameMain().Show()
+        wx.CallAfter(on_ready, splash)
+
+def warm_up_pages(frame: wx.Frame):
+    """워커 스레드에서 이전 Raw Data와 차트 글꼴을 차례로 준비하고
+    단계가 끝날 때마다 UI 스레드에서 그 단계를 기다리던 페이지를 사용할 수 있게 함
+    실패해도 오류를 알리고 빈 데이터/기본 글꼴로 계속 사용할 수 있게 함
+    """
+    from db import LoadedData
+    from util import initialize_matplotlib
+    for name, stage, work in (
+            ("data", "스냅샷 복원", LoadedData.restore_snapshot),
+            ("charts", "matplotlib 초기화", initialize_matplotlib)
+        ):
+        try:
+            work()
+        except:
+            wx.CallAfter(on_page_fail, frame, format_exc())
+        StartupProfile.mark(stage)
+        wx.CallAfter(on_page_ready, frame, name)
+    wx.CallAfter(StartupProfile.finish)
+
+def on_ready(splash: FrameSplash):
+    splash.set_progress(2, "화면을 준비하는 중입니다.")
+    # wx 창을 만드는 모듈이므로 UI 스레드에서 import
+    from ui.frame_main import FrameMain
+    StartupProfile.mark("화면 모듈 import")
+    splash.set_progress(STARTUP_STEPS, "메인 창을 여는 중입니다.")
+    frame = FrameMain(pending=("data", "charts"))
+    frame.Show()
+    StartupProfile.mark("메인 창 생성")
+    splash.Destroy()
+    Thread(target=warm_up_pages, args=(frame,), daemon=True).start()
+
+def on_page_ready(frame: wx.Frame, name: str):
+    if frame:
+        frame.set_ready(name)
+
+def on_page_fail(frame: wx.Frame, msg: str):
+    if frame:
+        wx.MessageBox(msg, '오류', parent=frame)
+
+def on_fail(splash: FrameSplash, msg: str):
+    splash.Destroy()
+    wx.MessageBox(msg, '오류')
+    StartupProfile.finish("오류")
+
+def main():
+    StartupProfile.mark("모듈 import")
+    app = wx.App()
+    splash = FrameSplash(STARTUP_STEPS)
+    splash.Show()
+    StartupProfile.mark("wx.App 생성")
+    Thread(target=warm_up, args=(splash,), daemon=True).start()
     app.MainLoop()
 
+    from ui.component import ComputeExecutor
+    ComputeExecutor.shutdown()
+    from db import LoadedData
+    LoadedData.save_snapshot() # 저장이 예약되기 전에 종료된 경우 (진행 중인 저장이 있으면 끝난 뒤 확인)
+
 if __name__ == "__main__":
+    freeze_support() # PyInstaller 빌드에서 이미지 저장용 워커 프로세스 실행에 필요
     main()
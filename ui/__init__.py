@@ -1 +1,8 @@
-from .frame_main import FrameMain
\ No newline at end of file
+from .frame_splash import FrameSplash
+
+def __getattr__(name: str):
+    # FrameMain은 모든 화면 모듈(matplotlib, pandas 등)을 import하므로 처음 사용할 때 로드
+    if name == "FrameMain":
+        from .frame_main import FrameMain
+        return FrameMain
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,8 +1,13 @@
 from .tree_list_ctrl import TreeListCtrl, TreeListModelBase, TreeListNode
 from .event import EvtUpdate, EVT_UPDATE
 from .ar_panel import PanelAspectRatio
-from .canvas import PanelCanvas
+from .canvas import PanelCanvas, CachedFigureCanvas
 from .text_entry import TextEntryDialog
+from .executor import ComputeExecutor, CancelToken, JobCancelled
+from .redraw import RedrawScheduler
+from .lazy_page import PanelLazyPage
+from .pie_and_bar import PanelPieAndBar, PieAndBarPool
+from .image_export import save_all_images, ask_image_target, render_in_background
 
 FONT_COLOR_LOW_PORTION = (0, 0, 0) # 50% 미만의 비율 표현
 FONT_COLOR_MID_PORTION = (30, 144, 255) # 90% 미만의 비율 표현
@@ -4,65 +4,100 @@ import base64
 import wx
 import wx.html2 as webview
 
+from datetime import datetime
+from threading import Event
+
+from .redraw import RedrawScheduler
+
+_PAGE_TEMPLATE = """
+<html>
+<head>
+    <meta charset="utf-8">
+    <style>
+        body {{
+            font-family: 'Segoe UI', sans-serif;
+            margin: 20px;
+            line-height: 1.6;
+        }}
+        pre, code {{
+            background-color: #f5f5f5;
+            padding: 4px 8px;
+            border-radius: 4px;
+            font-family: Consolas, monospace;
+        }}
+        h1, h2, h3 {{
+            color: #333;
+            border-bottom: 1px solid #ddd;
+            padding-bottom: 4px;
+        }}
+        table {{
+            border-collapse: collapse;
+            width: 100%;
+        }}
+        th, td {{
+            border: 1px solid #ccc;
+            padding: 4px 8px;
+            text-align: left;
+        }}
+    </style>
+</head>
+<body>{html}</body></html>
+"""
+
+def _to_html(mark_down: str) -> str:
+    return markdown.markdown(mark_down, extensions=["fenced_code", "tables"])
+
 class DialogAIResult(wx.Dialog):
-    def __init__(self, parent: wx.Window, ai_type: str, model: str, json_data: str, mark_down_result: str):
+    """AI 분석 결과
+
+    결과를 받는 중(streaming)에는 append_result()로 들어온 조각을 모아 마크다운을 주기적으로 다시 그림
+    워커 스레드에서는 wx.CallAfter로 set_data(), append_result(), finish(), fail()을 호출하며,
+    창이 닫힌 뒤에 도착한 호출은 무시됨
+    '중지'를 누르거나 창을 닫으면 cancel_event가 설정되고, '새로 분석'을 누르면 ShowModal()이 wx.ID_REFRESH를 반환함
+    """
+    def __init__(
+            self,
+            parent: wx.Window,
+            ai_type: str,
+            model: str,
+            json_data: str = "",
+            mark_down_result: str | None = None,
+            cached_at: datetime | None = None
+        ):
+        """
+        Args:
+            mark_down_result
+                None이면 결과를 기다리는 상태로 시작
+            cached_at
+                캐시된 결과이면 저장 시각
+        """
         super().__init__(parent, title="AI 분석 결과", style=wx.DEFAULT_DIALOG_STYLE|wx.RESIZE_BORDER)
         st_ai_type = wx.StaticText(self, label="AI")
         st_model   = wx.StaticText(self, label="모델")
+        st_time    = wx.StaticText(self, label="분석 시각")
         tc_ai_type = wx.TextCtrl(self, size=(150, -1), style=wx.TE_READONLY|wx.TE_CENTER, value=ai_type)
         tc_model   = wx.TextCtrl(self, size=(150, -1), style=wx.TE_READONLY|wx.TE_CENTER, value=model)
-        sz_grid = wx.FlexGridSizer(2, 2, 5, 5)
+        tc_time    = wx.TextCtrl(self, size=(150, -1), style=wx.TE_READONLY|wx.TE_CENTER)
+        bt_stop    = wx.Button(self, label="중지")
+        bt_refresh = wx.Button(self, label="새로 분석")
+        bt_refresh.SetToolTip("저장된 결과를 쓰지 않고 AI에 다시 요청합니다.")
+        st_status  = wx.StaticText(self)
+        sz_grid = wx.FlexGridSizer(3, 3, 5, 5)
         sz_grid.AddGrowableCol(0)
         sz_grid.AddMany((
-            (st_ai_type, 0, wx.ALIGN_CENTER_VERTICAL), (tc_ai_type, 0, wx.ALIGN_CENTER_VERTICAL),
-            (st_model  , 0, wx.ALIGN_CENTER_VERTICAL), (tc_model  , 0, wx.ALIGN_CENTER_VERTICAL)
+            (st_ai_type, 0, wx.ALIGN_CENTER_VERTICAL), (tc_ai_type, 0, wx.ALIGN_CENTER_VERTICAL), ((-1, -1), 0),
+            (st_model  , 0, wx.ALIGN_CENTER_VERTICAL), (tc_model  , 0, wx.ALIGN_CENTER_VERTICAL),
+            (bt_stop   , 0, wx.ALIGN_CENTER_VERTICAL),
+            (st_time   , 0, wx.ALIGN_CENTER_VERTICAL), (tc_time   , 0, wx.ALIGN_CENTER_VERTICAL),
+            (bt_refresh, 0, wx.ALIGN_CENTER_VERTICAL)
         ))
 
         notebook = wx.Notebook(self)
         view = webview.WebView.New(notebook)
-        html = markdown.markdown(mark_down_result, extensions=["fenced_code", "tables"])
-        styled_html = f"""
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <style>
-                body {{
-                    font-family: 'Segoe UI', sans-serif;
-                    margin: 20px;
-                    line-height: 1.6;
-                }}
-                pre, code {{
-                    background-color: #f5f5f5;
-                    padding: 4px 8px;
-                    border-radius: 4px;
-                    font-family: Consolas, monospace;
-                }}
-                h1, h2, h3 {{
-                    color: #333;
-                    border-bottom: 1px solid #ddd;
-                    padding-bottom: 4px;
-                }}
-                table {{
-                    border-collapse: collapse;
-                    width: 100%;
-                }}
-                th, td {{
-                    border: 1px solid #ccc;
-                    padding: 4px 8px;
-                    text-align: left;
-                }}
-            </style>
-        </head>
-        <body>{html}</body></html>
-        """
-        view.SetPage(styled_html, "")
+        view.SetPage(_PAGE_TEMPLATE.format(html=""), "")
 
         pn_data = wx.Panel(notebook)
-        tc_data = wx.TextCtrl(
-            pn_data,
-            value=json.dumps(json.loads(json_data), ensure_ascii=False, indent=2),
-            style=wx.TE_MULTILINE
-        )
+        tc_data = wx.TextCtrl(pn_data, style=wx.TE_MULTILINE)
         sz_data = wx.BoxSizer(wx.HORIZONTAL)
         sz_data.Add(tc_data, 1, wx.EXPAND|wx.ALL, 20)
         pn_data.SetSizer(sz_data)
@@ -72,7 +107,8 @@ class DialogAIResult(wx.Dialog):
 
         sz_vert = wx.BoxSizer(wx.VERTICAL)
         sz_vert.AddMany((
-            (sz_grid, 0), ((-1, 10), 0),
+            (sz_grid, 0), ((-1, 5), 0),
+            (st_status, 0, wx.EXPAND), ((-1, 5), 0),
             (notebook, 1, wx.EXPAND)
         ))
         sz = wx.BoxSizer(wx.HORIZONTAL)
@@ -83,10 +119,134 @@ class DialogAIResult(wx.Dialog):
         self.SetMinSize(self.GetSize())
         self.CenterOnScreen()
 
+        self.__view = view
+        self.__tc_data = tc_data
+        self.__tc_time = tc_time
+        self.__st_status = st_status
+        self.__bt_stop = bt_stop
+        self.__bt_refresh = bt_refresh
+        self.__chunks: list[str] = []
+        self.__page_loaded = False
+        self.__streaming = mark_down_result is None
+        self.__cancel_event = Event()
+
+        RedrawScheduler.register((id(self), "result"), self, self.__render)
+        view.Bind(webview.EVT_WEBVIEW_LOADED, self.__on_loaded)
+        bt_stop.Bind(wx.EVT_BUTTON, self.__on_stop)
+        bt_refresh.Bind(wx.EVT_BUTTON, self.__on_refresh)
+        self.Bind(wx.EVT_CLOSE, self.__on_close)
+
+        if json_data:
+            self.set_data(json_data)
+        if mark_down_result is None:
+            bt_refresh.Disable()
+            tc_time.SetValue("분석 중")
+            st_status.SetLabel("분석 데이터를 준비하는 중입니다.")
+        else:
+            self.finish(mark_down_result, cached_at)
+
+    @property
+    def cancel_event(self) -> Event:
+        """워커 스레드가 결과 받기를 멈춰야 하면 설정됨"""
+        return self.__cancel_event
+
+    def set_data(self, json_data: str, estimated_tokens: int | None = None):
+        """AI에 보낸 데이터 표시"""
+        if not self:
+            return
+        self.__tc_data.SetValue(json.dumps(json.loads(json_data), ensure_ascii=False, indent=2))
+        if self.__streaming:
+            msg = "AI의 응답을 기다리는 중입니다."
+            if estimated_tokens is not None:
+                msg += f" (예상 입력 토큰: 약 {estimated_tokens:,}개)"
+            self.__st_status.SetLabel(msg)
+
+    def set_status(self, msg: str):
+        """받기 전 진행 상황 표시 (예: 나눠서 분석하는 중 부분 분석 진행률)"""
+        if not self or not self.__streaming or self.__chunks:
+            return
+        self.__st_status.SetLabel(msg)
+
+    def append_result(self, text: str):
+        """받은 결과 조각 추가. 화면은 모아서 주기적으로 갱신됨"""
+        if not self or not self.__streaming:
+            return
+        self.__chunks.append(text)
+        self.__st_status.SetLabel(f"결과를 받는 중입니다... ({sum(len(c) for c in self.__chunks):,}자)")
+        RedrawScheduler.request((id(self), "result"))
+
+    def finish(self, mark_down_result: str, cached_at: datetime | None = None):
+        """전체 결과로 화면을 갱신하고 받기를 끝냄"""
+        if not self:
+            return
+        self.__streaming = False
+        self.__chunks = [mark_down_result]
+        self.__tc_time.SetValue(f"{cached_at:%Y-%m-%d %H:%M} (저장됨)" if cached_at else "방금")
+        self.__st_status.SetLabel(
+            "같은 조건으로 분석한 결과를 불러왔습니다." if cached_at else "분석을 완료했습니다."
+        )
+        self.__bt_stop.Disable()
+        self.__bt_refresh.Enable()
+        self.__render()
+
+    def fail(self, msg: str):
+        """오류 또는 중지. 받은 결과가 없으면 안내 후 창을 닫음"""
+        if not self:
+            return
+        self.__streaming = False
+        self.__bt_stop.Disable()
+        self.__bt_refresh.Enable()
+        self.__tc_time.SetValue("")
+        if not self.__chunks:
+            wx.MessageBox(msg, "안내", parent=self)
+            if self.IsModal():
+                self.EndModal(wx.ID_CANCEL)
+            return
+        self.__st_status.SetLabel(msg.splitlines()[0] + " (받은 부분까지 표시)")
+        self.__render()
+
+    def __render(self):
+        if not self.__page_loaded:
+            return
+        html = _to_html("".join(self.__chunks))
+        script = f"document.body.innerHTML = {json.dumps(html)};"
+        if self.__streaming:
+            script += "window.scrollTo(0, document.body.scrollHeight);"
+        self.__view.RunScript(script)
+
+    def __on_loaded(self, event):
+        event.Skip()
+        self.__page_loaded = True
+        self.__render()
+
+    def __on_stop(self, event):
+        self.__cancel_event.set()
+        self.__bt_stop.Disable()
+        self.__st_status.SetLabel("중지하는 중입니다.")
+
+    def __on_refresh(self, event):
+        self.__cancel_event.set()
+        self.EndModal(wx.ID_REFRESH)
+
+    def __on_close(self, event):
+        self.__cancel_event.set()
+        event.Skip()
+
 class DialogModels(wx.Dialog):
-    def __init__(self, parent: wx.Window, models: list[str], initial_model: str):
+    def __init__(self, parent: wx.Window, models: list[str], initial_model: str, delta: bool | None = None):
+        """
+        Args:
+            delta
+                None이 아니면 '바뀐 항목만 분석' 체크 박스를 초기값으로 표시
+        """
         super().__init__(parent, title="모델 선택")
         self.__cb = wx.ComboBox(self, value=initial_model, choices=models, style=wx.CB_READONLY)
+        self.__chk_delta = wx.CheckBox(self, label="바뀐 항목만 분석")
+        self.__chk_delta.SetToolTip(
+            "같은 범위를 분석한 적이 있으면 그 이후 바뀐 항목과 이전 결과만 보내 보고서를 갱신합니다."
+        )
+        self.__chk_delta.SetValue(bool(delta))
+        self.__chk_delta.Show(delta is not None)
         bt_confirm = wx.Button(self, label="확인")
         bt_cancel = wx.Button(self, label="취소")
         sz_bt = wx.BoxSizer(wx.HORIZONTAL)
@@ -97,6 +257,7 @@ class DialogModels(wx.Dialog):
         sz_vert = wx.BoxSizer(wx.VERTICAL)
         sz_vert.AddMany((
             (self.__cb, 0, wx.EXPAND), ((-1, 5), 0),
+            (self.__chk_delta, 0), ((-1, 5), 0),
             (sz_bt, 0, wx.EXPAND)
         ))
         sz = wx.BoxSizer(wx.HORIZONTAL)
@@ -116,6 +277,108 @@ class DialogModels(wx.Dialog):
     def get_model(self) -> str:
         return self.__cb.GetValue()
 
+    def get_delta(self) -> bool:
+        return self.__chk_delta.GetValue()
+
+class DialogAIBatch(wx.Dialog):
+    """일괄 분석할 BS와 AI 모델 선택. API 키가 설정되지 않은 AI는 선택할 수 없음"""
+    def __init__(
+            self,
+            parent: wx.Window,
+            bs_names: list[str],
+            selected: int,
+            models: dict[str, tuple[list[str], str, bool]]
+        ):
+        """
+        Args:
+            selected
+                처음에 선택할 BS 순번. wx.NOT_FOUND면 전체 선택
+            models
+                { AI 이름: (모델 목록, 처음 선택할 모델, 사용 가능 여부) }
+        """
+        super().__init__(parent, title="AI 일괄 분석")
+        cb_all = wx.CheckBox(self, label="모든 BS")
+        clb_bs = wx.CheckListBox(self, size=(300, 250), choices=bs_names)
+        if selected == wx.NOT_FOUND:
+            clb_bs.SetCheckedItems(range(len(bs_names)))
+            cb_all.SetValue(True)
+        else:
+            clb_bs.Check(selected)
+
+        sz_models = wx.FlexGridSizer(len(models), 2, 5, 5)
+        sz_models.AddGrowableCol(1)
+        self.__models: dict[str, tuple[wx.CheckBox, wx.ComboBox]] = {}
+        for ai_type, (choices, initial_model, enabled) in models.items():
+            cb_use = wx.CheckBox(self, label=ai_type)
+            cb_model = wx.ComboBox(self, value=initial_model, choices=choices, style=wx.CB_READONLY)
+            # 사용 가능한 첫 번째 AI만 선택해 둠
+            cb_use.SetValue(enabled and not any(cb.GetValue() for cb, _ in self.__models.values()))
+            cb_use.Enable(enabled)
+            cb_model.Enable(enabled)
+            if not enabled:
+                cb_use.SetToolTip("API 키를 설정하세요.")
+            sz_models.AddMany((
+                (cb_use, 0, wx.ALIGN_CENTER_VERTICAL), (cb_model, 0, wx.EXPAND)
+            ))
+            self.__models[ai_type] = (cb_use, cb_model)
+
+        bt_confirm = wx.Button(self, label="확인")
+        bt_cancel = wx.Button(self, label="취소")
+        sz_bt = wx.BoxSizer(wx.HORIZONTAL)
+        sz_bt.AddMany((
+            (bt_confirm, 1, wx.ALIGN_CENTER_VERTICAL), ((3, -1), 0),
+            (bt_cancel, 1, wx.ALIGN_CENTER_VERTICAL)
+        ))
+        sz_vert = wx.BoxSizer(wx.VERTICAL)
+        sz_vert.AddMany((
+            (cb_all, 0), ((-1, 5), 0),
+            (clb_bs, 1, wx.EXPAND), ((-1, 10), 0),
+            (sz_models, 0, wx.EXPAND), ((-1, 10), 0),
+            (sz_bt, 0, wx.EXPAND)
+        ))
+        sz = wx.BoxSizer(wx.HORIZONTAL)
+        sz.Add(sz_vert, 1, wx.EXPAND|wx.ALL, 30)
+        self.SetSizerAndFit(sz)
+        self.CenterOnParent()
+
+        self.__cb_all = cb_all
+        self.__clb_bs = clb_bs
+
+        cb_all.Bind(wx.EVT_CHECKBOX, self.__on_check_all)
+        clb_bs.Bind(wx.EVT_CHECKLISTBOX, self.__on_check_bs)
+        bt_confirm.Bind(wx.EVT_BUTTON, self.__on_confirm)
+        bt_cancel.Bind(wx.EVT_BUTTON, self.__on_cancel)
+
+    def __on_check_all(self, event):
+        count = self.__clb_bs.GetCount()
+        self.__clb_bs.SetCheckedItems(range(count) if self.__cb_all.GetValue() else [])
+
+    def __on_check_bs(self, event):
+        self.__cb_all.SetValue(len(self.__clb_bs.GetCheckedItems()) == self.__clb_bs.GetCount())
+
+    def __on_confirm(self, event):
+        if not self.__clb_bs.GetCheckedItems():
+            wx.MessageBox("분석할 BS를 선택하세요.", "안내", parent=self)
+            return
+        if not self.get_models():
+            wx.MessageBox("분석할 AI 모델을 선택하세요.", "안내", parent=self)
+            return
+        self.EndModal(wx.ID_OK)
+
+    def __on_cancel(self, event):
+        self.EndModal(wx.ID_CANCEL)
+
+    def get_bs_indices(self) -> list[int]:
+        return list(self.__clb_bs.GetCheckedItems())
+
+    def get_models(self) -> list[tuple[str, str]]:
+        """[(AI 이름, 모델)]"""
+        return [
+            (ai_type, cb_model.GetValue())
+            for ai_type, (cb_use, cb_model) in self.__models.items()
+            if cb_use.GetValue() and cb_model.GetValue()
+        ]
+
 class DialogPDF(wx.Dialog):
     def __init__(self, parent: wx.Window, pdf_bytes: bytes):
         wx.Dialog.__init__(self, parent, title="AI 분석 결과", size=(900, 800), style=wx.DEFAULT_DIALOG_STYLE|wx.RESIZE_BORDER)
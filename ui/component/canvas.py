@@ -1,11 +1,56 @@
 import wx
 import numpy as np
 import matplotlib.pyplot as plt
-from typing import Callable
+from io import BytesIO
+from typing import Callable, Hashable
 from matplotlib.figure import Figure
 from matplotlib.axes import Axes
 from matplotlib.backends.backend_wxagg import FigureCanvasWxAgg as FigureCanvas
 
+from util.image_cache import ImageCache
+
+class CachedFigureCanvas(FigureCanvas):
+    """cache_key가 지정되어 있으면 (cache_key, 크기, dpi)가 같은 렌더링 결과를 ImageCache에서 재사용
+
+    cache_key는 figure에 그려진 내용을 결정하는 값(차트 종류, 데이터 fingerprint)이어야 하며
+    내용을 바꿀 때 함께 바꾸거나 None으로 지정해야 함
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_key: Hashable | None = None
+
+    def draw(self, drawDC=None):
+        if self.cache_key is None:
+            super().draw(drawDC)
+            return
+        # FigureCanvasAgg.get_renderer()와 같은 방식으로 버퍼 크기 결정
+        w, h = self.figure.bbox.size
+        w, h = int(w), int(h)
+        key = ("rgba", self.cache_key, w, h, self.figure.dpi)
+        data = ImageCache.get(key)
+        if data is None:
+            super().draw(drawDC)
+            ImageCache.put(key, bytes(self.get_renderer().buffer_rgba()))
+            return
+        self.bitmap = wx.Bitmap.FromBufferRGBA(w, h, data)
+        self._isDrawn = True
+        self.gui_repaint(drawDC=drawDC)
+
+    def get_png(self, **savefig_kwargs) -> bytes:
+        """figure를 PNG로 저장한 바이트. cache_key가 지정되어 있으면 캐시를 사용함"""
+        key = None
+        if self.cache_key is not None:
+            key = ("png", self.cache_key, tuple(self.figure.get_size_inches()), tuple(sorted(savefig_kwargs.items())))
+            data = ImageCache.get(key)
+            if data is not None:
+                return data
+        buf = BytesIO()
+        self.figure.savefig(buf, format="png", **savefig_kwargs)
+        data = buf.getvalue()
+        if key is not None:
+            ImageCache.put(key, data)
+        return data
+
 class PanelCanvas(wx.Panel):
     def __init__(
             self,
@@ -19,7 +64,7 @@ class PanelCanvas(wx.Panel):
         wx.Panel.__init__(self, parent, **kwargs)
         self._save_fig_callback = save_fig_callback
         self._fig, self._ax = plt.subplots(nrows, ncols, constrained_layout=constrained_layout)
-        self._cv = FigureCanvas(self, -1, self._fig)
+        self._cv = CachedFigureCanvas(self, -1, self._fig)
         self._cv.SetMinSize((10, 10))
         self._cv.Bind(wx.EVT_RIGHT_DOWN, self._on_right_click)
         sz = wx.BoxSizer(wx.HORIZONTAL)
@@ -48,20 +93,32 @@ class PanelCanvas(wx.Panel):
         if self._save_fig_callback:
             self._save_fig_callback(filepath)
         else:
-            self._fig.savefig(filepath, dpi=300)
+            with open(filepath, "wb") as f:
+                f.write(self._cv.get_png(dpi=300))
         wx.MessageBox("이미지를 저장하였습니다.", "안내", wx.OK|wx.ICON_INFORMATION)
 
     @property
     def fig(self) -> Figure:
         return self._fig
-    
+
     @property
     def ax(self) -> Axes|np.ndarray[Axes,]:
         return self._ax
 
     @property
-    def canvas(self):
+    def canvas(self) -> CachedFigureCanvas:
         return self._cv
 
+    @property
+    def cache_key(self) -> Hashable | None:
+        return self._cv.cache_key
+
+    def set_cache_key(self, key: Hashable | None):
+        """그려진 내용을 나타내는 key 지정. None이면 캐시를 사용하지 않음"""
+        self._cv.cache_key = key
+
+    def get_png(self, **savefig_kwargs) -> bytes:
+        return self._cv.get_png(**savefig_kwargs)
+
     def draw(self):
         self._cv.draw()
@@ -0,0 +1,135 @@
+import wx
+
+from concurrent.futures import ThreadPoolExecutor, Future
+from threading import Event, Lock
+from typing import Any, Callable, Hashable
+
+from util import get_error_message
+
+class JobCancelled(Exception):
+    """더 새로운 요청에 의해 작업이 취소됨"""
+
+class CancelToken:
+    def __init__(self):
+        self.__event = Event()
+
+    def cancel(self):
+        self.__event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.__event.is_set()
+
+    def raise_if_cancelled(self):
+        """작업 함수 내에서 단계 사이마다 호출하여 취소된 작업을 조기 종료"""
+        if self.__event.is_set():
+            raise JobCancelled
+
+class ComputeExecutor:
+    """무거운 집계 작업을 UI 스레드 밖에서 실행하는 공용 실행기
+
+    같은 key로 새 작업이 들어오면 이전 작업은 취소되고(대기 중이면 실행되지 않음)
+    가장 마지막 작업의 결과만 wx.CallAfter를 통해 UI 스레드로 전달됨
+    """
+    MAX_WORKERS = 2
+
+    _pool: ThreadPoolExecutor | None = None
+    _lock = Lock()
+    _jobs: dict[Hashable, tuple[CancelToken, Future]] = {} # { key: (token, future) }
+
+    @classmethod
+    def _get_pool(cls) -> ThreadPoolExecutor:
+        if cls._pool is None:
+            cls._pool = ThreadPoolExecutor(max_workers=cls.MAX_WORKERS, thread_name_prefix="compute")
+        return cls._pool
+
+    @classmethod
+    def submit(
+            cls,
+            key: Hashable,
+            work: Callable[[CancelToken], Any],
+            on_done: Callable[[Any], None],
+            on_fail: Callable[[str], None] | None = None,
+            owner: wx.Window | None = None
+        ) -> CancelToken:
+        """작업 예약
+
+        Args:
+            key
+                작업 식별자. 같은 key의 이전 작업은 취소됨
+            work
+                워커 스레드에서 실행될 함수. wx 객체에 접근하지 않아야 함
+            on_done
+                UI 스레드에서 결과를 받아 반영할 함수
+            on_fail
+                UI 스레드에서 오류 메시지를 받을 함수. None이면 MessageBox 표시
+            owner
+                결과를 반영할 창. 결과 도착 전에 파괴되면 결과를 버림
+        """
+        token = CancelToken()
+        with cls._lock:
+            prev = cls._jobs.get(key)
+            if prev is not None:
+                prev_token, prev_future = prev
+                prev_token.cancel()
+                prev_future.cancel()
+            future = cls._get_pool().submit(cls._run, key, token, work, on_done, on_fail, owner)
+            cls._jobs[key] = (token, future)
+        return token
+
+    @classmethod
+    def cancel(cls, key: Hashable):
+        with cls._lock:
+            job = cls._jobs.pop(key, None)
+        if job is not None:
+            token, future = job
+            token.cancel()
+            future.cancel()
+
+    @classmethod
+    def is_busy(cls, key: Hashable) -> bool:
+        with cls._lock:
+            return key in cls._jobs
+
+    @classmethod
+    def shutdown(cls):
+        """프로그램 종료 시 대기 중인 작업을 모두 취소"""
+        with cls._lock:
+            for token, _ in cls._jobs.values():
+                token.cancel()
+            cls._jobs.clear()
+            pool, cls._pool = cls._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def _run(cls, key, token: CancelToken, work, on_done, on_fail, owner):
+        if token.cancelled:
+            return
+        try:
+            result = work(token)
+        except JobCancelled:
+            return
+        except Exception as err:
+            msg = get_error_message(err)
+            wx.CallAfter(cls._deliver, key, token, owner, on_fail or cls._show_error, msg)
+        else:
+            wx.CallAfter(cls._deliver, key, token, owner, on_done, result)
+
+    @classmethod
+    def _deliver(cls, key, token: CancelToken, owner, callback, value):
+        """UI 스레드에서 호출됨. 취소되었거나 창이 파괴된 경우 결과를 버림"""
+        with cls._lock:
+            job = cls._jobs.get(key)
+            if job is None or job[0] is not token:
+                return
+            del cls._jobs[key]
+        if token.cancelled:
+            return
+        if owner is not None and not owner:
+            return
+        callback(value)
+
+    @staticmethod
+    def _show_error(msg: str):
+        wx.MessageBox(msg, "안내")
@@ -0,0 +1,86 @@
+import wx
+
+from datetime import datetime
+from threading import Thread
+from typing import Callable
+
+from util import get_error_message
+from util.chart_render import FORMATS, RenderJob, render_all
+
+def ask_image_target(parent: wx.Window, title: str) -> tuple[str, str] | None:
+    """저장할 폴더와 형식을 물어서 (폴더 경로, 확장자) 반환. 취소하면 None"""
+    dlg = wx.DirDialog(parent, title, style=wx.DD_DEFAULT_STYLE)
+    ret = dlg.ShowModal()
+    dir_path = dlg.GetPath()
+    dlg.Destroy()
+    if ret != wx.ID_OK:
+        return
+    dlg = wx.SingleChoiceDialog(parent, "저장할 형식을 선택하세요.", title, [fmt.upper() for fmt in FORMATS])
+    ret = dlg.ShowModal()
+    fmt = FORMATS[dlg.GetSelection()]
+    dlg.Destroy()
+    if ret != wx.ID_OK:
+        return
+    return dir_path, fmt
+
+def save_all_images(
+        parent: wx.Window,
+        get_jobs: Callable[[str, str, str], list[RenderJob]],
+        title: str = "이미지 일괄 저장"
+    ):
+    """폴더와 형식을 묻고 job들을 워커 프로세스에서 병렬로 저장
+
+    Args:
+        get_jobs
+            (폴더 경로, 파일명 머리, 확장자)를 받아 저장할 job 목록 반환. UI 스레드에서 호출됨
+    """
+    target = ask_image_target(parent, title)
+    if target is None:
+        return
+    dir_path, fmt = target
+    jobs = get_jobs(dir_path, datetime.now().strftime("%y%m%d_%H%M%S"), fmt)
+    if not jobs:
+        wx.MessageBox("저장할 차트가 없습니다.", "안내", parent=parent)
+        return
+    render_in_background(parent, dir_path, lambda on_message: jobs)
+
+def render_in_background(
+        parent: wx.Window,
+        dir_path: str,
+        make_jobs: Callable[[Callable[[str], None]], list[RenderJob]]
+    ):
+    """워커 스레드에서 job을 만들고 병렬로 저장하며 진행 상황을 표시
+
+    Args:
+        make_jobs
+            진행 메시지를 받을 함수를 인자로 받아 job 목록 반환. 워커 스레드에서 호출됨
+    """
+    dlgp = wx.ProgressDialog("안내", "이미지 파일을 생성 중입니다.", maximum=100, parent=parent)
+    dlgp.Pulse()
+
+    def on_message(msg: str):
+        if dlgp:
+            dlgp.Pulse(msg)
+
+    def on_progress(done: int, total: int, filepath: str):
+        if dlgp:
+            dlgp.Update(int(done/total*100), f"이미지 파일을 생성 중입니다. ({done}/{total})")
+
+    def on_done(msg: str):
+        dlgp.Destroy()
+        wx.Yield()
+        wx.MessageBox(msg, "안내", parent=parent)
+
+    def work():
+        try:
+            jobs = make_jobs(lambda msg: wx.CallAfter(on_message, msg))
+            if not jobs:
+                msg = "저장할 차트가 없습니다."
+            else:
+                render_all(jobs, lambda *args: wx.CallAfter(on_progress, *args))
+                msg = f"이미지 {len(jobs)}개를 저장하였습니다.\n\n{dir_path}"
+        except Exception as err:
+            msg = get_error_message(err)
+        wx.CallAfter(on_done, msg)
+
+    Thread(target=work, daemon=True).start()
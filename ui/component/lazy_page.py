@@ -0,0 +1,80 @@
+import wx
+
+from typing import Callable
+
+class PanelLazyPage(wx.Panel):
+    """노트북 페이지 자리 표시 패널
+
+    실제 패널은 페이지가 처음 보일 때 생성되며,
+    데이터 변경 시 mark_stale()로 표시해두면 다음에 페이지가 보일 때 한 번만 다시 계산함
+    필요한 데이터가 준비되기 전에는 set_waiting()으로 안내 문구를 표시하고 패널을 생성하지 않음
+    """
+    def __init__(
+            self,
+            parent: wx.Window,
+            factory: Callable[[wx.Window], wx.Window],
+            refresh: Callable[[wx.Window], None] | None = None
+        ):
+        """
+        Args:
+            factory
+                이 패널을 부모로 실제 패널을 생성하는 함수
+            refresh
+                stale 상태에서 페이지가 보일 때 호출될 함수. None이면 stale 표시를 무시함
+        """
+        super().__init__(parent)
+        self.__factory = factory
+        self.__refresh = refresh
+        self.__panel: wx.Window | None = None
+        self.__stale = False
+        self.__waiting: wx.StaticText | None = None
+        self.SetSizer(wx.BoxSizer(wx.HORIZONTAL))
+
+    @property
+    def panel(self) -> wx.Window | None:
+        """생성되지 않았으면 None"""
+        return self.__panel
+
+    @property
+    def stale(self) -> bool:
+        return self.__stale
+
+    def mark_stale(self):
+        # 아직 생성되지 않은 패널은 생성 시점의 데이터로 그려지므로 표시할 필요 없음
+        if self.__panel is not None and self.__refresh is not None:
+            self.__stale = True
+
+    def set_waiting(self, message: str | None):
+        """
+        Args:
+            message
+                준비를 기다리는 동안 표시할 안내 문구. None이면 안내 문구를 지우며,
+                페이지가 보이는 중이면 activate()를 다시 호출해야 패널이 생성됨
+        """
+        if message is None:
+            if self.__waiting is not None:
+                self.__waiting.Destroy()
+                self.__waiting = None
+                self.Layout()
+            return
+        if self.__waiting is None:
+            self.__waiting = wx.StaticText(self, style=wx.ALIGN_CENTRE_HORIZONTAL)
+            self.__waiting.SetForegroundColour(wx.Colour(100, 100, 100))
+            self.GetSizer().Add(self.__waiting, 1, wx.ALIGN_CENTER_VERTICAL)
+        self.__waiting.SetLabel(message)
+        self.Layout()
+
+    def activate(self):
+        """페이지가 보이게 될 때 호출. 생성되지 않았으면 생성하고, stale이면 다시 계산"""
+        if self.__waiting is not None:
+            return
+        if self.__panel is None:
+            self.Freeze()
+            self.__panel = self.__factory(self)
+            self.GetSizer().Add(self.__panel, 1, wx.EXPAND)
+            self.Layout()
+            self.Thaw()
+            return
+        if self.__stale:
+            self.__stale = False
+            self.__refresh(self.__panel) # type: ignore
@@ -0,0 +1,141 @@
+import wx
+
+from io import BytesIO
+from typing import Iterable
+
+from PIL import Image
+from matplotlib.axes import Axes
+
+from util import pastel_gradient
+from util.image_cache import ImageCache, fingerprint
+from util.chart import draw_pie, draw_horizontal_bar
+from .ar_panel import PanelAspectRatio
+from .canvas import PanelCanvas
+
+class PanelPieAndBar(PanelAspectRatio):
+    """대계정 하나에 대한 파이(하위 카테고리 비율)와 가로 막대(항목별 금액)"""
+    def __init__(
+            self,
+            parent: wx.Window,
+            pie_values: dict[str, float] | None = None,
+            bar_values: dict[str, float] | None = None,
+            color: str | None = None
+        ):
+        super().__init__(parent, 4, True)
+        pn_pie = PanelCanvas(self, save_fig_callback=self.save_image)
+        pn_bar = PanelCanvas(self, save_fig_callback=self.save_image)
+
+        sz_horz = wx.BoxSizer(wx.HORIZONTAL)
+        sz_horz.AddMany((
+            (pn_pie, 2, wx.EXPAND), ((40, -1), 0),
+            (pn_bar, 3, wx.EXPAND)
+        ))
+        self.SetSizer(sz_horz)
+
+        self.pn_pie = pn_pie
+        self.pn_bar = pn_bar
+        if pie_values is not None and bar_values is not None and color is not None:
+            self.update(pie_values, bar_values, color)
+
+    def update(self, pie_values: dict[str, float], bar_values: dict[str, float], color: str):
+        """값만 바뀐 경우 기존 figure의 artist를 갱신하여 다시 그림"""
+        # 파이
+        ax: Axes = self.pn_pie.ax # type: ignore
+        colors = pastel_gradient(color, max(1, len(pie_values)))
+        draw_pie(ax, pie_values, colors=colors, start_angle=90.0, sort_by="value", desc=True)
+
+        # 바
+        ax: Axes = self.pn_bar.ax # type: ignore
+        draw_horizontal_bar(ax, bar_values, pastel_gradient(color, len(bar_values)) if bar_values else None)
+
+        self.pn_pie.set_cache_key(("pie", fingerprint(pie_values, color)))
+        self.pn_bar.set_cache_key(("bar", fingerprint(bar_values, color)))
+        self.pn_pie.draw()
+        self.pn_bar.draw()
+
+    def save_image(self, filepath: str):
+        # 두 차트가 그대로면 이전에 합친 이미지를 그대로 씀
+        key = None
+        if self.pn_pie.cache_key is not None and self.pn_bar.cache_key is not None:
+            key = (
+                "pie_and_bar_merged", self.pn_pie.cache_key, self.pn_bar.cache_key,
+                tuple(self.pn_pie.fig.get_size_inches()), tuple(self.pn_bar.fig.get_size_inches())
+            )
+        data = ImageCache.get(key) if key is not None else None
+        if data is None:
+            pil_pie = Image.open(BytesIO(self.pn_pie.get_png(bbox_inches="tight")))
+            pil_bar = Image.open(BytesIO(self.pn_bar.get_png(bbox_inches="tight")))
+
+            merged = Image.new(
+                "RGB",
+                (pil_pie.width + pil_bar.width, pil_pie.height)
+            )
+            merged.paste(pil_pie, (0, 0))
+            merged.paste(pil_bar, (pil_pie.width, 0))
+            buf = BytesIO()
+            merged.save(buf, format="png")
+            data = buf.getvalue()
+            if key is not None:
+                ImageCache.put(key, data)
+        with open(filepath, "wb") as f:
+            f.write(data)
+
+class PieAndBarPool:
+    """카테고리 이름별로 PanelPieAndBar를 재사용하여 sizer에 배치
+
+    새로고침마다 figure/canvas를 새로 만드는 대신 같은 이름의 패널을 갱신하고,
+    이번에 없는 카테고리의 패널은 숨겨두었다가 다시 나타나면 재사용함
+    """
+    def __init__(self, parent: wx.Window, sizer: wx.Sizer, gap: int):
+        """
+        Args:
+            parent
+                패널들의 부모 창
+            sizer
+                패널을 배치할 sizer. 이 pool의 패널만 들어있어야 함
+            gap
+                패널 위쪽 간격
+        """
+        self.__parent = parent
+        self.__sizer = sizer
+        self.__gap = gap
+        self.__pool: dict[str, PanelPieAndBar] = {}
+        self.__shown: list[PanelPieAndBar] = []
+
+    @property
+    def panels(self) -> list[PanelPieAndBar]:
+        """보이는 패널 (배치 순서)"""
+        return self.__shown.copy()
+
+    def update(self, items: Iterable[tuple[str, dict[str, float], dict[str, float], str]]):
+        """
+        Args:
+            items
+                배치 순서대로 (카테고리 이름, 파이 값, 막대 값, 색상)
+        """
+        shown: list[PanelPieAndBar] = []
+        for name, pie_values, bar_values, color in items:
+            pn = self.__pool.get(name)
+            if pn is None:
+                pn = PanelPieAndBar(self.__parent)
+                self.__pool[name] = pn
+            pn.update(pie_values, bar_values, color)
+            shown.append(pn)
+        self.__arrange(shown)
+
+    def hide_all(self):
+        self.__arrange([])
+
+    def __arrange(self, shown: list[PanelPieAndBar]):
+        # 구성과 순서가 같으면 sizer를 건드리지 않음
+        if shown == self.__shown:
+            return
+        for pn in self.__shown:
+            self.__sizer.Detach(pn)
+        for pn in shown:
+            self.__sizer.Add(pn, 0, wx.EXPAND|wx.TOP, self.__gap)
+            pn.Show()
+        for pn in self.__pool.values():
+            if pn not in shown:
+                pn.Hide()
+        self.__shown = shown
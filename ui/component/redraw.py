@@ -0,0 +1,125 @@
+import wx
+
+from time import monotonic
+from typing import Callable, Hashable
+
+class RedrawScheduler:
+    """콤보, 필터, 크기 변경 등으로 발생하는 다시 그리기 요청을 모아서 처리하는 공용 스케줄러
+
+    request()로 들어온 요청은 DEBOUNCE_MS 동안 추가 요청이 없을 때(최대 MAX_DELAY_MS) 한 번에 처리됨
+    같은 key의 요청이 여러 번 들어와도 한 번만 다시 그리며,
+    화면에 보이지 않는 창(선택되지 않은 노트북 페이지 등)은 dirty 상태로 남겨두었다가
+    보이게 된 뒤 flush() 시점에 다시 그림
+    """
+    DEBOUNCE_MS = 50
+    MAX_DELAY_MS = 200
+
+    _targets: dict[Hashable, tuple[wx.Window, Callable[[], None]]] = {}
+    _dirty: dict[Hashable, None] = {} # 요청 순서 유지를 위해 dict 사용
+    _timer: wx.CallLater | None = None
+    _first_request_at = 0.0
+    _requested = 0
+    _performed = 0
+    _skipped = 0
+
+    @classmethod
+    def register(cls, key: Hashable, window: wx.Window, callback: Callable[[], None]):
+        """key에 대한 다시 그리기 함수 등록
+
+        Args:
+            key
+                요청 식별자
+            window
+                보이는지 여부를 확인할 창. 파괴되면 등록이 자동으로 해제됨
+            callback
+                UI 스레드에서 호출될 다시 그리기 함수
+        """
+        cls._targets[key] = (window, callback)
+
+        def on_destroy(event: wx.WindowDestroyEvent):
+            event.Skip()
+            # 자식 창의 파괴 이벤트나 같은 key로 다시 등록된 다른 창은 무시
+            if event.GetEventObject() is window and cls._targets.get(key, (None,))[0] is window:
+                cls.unregister(key)
+
+        window.Bind(wx.EVT_WINDOW_DESTROY, on_destroy)
+
+    @classmethod
+    def unregister(cls, key: Hashable):
+        """등록 해제. 닫힌 창의 다시 그리기 함수(와 그 창이 가진 데이터)를 붙잡고 있지 않도록 함"""
+        cls._targets.pop(key, None)
+        cls._dirty.pop(key, None)
+
+    @classmethod
+    def request(cls, key: Hashable):
+        """다시 그리기 요청. 이미 대기 중인 key면 합쳐짐"""
+        if key not in cls._targets:
+            return
+        cls._requested += 1
+        if key in cls._dirty:
+            cls._skipped += 1
+        else:
+            cls._dirty[key] = None
+        cls._schedule()
+
+    @classmethod
+    def post_size_event(cls, window: wx.Window):
+        """window.PostSizeEvent()를 다른 요청과 합쳐서 한 번만 보냄"""
+        key = (id(window), "PostSizeEvent")
+        if key not in cls._targets:
+            cls.register(key, window, window.PostSizeEvent)
+        cls.request(key)
+
+    @classmethod
+    def flush(cls):
+        """보이지 않아 보류된 요청을 다시 확인하도록 예약
+        노트북 페이지 전환, 창 표시 등 보이는 창이 바뀌는 시점에 호출
+        """
+        if cls._dirty:
+            cls._schedule()
+
+    @classmethod
+    def get_stats(cls) -> dict[str, int]:
+        """튜닝용 카운터
+        requested: 전체 요청 수
+        performed: 실제로 다시 그린 횟수
+        skipped: 대기 중인 요청과 합쳐져 생략된 횟수
+        pending: 보이지 않아 보류 중인 요청 수
+        """
+        return {
+            "requested": cls._requested,
+            "performed": cls._performed,
+            "skipped": cls._skipped,
+            "pending": len(cls._dirty),
+        }
+
+    @classmethod
+    def reset_stats(cls):
+        cls._requested = 0
+        cls._performed = 0
+        cls._skipped = 0
+
+    @classmethod
+    def _schedule(cls):
+        timer = cls._timer
+        if timer is not None and timer.IsRunning():
+            if (monotonic() - cls._first_request_at)*1000 < cls.MAX_DELAY_MS:
+                timer.Restart(cls.DEBOUNCE_MS)
+            return
+        cls._first_request_at = monotonic()
+        cls._timer = wx.CallLater(cls.DEBOUNCE_MS, cls._run)
+
+    @classmethod
+    def _run(cls):
+        cls._timer = None
+        for key in list(cls._dirty):
+            window, callback = cls._targets.get(key, (None, None))
+            if window is None or not window:
+                cls._dirty.pop(key, None)
+                cls._targets.pop(key, None)
+                continue
+            if not window.IsShownOnScreen():
+                continue
+            cls._dirty.pop(key, None)
+            cls._performed += 1
+            callback()
@@ -1,5 +1,9 @@
 import wx
+
+from wx.lib.dialogs import ScrolledMessageDialog
+
 from util import APP_NAME, VERSION
+from util.startup import StartupProfile
 from .component import NEXEN_LOGO_FULL_SVG
 
 class DialogInfo(wx.Dialog):
@@ -25,6 +29,7 @@ class DialogInfo(wx.Dialog):
 
         st_hypeware = wx.StaticText(self, label="2025 Hypeware\ncontact@hypeware.co.kr", style=wx.ALIGN_CENTER)
 
+        bt_startup = wx.Button(self, label="시작 시간")
         bt_close = wx.Button(self, label="닫기")
 
         sz_vert = wx.BoxSizer(wx.VERTICAL)
@@ -33,6 +38,7 @@ class DialogInfo(wx.Dialog):
             (st_title, 0, wx.ALIGN_CENTER_HORIZONTAL), ((-1, 5), 0),
             (st_version, 0, wx.ALIGN_CENTER_HORIZONTAL), ((-1, 30), 0),
             (st_hypeware, 0, wx.ALIGN_CENTER_HORIZONTAL), ((-1, 20), 0),
+            (bt_startup, 0, wx.EXPAND), ((-1, 5), 0),
             (bt_close, 0, wx.EXPAND)
         ))
         sz = wx.BoxSizer(wx.HORIZONTAL)
@@ -40,7 +46,14 @@ class DialogInfo(wx.Dialog):
         self.SetSizerAndFit(sz)
         self.CenterOnParent()
 
+        bt_startup.Bind(wx.EVT_BUTTON, self.__on_startup)
         bt_close.Bind(wx.EVT_BUTTON, self.__on_close)
+
+    def __on_startup(self, event):
+        """프로그램 시작 단계별 시간과 import 시간 상위 모듈 표시"""
+        dlg = ScrolledMessageDialog(self, StartupProfile.get_report(), "시작 시간", size=(520, 480))
+        dlg.ShowModal()
+        dlg.Destroy()
     
     def __on_close(self, event):
         self.EndModal(wx.ID_CLOSE)
@@ -4,13 +4,13 @@ import wx
 
 from traceback import format_exc
 from threading import Thread
+from typing import Iterable, Literal
 from sqlalchemy import delete
 
-from ai import get_gpt_models, get_claude_models
 from db import LoadedData, EXT, DATABASE_PATH, Session, get_engine, validate_db
 from db.models import read_ctr_excel, read_element_excel, CostCategory, CostCtr, CostElement
 from util import APP_NAME, get_error_message, Config
-from ui.component import EVT_UPDATE, NEXEN_LOGO_SVG, WARNING_MARK_SVG
+from ui.component import EVT_UPDATE, NEXEN_LOGO_SVG, WARNING_MARK_SVG, RedrawScheduler, PanelLazyPage, ComputeExecutor
 from ui.panel_dashboard import PanelDashboard
 from ui.panel_viewer import PanelViewer
 from ui.panel_manager import PanelManager
@@ -162,13 +162,27 @@ class DialogLoadDB(wx.Dialog):
     def __on_cancel(self, event):
         self.EndModal(wx.ID_CANCEL)
 
+StartupStage = Literal["data", "charts"]
+STARTUP_STAGE_MESSAGES: dict[StartupStage, str] = {
+    "data": "이전 Raw Data를 불러오는 중입니다.",
+    "charts": "차트 글꼴을 준비하는 중입니다.",
+}
+
 class FrameMain(wx.Frame):
-    def __init__(self):
+    def __init__(self, pending: Iterable[StartupStage] = ()):
+        """
+        Args:
+            pending
+                아직 끝나지 않은 시작 준비 단계. 끝나면 set_ready()로 알려야 하며
+                그 전까지 해당 단계가 필요한 페이지는 안내 문구를, 데이터를 바꾸는 메뉴는 비활성화 상태로 표시
+        """
         wx.Frame.__init__(self, None, title=APP_NAME)
+        self.__pending: set[StartupStage] = set(pending)
         self.__set_icon()
         self.__set_layout()
         self.__set_menubar()
         self.__bind_events()
+        self.__update_pending()
         self.SetSize((1000, 800))
         self.SetMinSize(self.GetSize())
         self.CenterOnScreen()
@@ -185,6 +199,7 @@ class FrameMain(wx.Frame):
         mi_save_db = wx.MenuItem(menu, -1, "DB 다른 이름으로 저장")
         mi_load_ctr = wx.MenuItem(menu, -1, "Cost Ctr 불러오기")
         mi_load_element = wx.MenuItem(menu, -1, "Cost Element / Category 불러오기")
+        mi_export_all = wx.MenuItem(menu, -1, "데이터 및 집계 일괄 내보내기")
         mi_quit = wx.MenuItem(menu, -1, "종료")
         menu.Append(mi_manage_data)
         menu.Append(mi_set_openai_key)
@@ -196,6 +211,8 @@ class FrameMain(wx.Frame):
         menu.Append(mi_load_ctr)
         menu.Append(mi_load_element)
         menu.AppendSeparator()
+        menu.Append(mi_export_all)
+        menu.AppendSeparator()
         menu.Append(mi_quit)
         menubar.Append(menu, "메뉴")
 
@@ -213,29 +230,103 @@ class FrameMain(wx.Frame):
         self.__mi_save_db = mi_save_db
         self.__mi_load_ctr = mi_load_ctr
         self.__mi_load_element = mi_load_element
+        self.__mi_export_all = mi_export_all
         self.__mi_quit = mi_quit
         self.__mi_license = mi_license
         self.__mi_info = mi_info
+        # 이전 Raw Data를 불러오기 전에 바꾸면 복원된 데이터로 덮어씌워지므로 "data" 단계 전까지 비활성화
+        self.__data_menu_items = (mi_manage_data, mi_load_ctr, mi_load_element, mi_export_all)
 
     def __set_layout(self):
         pn = wx.Panel(self)
         nb = wx.Notebook(pn)
-        pn_dashboard = PanelDashboard(nb)
-        pn_viewer    = PanelViewer(nb)
-        pn_manager   = PanelManager(nb)
-        pn_bs_chart  = PanelBSChart(nb)
-        nb.AddPage(pn_dashboard, "대시보드")
-        nb.AddPage(pn_viewer   , "뷰어")
-        nb.AddPage(pn_manager  , "관리")
-        nb.AddPage(pn_bs_chart , "BS별 차트")
+        # 각 패널은 페이지가 처음 보일 때 생성하고, 데이터 변경 시에는 보이는 페이지만 다시 계산
+        pg_dashboard = PanelLazyPage(nb, PanelDashboard, lambda pn: pn.redraw_charts())
+        pg_viewer    = PanelLazyPage(nb, PanelViewer, self.__refresh_viewer)
+        pg_manager   = PanelLazyPage(nb, self.__create_manager, self.__refresh_manager)
+        pg_bs_chart  = PanelLazyPage(nb, PanelBSChart, lambda pn: pn.load_bs_list())
+        nb.AddPage(pg_dashboard, "대시보드")
+        nb.AddPage(pg_viewer   , "뷰어")
+        nb.AddPage(pg_manager  , "관리")
+        nb.AddPage(pg_bs_chart , "BS별 차트")
         sz = wx.BoxSizer(wx.HORIZONTAL)
         sz.Add(nb, 1, wx.EXPAND|wx.ALL, 10)
         pn.SetSizer(sz)
 
-        self.__pn_dashboard = pn_dashboard
-        self.__pn_viewer    = pn_viewer   
-        self.__pn_manager   = pn_manager  
-        self.__pn_bs_chart  = pn_bs_chart 
+        self.__nb = nb
+        self.__pg_dashboard = pg_dashboard
+        self.__pg_viewer    = pg_viewer   
+        self.__pg_manager   = pg_manager  
+        self.__pg_bs_chart  = pg_bs_chart 
+        # 페이지별로 생성 전에 끝나야 하는 시작 준비 단계
+        self.__page_stages: list[tuple[PanelLazyPage, tuple[StartupStage, ...]]] = [
+            (pg_dashboard, ("data", "charts")),
+            (pg_viewer   , ("data", "charts")),
+            (pg_manager  , ("data",)),
+            (pg_bs_chart , ("data", "charts")),
+        ]
+        # 창이 먼저 보이도록 첫 페이지는 다음 이벤트 루프에서 생성
+        wx.CallAfter(self.__activate_current_page)
+
+    @staticmethod
+    def __create_manager(parent: wx.Window) -> PanelManager:
+        pn = PanelManager(parent)
+        pn.redraw_data_tree()
+        return pn
+
+    @staticmethod
+    def __refresh_viewer(pn: PanelViewer):
+        pn.redraw_trees()
+        pn.update_values()
+
+    @staticmethod
+    def __refresh_manager(pn: PanelManager):
+        pn.redraw_data_tree()
+
+    def __reload_manager_db_values(self):
+        """DB가 바뀐 경우 관리 페이지의 Ctr/Category/Element 트리를 다시 로드
+        생성되지 않은 경우 생성 시점에 로드되므로 생략
+        """
+        pn_manager: PanelManager|None = self.__pg_manager.panel # type: ignore
+        if pn_manager is not None:
+            pn_manager.load_db_values()
+
+    def set_ready(self, stage: StartupStage):
+        """시작 준비 단계가 끝남. 이 단계를 기다리던 페이지와 메뉴를 사용할 수 있게 함"""
+        if stage not in self.__pending:
+            return
+        self.__pending.discard(stage)
+        self.__update_pending()
+        self.__activate_current_page()
+        if stage == "data":
+            self.check_restored_files()
+
+    def __update_pending(self):
+        for page, stages in self.__page_stages:
+            waiting = [stage for stage in stages if stage in self.__pending]
+            page.set_waiting(STARTUP_STAGE_MESSAGES[waiting[0]] if waiting else None)
+        for mi in self.__data_menu_items:
+            mi.Enable("data" not in self.__pending)
+
+    def check_restored_files(self):
+        """이전 실행에서 복원한 Raw Data의 원본 파일이 바뀌었는지 워커 스레드에서 확인하고 알림"""
+        if LoadedData.restore_error:
+            wx.MessageBox(LoadedData.restore_error, "안내", parent=self)
+            LoadedData.restore_error = None
+        if not LoadedData.restored_files:
+            return
+
+        def on_done(stale: list[str,]):
+            if not stale:
+                return
+            wx.MessageBox(
+                "이전 실행에서 불러온 다음 파일이 변경되었거나 존재하지 않습니다.\n" \
+                    "최신 데이터가 필요하면 'Raw Data 관리'에서 삭제 후 다시 업로드하세요.\n\n" + "\n".join(stale),
+                "안내",
+                parent=self
+            )
+
+        ComputeExecutor.submit((id(self), "check_restored_files"), lambda token: LoadedData.find_stale_files(), on_done, owner=self)
 
     def __set_icon(self):
         base = self.FromDIP(32)
@@ -258,10 +349,35 @@ class FrameMain(wx.Frame):
         self.Bind(wx.EVT_MENU, self.__on_save_db, self.__mi_save_db)
         self.Bind(wx.EVT_MENU, self.__on_load_ctr, self.__mi_load_ctr)
         self.Bind(wx.EVT_MENU, self.__on_load_element, self.__mi_load_element)
+        self.Bind(wx.EVT_MENU, self.__on_export_all, self.__mi_export_all)
         self.Bind(wx.EVT_MENU, self.__on_quit, self.__mi_quit)
         self.Bind(wx.EVT_MENU, self.__on_licence, self.__mi_license)
         self.Bind(wx.EVT_MENU, self.__on_info, self.__mi_info)
         self.Bind(EVT_UPDATE, self.__on_data_updated)
+        self.Bind(wx.EVT_SHOW, self.__on_visibility_changed)
+        self.Bind(wx.EVT_ICONIZE, self.__on_visibility_changed)
+        self.__nb.Bind(wx.EVT_NOTEBOOK_PAGE_CHANGED, self.__on_page_changed)
+
+    def __on_visibility_changed(self, event):
+        """보이지 않아 보류되었던 다시 그리기 요청 처리"""
+        RedrawScheduler.flush()
+        event.Skip()
+
+    def __on_page_changed(self, event):
+        self.__activate_current_page()
+        RedrawScheduler.flush()
+        event.Skip()
+
+    def __activate_current_page(self):
+        page: PanelLazyPage = self.__nb.GetCurrentPage() # type: ignore
+        if page is not None:
+            page.activate()
+
+    def __invalidate(self, *pages: PanelLazyPage):
+        """페이지를 stale로 표시하고 현재 보이는 페이지만 즉시 다시 계산"""
+        for page in pages:
+            page.mark_stale()
+        self.__activate_current_page()
 
     def __on_manage_data(self, event):
         dlg = DialogManageRawData(self)
@@ -269,8 +385,8 @@ class FrameMain(wx.Frame):
         updated = dlg.is_updated()
         dlg.Destroy()
         if updated:
+            self.__pg_manager.mark_stale()
             self.__on_data_updated(None)
-            self.__pn_manager.redraw_data_tree()
 
     def __on_set_openai_key(self, event):
         val = Config.OPENAI_API_KEY
@@ -297,10 +413,13 @@ class FrameMain(wx.Frame):
 
         def work():
             try:
+                from ai import get_gpt_models, AIClients # AI SDK는 처음 사용할 때 워커 스레드에서 로드
                 models = get_gpt_models(val)
             except Exception as err:
                 msg = f"연결이 불가합니다.\nAPI 키를 확인하세요.\n\n{err}"
             else:
+                # 이전 키의 연결 풀은 닫음
+                AIClients.discard("ChatGPT", Config.OPENAI_API_KEY)
                 Config.OPENAI_API_KEY = val
                 Config.GPT_MODELS = models
                 Config.LAST_USED_GPT_MODEL = models[0]
@@ -335,10 +454,13 @@ class FrameMain(wx.Frame):
 
         def work():
             try:
+                from ai import get_claude_models, AIClients # AI SDK는 처음 사용할 때 워커 스레드에서 로드
                 models = get_claude_models(val)
             except Exception as err:
                 msg = f"연결이 불가합니다.\nAPI 키를 확인하세요.\n\n{err}"
             else:
+                # 이전 키의 연결 풀은 닫음
+                AIClients.discard("Claude", Config.CLAUDE_API_KEY)
                 Config.CLAUDE_MODELS = models
                 Config.LAST_USED_CLAUDE_MODEL = models[0]
                 Config.CLAUDE_API_KEY = val
@@ -370,8 +492,8 @@ class FrameMain(wx.Frame):
             msg = f"DB 파일을 불러오던 중 오류가 발생했습니다.\n\n{format_exc()}"
         else:
             msg = "DB 파일을 불러왔습니다."
-            self.__pn_manager.load_db_values()
-            self.__pn_manager.redraw_data_tree()
+            self.__reload_manager_db_values()
+            self.__pg_manager.mark_stale()
             self.__on_data_updated(None)
         finally:
             wx.MessageBox(msg, "안내")
@@ -406,10 +528,12 @@ class FrameMain(wx.Frame):
         dlgp.Pulse()
 
         def success():
-            self.__pn_manager.load_db_values()
+            pn_viewer: PanelViewer|None = self.__pg_viewer.panel # type: ignore
+            if pn_viewer is not None:
+                pn_viewer.set_ctr_filter(CostCtr.get_root_ctr())
+            self.__reload_manager_db_values()
+            self.__pg_manager.mark_stale()
             self.__on_data_updated(None)
-            self.__pn_manager.redraw_data_tree()
-            self.__pn_viewer.set_ctr_filter(CostCtr.get_root_ctr())
             dlgp.Destroy()
             wx.Yield()
             wx.MessageBox("Cost Ctr 정보를 엑셀 파일의 내용으로 덮어씌웠습니다.", "안내", parent=self)
@@ -458,10 +582,12 @@ class FrameMain(wx.Frame):
         dlgp.Pulse()
 
         def success():
-            self.__pn_manager.load_db_values()
+            pn_viewer: PanelViewer|None = self.__pg_viewer.panel # type: ignore
+            if pn_viewer is not None:
+                pn_viewer.set_category_filter(CostCategory.get_root_category(False))
+            self.__reload_manager_db_values()
+            self.__pg_manager.mark_stale()
             self.__on_data_updated(None)
-            self.__pn_manager.redraw_data_tree()
-            self.__pn_viewer.set_category_filter(CostCategory.get_root_category(False))
             dlgp.Destroy()
             wx.Yield()
             wx.MessageBox("Cost Element & Category 정보를 엑셀 파일의 내용으로 덮어씌웠습니다.", "안내", parent=self)
@@ -498,6 +624,43 @@ class FrameMain(wx.Frame):
 
         Thread(target=work, daemon=True).start()
 
+    def __on_export_all(self, event):
+        if LoadedData.df.empty:
+            wx.MessageBox("내보낼 데이터가 없습니다.\n먼저 데이터를 로드하세요.", "안내", parent=self)
+            return
+        dlg = wx.FileDialog(
+            self,
+            "데이터 및 집계 일괄 내보내기",
+            wildcard="엑셀 파일 (*.xlsx)|*.xlsx|CSV 파일 (*.csv)|*.csv|Parquet 파일 (*.parquet)|*.parquet",
+            style=wx.FD_SAVE|wx.FD_OVERWRITE_PROMPT
+        )
+        ret = dlg.ShowModal()
+        filepath = dlg.GetPath()
+        fmt = ("xlsx", "csv", "parquet")[dlg.GetFilterIndex()]
+        dlg.Destroy()
+        if ret != wx.ID_OK:
+            return
+        df = LoadedData.df
+        dlgp = wx.ProgressDialog("안내", "데이터를 내보내는 중입니다.", parent=self)
+        dlgp.Pulse()
+
+        def on_done(msg: str):
+            dlgp.Destroy()
+            wx.Yield()
+            wx.MessageBox(msg, "안내", parent=self)
+
+        def work():
+            try:
+                from db.export import export_all # openpyxl은 처음 사용할 때 import
+                paths = export_all(filepath, fmt, df, lambda msg: wx.CallAfter(dlgp.Pulse, msg))
+            except Exception as err:
+                msg = get_error_message(err)
+            else:
+                msg = "다음 파일로 내보냈습니다.\n\n" + "\n".join(paths)
+            wx.CallAfter(on_done, msg)
+
+        Thread(target=work, daemon=True).start()
+
     def __on_quit(self, event):
         dlg = wx.MessageDialog(self, "프로그램을 종료할까요?", "안내", style=wx.YES_NO|wx.NO_DEFAULT)
         ret = dlg.ShowModal()
@@ -506,12 +669,13 @@ class FrameMain(wx.Frame):
             self.Destroy()
 
     def __on_data_updated(self, event):
-        """데이터에 변화가 생겨서 대시보드와 뷰어를 다시 그림
-        pn_manager는 필요한 경우에 별도로 호출
+        """데이터에 변화가 생겨서 대시보드, 뷰어, BS별 차트를 stale로 표시
+        현재 보이는 페이지만 즉시 다시 그리고 나머지는 페이지가 보일 때 다시 그림
+        관리 페이지는 필요한 경우에 별도로 stale 표시
+        스냅샷은 같은 key로 예약하여 연달아 바뀌어도 마지막 상태만 한 번 저장
         """
-        self.__pn_dashboard.redraw_charts()
-        self.__pn_viewer.redraw_trees()
-        self.__pn_viewer.update_values()
+        self.__invalidate(self.__pg_dashboard, self.__pg_viewer, self.__pg_bs_chart)
+        ComputeExecutor.submit("save_snapshot", lambda token: LoadedData.save_snapshot(), lambda _: None)
 
     def __on_licence(self, event):
         dlg = DialogOSSL(self)
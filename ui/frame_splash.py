@@ -0,0 +1,52 @@
+import wx
+
+from util import APP_NAME, VERSION
+
+class FrameSplash(wx.Frame):
+    """시작 준비 중에 표시되는 창
+
+    화면 모듈(matplotlib 등)을 import하기 전에 띄워야 하므로 wx와 util만 사용함
+    """
+    def __init__(self, total_steps: int):
+        super().__init__(None, title=APP_NAME, style=wx.BORDER_SIMPLE|wx.STAY_ON_TOP)
+        pn = wx.Panel(self)
+        pn.SetBackgroundColour(wx.WHITE)
+
+        font = pn.GetFont().Bold()
+        font.SetPointSize(14)
+        st_title = wx.StaticText(pn, label=APP_NAME)
+        st_title.SetFont(font)
+
+        st_version = wx.StaticText(pn, label=f"< {VERSION} >")
+        st_version.SetForegroundColour(wx.Colour(100, 100, 100))
+
+        st_message = wx.StaticText(pn, label="프로그램을 시작하는 중입니다.", style=wx.ST_NO_AUTORESIZE)
+        gauge = wx.Gauge(pn, range=total_steps, size=(self.FromDIP(320), self.FromDIP(8)))
+
+        sz_vert = wx.BoxSizer(wx.VERTICAL)
+        sz_vert.AddMany((
+            (st_title, 0, wx.ALIGN_CENTER_HORIZONTAL), ((-1, 5), 0),
+            (st_version, 0, wx.ALIGN_CENTER_HORIZONTAL), ((-1, 30), 0),
+            (st_message, 0, wx.EXPAND), ((-1, 5), 0),
+            (gauge, 0, wx.EXPAND)
+        ))
+        sz = wx.BoxSizer(wx.HORIZONTAL)
+        sz.Add(sz_vert, 1, wx.EXPAND|wx.ALL, 30)
+        pn.SetSizer(sz)
+        self.SetClientSize(pn.GetBestSize())
+        self.CenterOnScreen()
+
+        self.__st_message = st_message
+        self.__gauge = gauge
+
+    def set_progress(self, step: int, message: str):
+        """
+        Args:
+            step
+                완료된 단계 수
+        """
+        if not self:
+            return
+        self.__st_message.SetLabel(message)
+        self.__gauge.SetValue(step)
+        self.Update()
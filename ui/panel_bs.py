@@ -1,91 +1,33 @@
 import os
-import numpy as np
+import json
 import wx
 
 from datetime import datetime
+from threading import Thread, Event
 from io import BytesIO
 from itertools import cycle
-from collections import defaultdict
-from traceback import format_exc
 
 from PIL import Image
 from wx.lib.scrolledpanel import ScrolledPanel
 
-from util import Config, simplify_won, pastel_gradient, COLORMAP
+from util import Config, simplify_won, COLORMAP, ExceptionWithMessage, get_error_message
 from util.chart import (
-    draw_pie, draw_horizontal_overlapped_bar, draw_stacked_multiple_bar,
+    draw_horizontal_overlapped_bar, draw_stacked_multiple_bar,
     VGAP,
 )
+from util.image_cache import ImageCache, fingerprint
+from util.chart_render import RenderJob, bs_jobs
 
-from db.models import CostCtr, CostCategory
+from db.models import CostCtr
 from db.loaded_data import LoadedData
+from db.aggregation import build_fact_frame, aggregate_bs
+from db.report import build_bs_report_jobs
 
 from ui.component import PanelAspectRatio, PanelCanvas, \
-    FONT_COLOR_HIGH_PORTION, FONT_COLOR_MID_PORTION, FONT_COLOR_LOW_PORTION, FONT_COLOR_NEGATIVE_VALUE
-
-
-class PanelPieAndBar(PanelAspectRatio):
-    def __init__(self, parent: wx.Window, pie_values: dict[str, float], bar_values: dict[str, float], color: str):
-        super().__init__(parent, 4, True)
-        pn_pie = PanelCanvas(self, save_fig_callback=self.save_image)
-        pn_bar = PanelCanvas(self, save_fig_callback=self.save_image)
-
-        # 파이
-        ax: Axes = pn_pie.ax # type: ignore
-        colors = pastel_gradient(color, max(1, len(pie_values)))
-        draw_pie(ax, pie_values, colors=colors, start_angle=90.0, sort_by="value", desc=True)
-
-        # 바
-        ax: Axes = pn_bar.ax # type: ignore
-        ax.set_yticks([])
-        ax.set_xticks([])
-        for spine in ax.spines.values():
-            spine.set_visible(False)
-        if bar_values:
-            colors = pastel_gradient(color, len(bar_values))
-            labels = list(bar_values.keys())
-            values = list(bar_values.values())
-            y = np.arange(len(labels))
-            ax.barh(y, values, height=0.6, color=colors, edgecolor="none")
-            ax.set_yticks(y)
-            ax.set_yticklabels(labels)
-            ax.tick_params(axis='y', labelsize=10, left=False)
-            max_v = max(values) if values else 1
-            for yi, val in enumerate(values):
-                ax.text(val + (max_v * 0.01), yi, simplify_won(val), ha='left', va='center')
-            ax.set_ylim(len(bar_values) - 0.5, -0.5)
-            ax.set_xlim(0, max_v * 1.3)
+    FONT_COLOR_HIGH_PORTION, FONT_COLOR_MID_PORTION, FONT_COLOR_LOW_PORTION, FONT_COLOR_NEGATIVE_VALUE, \
+    ComputeExecutor, CancelToken, RedrawScheduler, PieAndBarPool, \
+    save_all_images, ask_image_target, render_in_background
 
-        sz_horz = wx.BoxSizer(wx.HORIZONTAL)
-        sz_horz.AddMany((
-            (pn_pie, 2, wx.EXPAND), ((40, -1), 0),
-            (pn_bar, 3, wx.EXPAND)
-        ))
-        self.SetSizer(sz_horz)
-        pn_pie.draw()
-        pn_bar.draw()
-
-        self.pn_pie = pn_pie
-        self.pn_bar = pn_bar
-
-    def save_image(self, filepath: str):
-        buf_pie = BytesIO()
-        self.pn_pie.fig.savefig(buf_pie, format="png", bbox_inches="tight")
-        buf_pie.seek(0)
-        pil_pie = Image.open(buf_pie)
-
-        buf_bar = BytesIO()
-        self.pn_bar.fig.savefig(buf_bar, format="png", bbox_inches="tight")
-        buf_bar.seek(0)
-        pil_bar = Image.open(buf_bar)
-
-        merged = Image.new(
-            "RGB",
-            (pil_pie.width + pil_bar.width, pil_pie.height)
-        )
-        merged.paste(pil_pie, (0, 0))
-        merged.paste(pil_bar, (pil_pie.width, 0))
-        merged.save(filepath)
 
 class PanelChart(ScrolledPanel):
     def __init__(self, parent: wx.Window):
@@ -94,7 +36,6 @@ class PanelChart(ScrolledPanel):
         self._set_layout()
         self._bind_events()
         self.SetupScrolling(False, True)
-        self._pie_and_bars: list[PanelPieAndBar] = []
         self.draw_empty()
 
     def _set_layout(self):
@@ -193,121 +134,136 @@ class PanelChart(ScrolledPanel):
         self.__cv_exe_portion = cv_exe_portion
         self.__cv_team = cv_team
         self.__cv_dev = cv_dev
-        self.__sz_pie_and_bars = sz_pie_and_bars
+        self.__pie_and_bar_pool = PieAndBarPool(pn_inner, sz_pie_and_bars, VGAP)
+        self.__data: dict | None = None # 마지막으로 그린 집계 결과
 
     @property
     def cv_team(self): return self.__cv_team
     @property
     def cv_dev(self): return self.__cv_dev
     @property
-    def pie_and_bars(self): return self._pie_and_bars
+    def pie_and_bars(self): return self.__pie_and_bar_pool.panels
 
     def _bind_events(self):
+        RedrawScheduler.register((id(self), "fit_width"), self, self._fit_width)
         self.Bind(wx.EVT_SIZE, self._on_size)
     
     def _on_size(self, event):
+        # 크기 변경 중에는 차트 크기를 고정해두고 변경이 멈춘 뒤 한 번만 맞춤
+        RedrawScheduler.request((id(self), "fit_width"))
+        event.Skip()
+
+    def _fit_width(self):
         w, _ = self.GetClientSize()
         if w < 400:
             self.__pn_inner.SetMinSize(wx.Size(w-40, -1))
         else:
             self.__pn_inner.SetMinSize(wx.Size(min(1000, w), -1))
-        event.Skip()
+        self.Layout()
+        self.FitInside()
 
     def save_fig_exe_portion(self, filepath: str):
         panel = self.__pn_header_table
         width, height = panel.GetClientSize().Get()
-        client_dc = wx.ClientDC(panel)
-        bitmap = wx.Bitmap(width, height)
-        memory_dc = wx.MemoryDC(bitmap)
-        memory_dc.Blit(0, 0, width, height, client_dc, 0, 0)
-        wx_image = bitmap.ConvertToImage()
-        width = wx_image.GetWidth()
-        height = wx_image.GetHeight()
-        rgb_data = wx_image.GetData()
-        pil_table = Image.frombytes("RGB", (width, height), rgb_data)
-
-        buf_chart = BytesIO()
-        self.__cv_exe_portion.fig.savefig(buf_chart, format="png", bbox_inches="tight")
-        buf_chart.seek(0)
-        pil_chart = Image.open(buf_chart)
-
-        merged = Image.new(
-            "RGB",
-            (pil_table.width, pil_table.height+pil_chart.height)
-        )
-        merged.paste(pil_table, (0, 0))
-        merged.paste(pil_chart, (0, pil_table.height))
-        merged.save(filepath)
+        # 총계 표와 차트가 그대로면 이전에 합친 이미지를 그대로 씀
+        key = None
+        if self.__cv_exe_portion.cache_key is not None:
+            key = ("exe_portion_merged", self.__cv_exe_portion.cache_key, fingerprint(self.__get_header()), width, height)
+        data = ImageCache.get(key) if key is not None else None
+        if data is None:
+            client_dc = wx.ClientDC(panel)
+            bitmap = wx.Bitmap(width, height)
+            memory_dc = wx.MemoryDC(bitmap)
+            memory_dc.Blit(0, 0, width, height, client_dc, 0, 0)
+            wx_image = bitmap.ConvertToImage()
+            rgb_data = wx_image.GetData()
+            pil_table = Image.frombytes("RGB", (wx_image.GetWidth(), wx_image.GetHeight()), rgb_data)
+
+            pil_chart = Image.open(BytesIO(self.__cv_exe_portion.get_png(bbox_inches="tight")))
+
+            merged = Image.new(
+                "RGB",
+                (pil_table.width, pil_table.height+pil_chart.height)
+            )
+            merged.paste(pil_table, (0, 0))
+            merged.paste(pil_chart, (0, pil_table.height))
+            buf = BytesIO()
+            merged.save(buf, format="png")
+            data = buf.getvalue()
+            if key is not None:
+                ImageCache.put(key, data)
+        with open(filepath, "wb") as f:
+            f.write(data)
+
+    def get_render_jobs(self, dir_path: str, filehead: str, fmt: str) -> list[RenderJob]:
+        """마지막으로 그린 집계 결과로 이미지 저장 job 생성. 그린 결과가 없으면 빈 목록"""
+        data = self.__data
+        if data is None:
+            return []
+
+        def path(no: int) -> str:
+            return os.path.join(dir_path, f"{filehead}_{no:02}.{fmt}")
+
+        return bs_jobs(data, self.__get_header(), path)
+
+    def __get_header(self) -> dict:
+        """총계 표의 텍스트와 색상"""
+        def item(label: str, st: wx.StaticText) -> tuple[str, str, str]:
+            return label, st.GetLabel(), st.GetForegroundColour().GetAsString(wx.C2S_HTML_SYNTAX)
+        return {
+            "title": self.__st_label_title.GetLabel(),
+            "items": [
+                item("계획", self.__st_value_plan),
+                item("실적", self.__st_value_actual),
+                item("집행률", self.__st_value_exe),
+                item("잔액", self.__st_value_rem),
+            ],
+        }
 
     def draw_empty(self):
+        ComputeExecutor.cancel((id(self), "load_data"))
         draw_horizontal_overlapped_bar(self.__cv_exe_portion.ax) # type: ignore
         draw_stacked_multiple_bar(self.__cv_team.ax) # type: ignore
         draw_stacked_multiple_bar(self.__cv_dev.ax) # type: ignore
-        self.__sz_pie_and_bars.Clear(True)
-        self._pie_and_bars.clear()
-        self.PostSizeEvent()
+        for name, cv in (("exe_portion", self.__cv_exe_portion), ("stacked", self.__cv_team), ("stacked", self.__cv_dev)):
+            cv.set_cache_key(("empty", name))
+        self.__pie_and_bar_pool.hide_all()
+        self.__data = None
+        RedrawScheduler.post_size_event(self)
 
     def load_data(self, period: str, bs: CostCtr):
+        """집계는 워커 스레드에서 수행하고 결과만 UI 스레드에서 그림
+        연속으로 호출되면 이전 집계는 취소되고 마지막 요청의 결과만 반영됨
+        """
         month_list = Config.get_months(period)
-        df = LoadedData.get_filtered_df()
+        df = LoadedData.df
         if df is None \
             or not month_list:
             self.draw_empty()
             return
-        team_codes = []
-        for ctr in LoadedData.cached_cost_ctr.values():
-            if ctr.parent_code == bs.code:
-                team_codes.append(ctr.code)
-        bs_and_team_codes = [bs.code] + [code for code in team_codes]
-        df = df.loc[df["Cost Center"].isin(bs_and_team_codes)]
-        if df.empty:
+        bs_code = bs.code
+
+        def work(token: CancelToken) -> dict|None:
+            fact = build_fact_frame(LoadedData.get_filtered_df(df))
+            token.raise_if_cancelled()
+            return aggregate_bs(fact, month_list, bs_code)
+
+        ComputeExecutor.submit(
+            (id(self), "load_data"),
+            work,
+            lambda data: self._apply_data(period, data),
+            owner=self
+        )
+
+    def _apply_data(self, period: str, data: dict|None):
+        if data is None:
             self.draw_empty()
             return
+        self.__data = data
         self.Freeze()
-        months = [f"ConvActual({i})" for i in month_list]
-        months_plan = [f"ConvPlan({i})" for i in month_list]
-        cat_pk_vs_indice = defaultdict(list)
-        first_cat_pk_vs_indice = defaultdict(list) # R&D
-        rnd_vs_indice = defaultdict(list) # 개발 비중
-        oe_vs_indice = defaultdict(list) # OE 비중
-        team_code_vs_indice = defaultdict(list)
-        cat_pk_vs_elem_codes = defaultdict(list)
-        for elem in LoadedData.cached_cost_element.values():
-            if elem.category_pk in LoadedData.cached_cost_category:
-                cat = LoadedData.cached_cost_category[elem.category_pk]
-                cat_pk_vs_elem_codes[cat.pk].append(elem.code)
-
-        for idx in df.index:
-            sr = df.loc[idx]
-            ctr_code = sr["Cost Center"]
-            elem_code = sr["Cost Element"]
-            currency_code = sr["Currency"]
-            elem = LoadedData.cached_cost_element.get(elem_code)
-            if elem:
-                cat = LoadedData.cached_cost_category.get(elem.category_pk) # type: ignore
-                if cat:
-                    cat_pk_vs_indice[cat.pk].append(idx)
-                first_category = LoadedData.get_first_category(cat)
-                if first_category:
-                    first_cat_pk_vs_indice[first_category.pk].append(idx)
-            ctr = LoadedData.cached_cost_ctr.get(ctr_code)
-            if ctr and ctr.code in team_codes:
-                rnd_vs_indice[ctr.rnd].append(idx)
-                oe_vs_indice[ctr.oe].append(idx)
-                team_code_vs_indice[ctr.code].append(idx)
-                team_code_vs_indice[ctr.code].append(idx)
-
         self.__st_label_title.SetLabel(f"{period} 총계")
-        data_exe_portion = {
-            LoadedData.cached_cost_category[cat_pk].name: (
-                df.loc[indice, months_plan].fillna(0).sum().sum(),
-                df.loc[indice, months].fillna(0).sum().sum()
-            )
-            for cat_pk, indice in first_cat_pk_vs_indice.items()
-        }
-        data_exe_portion = dict(sorted(data_exe_portion.items(), key=lambda item: item[1][0]))
-        total_plan = np.sum([value[0] for value in data_exe_portion.values()])
-        total_actual = np.sum([value[1] for value in data_exe_portion.values()])
+        total_plan = data["total_plan"]
+        total_actual = data["total_actual"]
         self.__st_value_plan.SetLabel(simplify_won(total_plan))
         self.__st_value_actual.SetLabel(simplify_won(total_actual))
         if total_plan:
@@ -327,104 +283,31 @@ class PanelChart(ScrolledPanel):
         else:
             self.__st_value_rem.SetForegroundColour(wx.Colour(0, 0, 0))
         self.__st_value_rem.SetLabel(simplify_won(total_plan-total_actual))
-        draw_horizontal_overlapped_bar(self.__cv_exe_portion.ax, data_exe_portion) # type: ignore
-
-        data = {}
-        bs_code_vs_summation = {b: 0 for b in team_code_vs_indice}
-        for cat_pk, indice_cat in first_cat_pk_vs_indice.items():
-            cat = LoadedData.cached_cost_category[cat_pk]
-            name = cat.name
-            data[name] = {}
-            mask_cat = df.index.isin(indice_cat)
-            for bs_code, indice_bs in team_code_vs_indice.items():
-                mask = mask_cat & df.index.isin(indice_bs)
-                value = max(0, df.loc[mask, months].fillna(0).sum().sum()) # 음수는 0으로 처리
-                data[name][bs_code] = value
-                bs_code_vs_summation[bs_code] += value
-        sorted_bs_codes = [
-            bs for bs, sm in sorted(
-                bs_code_vs_summation.items(),
-                key=lambda x: -x[1]
-            ) if sm > 0
-        ]
-        for cat_name in data:
-            data[cat_name] = [data[cat_name][bs] for bs in sorted_bs_codes]
-        xlabels = [LoadedData.cached_cost_ctr[bs].name for bs in sorted_bs_codes]
-        draw_stacked_multiple_bar(self.__cv_team.ax, data, xlabels, show_summation_on_top=True) # type: ignore
+        draw_horizontal_overlapped_bar(self.__cv_exe_portion.ax, data["exe_portion"]) # type: ignore
+
+        draw_stacked_multiple_bar(self.__cv_team.ax, data["team"]["data"], data["team"]["xlabels"], show_summation_on_top=True) # type: ignore
 
         # '직접개발비' 하위 카테고리에 대한 집행 비율
-        category = CostCategory.get_direct_development_cost()
-        if not category or not category.children:
+        if data["dev"] is None:
             draw_stacked_multiple_bar(self.__cv_dev.ax) # type: ignore
         else:
-            data = {}
-            total = {}
-            summation = {}
-            team_code_vs_summation = {}
-            for cat in category.children:
-                cat: CostCategory
-                data[cat.pk] = {}
-                mask_cat = df["Cost Element"].isin(cat_pk_vs_elem_codes[cat.pk])
-                for team_code, indice in team_code_vs_indice.items():
-                    mask = (df.index.isin(indice)) \
-                        & (mask_cat)
-                    value = df.loc[mask, months].fillna(0).sum().sum()
-                    data[cat.pk][team_code] = value
-                    if team_code not in team_code_vs_summation:
-                        team_code_vs_summation[team_code] = 0
-                    team_code_vs_summation[team_code] += value
-                total[cat.pk] = np.sum(list(data[cat.pk].values()))
-            sorted_team_code_vs_summation = dict(sorted(team_code_vs_summation.items(), key=lambda items: -items[1]))
-            for team_code in list(sorted_team_code_vs_summation):
-                summation = sorted_team_code_vs_summation[team_code]
-                if summation <= 0:
-                    del sorted_team_code_vs_summation[team_code]
-            data_assigned = {}
-            for cat_pk, team_code_vs_value in data.items():
-                values = [team_code_vs_value[team_code] for team_code in sorted_team_code_vs_summation]
-                values.insert(0, total[cat_pk])
-                data_assigned[LoadedData.cached_cost_category[cat_pk].name] = values
-            xlabels = ["전체",] + [LoadedData.cached_cost_ctr[team_code].name for team_code in sorted_team_code_vs_summation]
-            draw_stacked_multiple_bar(self.__cv_dev.ax, data_assigned, xlabels, True, True) # type: ignore
-
-        data = []
-        for cat_pk, indice in first_cat_pk_vs_indice.items():
-            cat = LoadedData.cached_cost_category[cat_pk]
-            lv2_data: dict[CostCategory, float] = {}
-            lv3_data: dict[CostCategory, float] = {}
-            for lv2_cat in cat.children:
-                lv2_cat: CostCategory
-                lv2_data[lv2_cat] = 0
-                for lv3_cat in lv2_cat.children:
-                    lv3_cat: CostCategory
-                    indice = cat_pk_vs_indice[lv3_cat.pk]
-                    lv3_data[lv3_cat] = df.loc[df.index.isin(indice), months].fillna(0).sum().sum()
-                    lv2_data[lv2_cat] += lv3_data[lv3_cat]
-            data.append({
-                "lv1_cat": cat,
-                "lv2_data": dict(sorted(lv2_data.items(), key=lambda item: -item[1])),
-                "lv3_data": dict(sorted(lv3_data.items(), key=lambda item: -item[1]))
-            })
-        data.sort(key=lambda item: item["lv1_cat"].name)
-        self.__sz_pie_and_bars.Clear(True)
-        self._pie_and_bars.clear()
+            draw_stacked_multiple_bar(self.__cv_dev.ax, data["dev"]["data"], data["dev"]["xlabels"], True, True) # type: ignore
+
         colors = cycle(COLORMAP)
-        for dat in data:
-            pn_canvas = PanelPieAndBar(
-                self.__pn_inner,
-                {cat.name: values for cat, values in dat["lv2_data"].items()},
-                {cat.name: values for cat, values in dat["lv3_data"].items()},
-                next(colors)
-            )
-            self.__sz_pie_and_bars.Add(pn_canvas, 0, wx.EXPAND|wx.TOP, VGAP)
-            self._pie_and_bars.append(pn_canvas)
+        self.__pie_and_bar_pool.update(
+            (dat["name"], dat["lv2_data"], dat["lv3_data"], next(colors))
+            for dat in data["pie_and_bars"]
+        )
 
+        self.__cv_exe_portion.set_cache_key(("exe_portion", fingerprint(data["exe_portion"])))
+        self.__cv_team.set_cache_key(("stacked", fingerprint(data["team"], False)))
+        self.__cv_dev.set_cache_key(("stacked", fingerprint(data["dev"], True)))
         self.__cv_exe_portion.draw()
         self.__cv_team.draw()
         self.__cv_dev.draw()
         self.Layout()
         self.Thaw()
-        self.PostSizeEvent()
+        RedrawScheduler.post_size_event(self)
 
 class PanelBSChart(wx.Panel):
     def __init__(self, parent: wx.Window):
@@ -441,11 +324,15 @@ class PanelBSChart(wx.Panel):
         periods.extend([f"{i}월" for i in range(1, 13)])
         cb_month = wx.ComboBox(pn_menu, value="전체", choices=periods, style=wx.CB_READONLY)
         cb_bs = wx.ComboBox(pn_menu, size=wx.Size(200, -1), style=wx.CB_READONLY)
+        bt_ai_batch = wx.Button(pn_menu, label="AI 일괄 분석")
+        bt_save_report = wx.Button(pn_menu, label="전체 BS 일괄 저장")
         bt_save_all_images = wx.Button(pn_menu, label="이미지 일괄 저장")
         sz_horz = wx.BoxSizer(wx.HORIZONTAL)
         sz_horz.AddMany((
             (cb_month, 0, wx.ALIGN_CENTER_VERTICAL), ((10, -1), 0),
             (cb_bs, 0, wx.ALIGN_CENTER_VERTICAL), ((30, -1), 1),
+            (bt_ai_batch, 0, wx.ALIGN_CENTER_VERTICAL), ((5, -1), 0),
+            (bt_save_report, 0, wx.ALIGN_CENTER_VERTICAL), ((5, -1), 0),
             (bt_save_all_images, 0, wx.ALIGN_CENTER_VERTICAL)
         ))
         sz_menu = wx.BoxSizer(wx.HORIZONTAL)
@@ -463,12 +350,17 @@ class PanelBSChart(wx.Panel):
 
         self._cb_month = cb_month
         self._cb_bs = cb_bs 
+        self._bt_ai_batch = bt_ai_batch
+        self._bt_save_report = bt_save_report
         self._bt_save_all_images = bt_save_all_images
         self._pn_chart = pn_chart
 
     def _bind_events(self):
+        RedrawScheduler.register((id(self), "draw"), self, self._draw)
         self._cb_month.Bind(wx.EVT_COMBOBOX, self._on_combo_month)
         self._cb_bs.Bind(wx.EVT_COMBOBOX, self._on_combo_bs)
+        self._bt_ai_batch.Bind(wx.EVT_BUTTON, self._on_ai_batch)
+        self._bt_save_report.Bind(wx.EVT_BUTTON, self._on_save_report)
         self._bt_save_all_images.Bind(wx.EVT_BUTTON, self._on_save_all_images)
 
     def _on_combo_month(self, evt):
@@ -478,32 +370,151 @@ class PanelBSChart(wx.Panel):
         self.draw()
     
     def _on_save_all_images(self, evt):
-        dlg = wx.DirDialog(self, "이미지 일괄 저장", style=wx.DD_DEFAULT_STYLE)
+        save_all_images(self, self._pn_chart.get_render_jobs)
+
+    def _on_save_report(self, evt):
+        """모든 BS × 기간(전체, 분기)의 차트를 'BS 이름/기간' 폴더로 저장"""
+        df = LoadedData.df
+        if df is None or df.empty or not self._bs_list:
+            wx.MessageBox("저장할 데이터가 없습니다.\n먼저 데이터를 로드하세요.", "안내", parent=self)
+            return
+        target = ask_image_target(self, "전체 BS 일괄 저장")
+        if target is None:
+            return
+        dir_path, fmt = target
+        dir_path = os.path.join(dir_path, f"{datetime.now().strftime('%y%m%d_%H%M%S')}_BS별 차트")
+        bs_list = self._bs_list.copy()
+        header_colors = {
+            key: wx.Colour(color).GetAsString(wx.C2S_HTML_SYNTAX)
+            for key, color in (
+                ("low", FONT_COLOR_LOW_PORTION),
+                ("mid", FONT_COLOR_MID_PORTION),
+                ("high", FONT_COLOR_HIGH_PORTION),
+                ("negative", FONT_COLOR_NEGATIVE_VALUE),
+            )
+        }
+        render_in_background(
+            self,
+            dir_path,
+            lambda on_message: build_bs_report_jobs(dir_path, fmt, header_colors, bs_list, df=df, on_progress=on_message)
+        )
+
+    def _on_ai_batch(self, evt):
+        """선택한 BS × AI 모델 분석을 동시에 실행하고 결과를 하나의 보고서로 표시"""
+        # AI 관련 모듈은 시작 시간에 영향이 커서 처음 사용할 때 import
+        from ui.component.ai_analysis import DialogAIBatch
+        if LoadedData.df.empty or not self._bs_list:
+            wx.MessageBox("분석할 데이터가 없습니다.\n먼저 데이터를 로드하세요.", "안내", parent=self)
+            return
+        if not Config.OPENAI_API_KEY and not Config.CLAUDE_API_KEY:
+            wx.MessageBox("OpenAI 또는 Claude API Key를 설정하세요.", "안내", parent=self)
+            return
+        dlg = DialogAIBatch(
+            self,
+            [ctr.name for ctr in self._bs_list],
+            self._cb_bs.GetSelection(),
+            {
+                "ChatGPT": (Config.GPT_MODELS, Config.LAST_USED_GPT_MODEL, bool(Config.OPENAI_API_KEY)),
+                "Claude": (Config.CLAUDE_MODELS, Config.LAST_USED_CLAUDE_MODEL, bool(Config.CLAUDE_API_KEY)),
+            }
+        )
         ret = dlg.ShowModal()
-        dir_path = dlg.GetPath()
+        bs_list = [self._bs_list[i] for i in dlg.get_bs_indices()]
+        models = dlg.get_models()
         dlg.Destroy()
         if ret != wx.ID_OK:
             return
-        dlgp = wx.ProgressDialog("안내", "이미지 파일을 생성 중입니다.", parent=None)
-        dlgp.Pulse()
-        filehead = datetime.now().strftime("%y%m%d_%H%M%S")
-        try:
-            os.makedirs(dir_path, exist_ok=True)
-            self._pn_chart.save_fig_exe_portion(os.path.join(dir_path, f"{filehead}_01.png"))
-            self._pn_chart.cv_team.fig.savefig(os.path.join(dir_path, f"{filehead}_02.png"), dpi=300)
-            self._pn_chart.cv_dev .fig.savefig(os.path.join(dir_path, f"{filehead}_03.png"), dpi=300)
-            ad = 1
-            for pnb in self._pn_chart.pie_and_bars:
-                pnb.save_image(os.path.join(dir_path, f"{filehead}_{3+ad}.png"))
-                ad += 1
-        except:
-            msg = f"이미지 생성 중 오류가 발생했습니다.\n\n{format_exc()}"
-        else:
-            msg = f"이미지들을 저장 하였습니다."
-        finally:
+        for ai_type, model in models:
+            if ai_type == "ChatGPT":
+                Config.LAST_USED_GPT_MODEL = model
+            else:
+                Config.LAST_USED_CLAUDE_MODEL = model
+        self._run_ai_batch(self._cb_month.GetValue(), bs_list, models, False)
+
+    def _run_ai_batch(self, period: str, bs_list: list[CostCtr], models: list[tuple[str, str]], refresh: bool):
+        from ui.component.ai_analysis import DialogAIResult
+        keys = {"ChatGPT": Config.OPENAI_API_KEY, "Claude": Config.CLAUDE_API_KEY}
+        cancel_event = Event()
+        dlgp = wx.ProgressDialog(
+            "AI 일괄 분석", "분석 데이터를 준비하는 중입니다.", maximum=len(bs_list) * len(models), parent=self,
+            style=wx.PD_APP_MODAL|wx.PD_CAN_ABORT|wx.PD_ELAPSED_TIME
+        )
+
+        def poll_cancel():
+            # 진행 상황이 없는 동안에도 '취소'를 확인
+            if not dlgp or cancel_event.is_set():
+                return
+            if dlgp.WasCancelled():
+                cancel_event.set()
+                dlgp.Pulse("중지하는 중입니다.")
+                return
+            wx.CallLater(200, poll_cancel)
+
+        def on_progress(done: int, total: int, message: str):
+            if dlgp and not cancel_event.is_set():
+                cont, _ = dlgp.Update(min(done, total - 1), f"{message}\n({done}/{total} 완료)")
+                if not cont:
+                    cancel_event.set()
+
+        def on_done(report: str, json_data: str):
+            dlgp.Destroy()
+            wx.Yield()
+            dlg = DialogAIResult(
+                self,
+                ", ".join(dict.fromkeys(ai_type for ai_type, _ in models)),
+                ", ".join(model for _, model in models),
+                json_data,
+                report
+            )
+            ret = dlg.ShowModal()
+            dlg.Destroy()
+            if ret == wx.ID_REFRESH:
+                self._run_ai_batch(period, bs_list, models, True)
+
+        def on_fail(msg: str):
             dlgp.Destroy()
             wx.Yield()
-            wx.CallAfter(wx.MessageBox, msg, "안내", parent=self)
+            wx.MessageBox(msg, "안내", parent=self)
+
+        def work():
+            try:
+                # AI SDK는 UI가 멈추지 않도록 워커 스레드에서 로드
+                from ai.scope import build_prompts, get_bs_ctr_codes
+                from ai.runner import AIRunner, AITask, AITaskResult, build_report
+                months = Config.get_months(period)
+                tasks: list[AITask] = []
+                skipped: list[AITaskResult] = []
+                data = {}
+                for bs in bs_list:
+                    try:
+                        system_prompt, user_prompt, json_data = build_prompts(months, get_bs_ctr_codes(bs.code))
+                    except ExceptionWithMessage as err:
+                        for ai_type, model in models:
+                            skipped.append(AITaskResult(AITask(bs.name, ai_type, model, "", "", "", bs.code), error=str(err))) # type: ignore
+                        continue
+                    # BS 이름은 겹칠 수 있으므로 코드로 구분하고 이름은 보고서 제목에만 사용
+                    data[bs.code] = json.loads(json_data)
+                    for ai_type, model in models:
+                        tasks.append(AITask(bs.name, ai_type, model, keys[ai_type], system_prompt, user_prompt, bs.code)) # type: ignore
+
+                def progress(done: int, total: int, res: AITaskResult):
+                    status = "완료" if res.error is None else res.error.splitlines()[0]
+                    wx.CallAfter(
+                        on_progress, done + len(skipped), total + len(skipped),
+                        f"{res.task.title} - {res.task.ai_type}: {status} ({res.elapsed:.1f}초)"
+                    )
+
+                results = AIRunner(tasks, refresh, progress, cancel_event).run() if tasks else []
+                order = {bs.code: i for i, bs in enumerate(bs_list)}
+                results = sorted(results + skipped, key=lambda res: order[res.task.scope])
+                report = build_report(results, f"AI 일괄 분석 보고서 ({period})")
+            except Exception as err:
+                wx.CallAfter(on_fail, get_error_message(err))
+            else:
+                wx.CallAfter(on_done, report, json.dumps(data, ensure_ascii=False))
+
+        Thread(target=work, daemon=True).start()
+        wx.CallLater(200, poll_cancel)
 
     def load_bs_list(self):
         """캐시로부터 BS 목록을 확인하여 ComboBox에 로드"""
@@ -522,6 +533,10 @@ class PanelBSChart(wx.Panel):
         self.draw()
     
     def draw(self):
+        """다시 그리기 예약. 연속 호출은 합쳐지며 화면에 보일 때 그려짐"""
+        RedrawScheduler.request((id(self), "draw"))
+
+    def _draw(self):
         """선택한 기간, BS를 반영하여 차트 그림"""
         idx = self._cb_bs.GetSelection()
         if idx == wx.NOT_FOUND:
@@ -7,8 +7,9 @@ from dataclasses import dataclass
 from wx.lib.newevent import NewCommandEvent
 from wx.lib.scrolledpanel import ScrolledPanel
 from db import EnumOE, EnumRND, Currency, CostCtr, CostCategory, CostElement, MAXIMUM_DEPTH_OF_CATEGORY, LoadedData, Session
+from db.aggregation import summarize_classification
 from util import get_error_message
-from .component import TreeListCtrl, TreeListModelBase, EvtUpdate, TextEntryDialog
+from .component import TreeListCtrl, TreeListModelBase, EvtUpdate, TextEntryDialog, ComputeExecutor, CancelToken
 
 class DialogRootCtr(wx.Dialog):
     def __init__(self, parent: wx.Panel, root_ctr: CostCtr):
@@ -1776,9 +1777,16 @@ class PanelManager(wx.SplitterWindow):
         self.update_summary()
 
     def update_summary(self):
-        """우측 하단의 집계/미집계 합계 금액 업데이트"""
+        """우측 하단의 집계/미집계 합계 금액 업데이트 (워커 스레드에서 집계)"""
         df = LoadedData.df
-        if df.empty:
+
+        def work(token: CancelToken) -> dict[str, int]|None:
+            return summarize_classification(df)
+
+        ComputeExecutor.submit((id(self), "update_summary"), work, self.__apply_summary, owner=self)
+
+    def __apply_summary(self, summary: dict[str, int]|None):
+        if summary is None:
             self.__tc_plan_total.SetValue("-")
             self.__tc_plan_avail.SetValue("-")
             self.__tc_plan_na   .SetValue("-")
@@ -1786,10 +1794,9 @@ class PanelManager(wx.SplitterWindow):
             self.__tc_act_avail .SetValue("-")
             self.__tc_act_na    .SetValue("-")
             return
-        mask = LoadedData.get_available_mask()
-        self.__tc_plan_total.SetValue(f'{int(df       [[f"ConvPlan({i})"   for i in range(1, 13)]].fillna(0).sum().sum()):,}')
-        self.__tc_plan_avail.SetValue(f'{int(df[ mask][[f"ConvPlan({i})"   for i in range(1, 13)]].fillna(0).sum().sum()):,}')
-        self.__tc_plan_na   .SetValue(f'{int(df[~mask][[f"ConvPlan({i})"   for i in range(1, 13)]].fillna(0).sum().sum()):,}')
-        self.__tc_act_total .SetValue(f'{int(df       [[f"ConvActual({i})" for i in range(1, 13)]].fillna(0).sum().sum()):,}')
-        self.__tc_act_avail .SetValue(f'{int(df[ mask][[f"ConvActual({i})" for i in range(1, 13)]].fillna(0).sum().sum()):,}')
-        self.__tc_act_na    .SetValue(f'{int(df[~mask][[f"ConvActual({i})" for i in range(1, 13)]].fillna(0).sum().sum()):,}')
\ No newline at end of file
+        self.__tc_plan_total.SetValue(f'{summary["plan_total"]:,}')
+        self.__tc_plan_avail.SetValue(f'{summary["plan_avail"]:,}')
+        self.__tc_plan_na   .SetValue(f'{summary["plan_na"]:,}')
+        self.__tc_act_total .SetValue(f'{summary["act_total"]:,}')
+        self.__tc_act_avail .SetValue(f'{summary["act_avail"]:,}')
+        self.__tc_act_na    .SetValue(f'{summary["act_na"]:,}')
\ No newline at end of file
@@ -1,31 +1,25 @@
-import time
-import matplotlib.pyplot as plt
 import numpy as np
-import openpyxl as xl
 import wx
 import wx.dataview as DV
 
 from traceback import format_exc
 from typing import Literal
+from datetime import datetime
 from threading import Thread
 from dataclasses import dataclass
-from matplotlib.backends.backend_wxagg import FigureCanvasWxAgg as FigureCanvas
 from matplotlib.figure import Figure
 from matplotlib.axes import Axes
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Alignment, Border, Side, PatternFill
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from wx.lib.scrolledpanel import ScrolledPanel
 
-from util import simplify_won, COLORMAP, Config
-from db import CostCategory, CostCtr, MAXIMUM_DEPTH_OF_CATEGORY, CostElement, LoadedData
+from util import simplify_won, COLORMAP, Config, ExceptionWithMessage
+from util.chart import draw_horizontal_bar_collection, others_label
+from util.image_cache import ImageCache, fingerprint
+from db import CostCategory, CostCtr, CostElement, LoadedData
+from db.aggregation import build_fact_frame, aggregate_viewer
 from ui.component import TreeListCtrl, TreeListModelBase, TreeListNode, \
     FONT_COLOR_LOW_PORTION, FONT_COLOR_MID_PORTION, FONT_COLOR_HIGH_PORTION, FONT_COLOR_NEGATIVE_VALUE, \
-    OPENAI_MARK_SVG, CLAUDE_MARK_SVG
-from ui.component.ai_analysis import DialogAIResult, DialogModels
-from ai import (
-    _CostCategory, _CostElement, _CostCtr, _BudgetByCtr, _BudgetByElement,
-    get_prompts_for_ai, analyze_by_claude, analyze_by_gpt
-)
+    OPENAI_MARK_SVG, CLAUDE_MARK_SVG, ComputeExecutor, CancelToken, RedrawScheduler
 
 class _Config:
     UNIT = "자동"
@@ -289,10 +283,173 @@ def draw_multiple_bar(ax: Axes, title: str = None, data: dict[str, float] = {}):
     ax.set_xticks(range(len(x_labels)))
     ax.set_xticklabels(x_labels, rotation=45)
 
+@dataclass
+class _ChartView:
+    """DialogChart에 그릴 행. 아래(y=0)부터 위 순서"""
+    mode: Literal["모두", "계획", "실적"]
+    labels: list[str,]
+    values: np.ndarray # 모두: (N, 2) [계획, 실적], 계획/실적: (N,)
+    max_val: float # x축 범위 기준 (보이는 행이 아니라 전체 행 기준)
+    key: str # 내용 fingerprint
+
+class _ChartItems:
+    """DialogChart 항목을 모드별로 미리 정렬해둔 배열
+
+    모드별 정렬 순서(order, 순위 -> 항목 인덱스)는 처음 한 번만 계산하고
+    체크박스 변경은 mask만 바꾸므로 다시 정렬하지 않음
+    같은 조건의 view는 저장해두었다가 모드를 다시 선택하면 그대로 반환함
+    """
+    def __init__(self, items: list['ItemCategory|ItemCtr',]):
+        self.labels = [
+            item.category.name if isinstance(item, ItemCategory) else item.ctr.name
+            for item in items
+        ]
+        self.index = {label: i for i, label in enumerate(self.labels)}
+        self.values = np.array([(item.plan, item.actual) for item in items], dtype=float).reshape(-1, 2)
+        # 값 기준 오름차순 (barh에서는 오름차순이 bottom부터 그려짐)
+        plan_order = np.argsort(np.nan_to_num(self.values[:, 0]), kind="stable")
+        self.orders = {
+            "모두": plan_order, # 계획 기준
+            "계획": plan_order,
+            "실적": np.argsort(np.nan_to_num(self.values[:, 1]), kind="stable"),
+        }
+        self.checked = np.ones(len(items), dtype=bool)
+        self.__views: dict[tuple, _ChartView] = {}
+
+    def set_checked(self, label: str, checked: bool):
+        self.checked[self.index[label]] = checked
+        self.__views.clear()
+
+    def get_view(self, mode: Literal["모두", "계획", "실적"], show_sum: bool, top_n: int | None) -> _ChartView:
+        """
+        Args:
+            show_sum
+                '합계' 행 표시. 합계는 '기타'로 합치기 전의 모든 체크된 항목으로 계산
+            top_n
+                None이 아니면 상위 top_n개만 두고 나머지는 맨 아래 '기타' 행으로 합침
+        """
+        key = (mode, show_sum, top_n)
+        view = self.__views.get(key)
+        if view is None:
+            view = self.__views[key] = self.__make_view(mode, show_sum, top_n)
+        return view
+
+    def __make_view(self, mode: Literal["모두", "계획", "실적"], show_sum: bool, top_n: int | None) -> _ChartView:
+        order = self.orders[mode]
+        rows = order[self.checked[order]] # 체크된 항목만, 정렬 순서 유지
+        values = self.values if mode == "모두" else self.values[:, 0 if mode == "계획" else 1]
+        sort_keys = np.nan_to_num(values[rows, 0] if mode == "모두" else values[rows])
+
+        labels = [self.labels[i] for i in rows]
+        row_values = values[rows]
+        bottom_labels, bottom_values = [], values[:0]
+        if len(rows):
+            total = np.nansum(row_values, axis=0)
+            if top_n is not None and len(rows) > top_n:
+                others = len(rows) - top_n
+                bottom_labels = [others_label(others)]
+                bottom_values = np.nansum(row_values[:others], axis=0)[np.newaxis]
+                labels, row_values, sort_keys = labels[others:], row_values[others:], sort_keys[others:]
+            if show_sum:
+                # 정렬된 위치에 끼워넣음
+                pos = int(np.searchsorted(sort_keys, np.nan_to_num(total[0] if mode == "모두" else total), side="right"))
+                labels.insert(pos, "합계")
+                row_values = np.insert(row_values, pos, total, axis=0)
+        # '기타'는 값과 관계없이 맨 아래
+        labels = bottom_labels + labels
+        row_values = np.concatenate((bottom_values, row_values))
+        max_val = float(np.nanmax(row_values)) if np.isfinite(row_values).any() else 1.0
+        return _ChartView(mode, labels, row_values, max_val, fingerprint(mode, labels, row_values))
+
+def _draw_chart_rows(ax: Axes, view: _ChartView, start: int, stop: int, visible_rows: int):
+    """위에서부터 start ~ stop-1번째 행만 그림. 축 범위는 visible_rows 행 높이로 고정
+    (y는 아래부터 0이므로 위에서 i번째 행의 y는 행 수 - 1 - i)
+    """
+    if not view.labels:
+        ax.set_yticks([])
+        ax.set_xticks([])
+        for spine in ax.spines.values():
+            spine.set_visible(False)
+        ax.text(0.5, 0.5, "데이터 없음", ha="center", va="center")
+        return
+
+    row_count = len(view.labels)
+    stop = min(stop, row_count)
+    y = np.arange(row_count - stop, row_count - start)
+    labels = [view.labels[i] for i in y]
+    if view.mode == "모두":
+        _draw_chart_both(ax, y, labels, view.values[y], view.max_val)
+    else:
+        _draw_chart_single(ax, y, labels, view.values[y], view.max_val)
+
+    # 축의 공통 설정 (테두리 제거, 범위 설정)
+    ax.set_xticks([])
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    # 행 수가 적어도 막대 높이가 같도록 항상 visible_rows 행만큼의 범위를 위에서부터 사용
+    y_top = row_count - 1 - start
+    ax.set_ylim(y_top + 0.5 - visible_rows, y_top + 0.5)
+    ax.set_xlim(0, (view.max_val if view.max_val > 0 else 1) * 1.3)
+
+def _draw_chart_single(ax: Axes, y: np.ndarray, labels: list[str,], values: np.ndarray, max_v: float):
+    draw_horizontal_bar_collection(ax, y, values, height=0.6, facecolor=COLORMAP[0], edgecolor="none")
+
+    ax.set_yticks(y)
+    ax.set_yticklabels(labels)
+
+    # 스타일 적용 (Bold)
+    ax.tick_params(axis='y', labelsize=10, left=False) # left=False로 눈금(tick) 선은 숨김
+    # for label in ax.get_yticklabels():
+    #     label.set_fontweight('bold')
+
+    # 값 텍스트 표시
+    for yi, val in zip(y, values):
+        ax.text(np.nan_to_num(val) + (max_v * 0.01), yi, simplify_won(val), ha='left', va='center')
+
+def _draw_chart_both(ax: Axes, y: np.ndarray, labels: list[str,], values: np.ndarray, max_val: float):
+    plans, actual = values[:, 0], values[:, 1]
+
+    draw_horizontal_bar_collection(ax, y, plans, height=0.6, facecolor=COLORMAP[0], label='계획')
+    draw_horizontal_bar_collection(ax, y, actual, height=0.3, facecolor=COLORMAP[2], label='실적')
+
+    # [핵심 변경 2] ax.text 대신 yticks 사용
+    ax.set_yticks(y)
+    ax.set_yticklabels(labels)
+
+    ax.tick_params(axis='y', labelsize=10, left=False)
+    # for label in ax.get_yticklabels():
+    #     label.set_fontweight('bold')
+
+    for yi, p, a in zip(y, plans, actual):
+        xx = np.nanmax([p, a, 0]) + (max_val * 0.02)
+        text = f"{simplify_won(a)} / {simplify_won(p)}\n"
+        if p > 0:
+            text += f"{a/p*100:0.1f}%"
+        else:
+            text += "-"
+        ax.text(xx, yi, text, ha='left', va='center', fontsize=9)
+
+def _new_chart_figure(width_px: int, height_px: int) -> tuple[Figure, Axes]:
+    """UI와 무관한 Agg figure. 워커 스레드에서도 사용 가능"""
+    fig = Figure(facecolor='white', constrained_layout=True)
+    FigureCanvasAgg(fig)
+    # Agg 버퍼 크기는 bbox 크기를 버림하므로 부동소수 오차로 1px 작아지지 않도록 0.5px 더함
+    fig.set_size_inches((width_px + 0.5) / fig.dpi, (height_px + 0.5) / fig.dpi)
+    return fig, fig.add_subplot(111)
+
+def _render_chart_rows(view: _ChartView, start: int, visible_rows: int, width_px: int, height_px: int) -> bytes:
+    """보이는 행만 Agg로 그려서 RGBA 버퍼 반환 (워커 스레드에서 실행됨)"""
+    fig, ax = _new_chart_figure(width_px, height_px)
+    _draw_chart_rows(ax, view, start, start + visible_rows, visible_rows)
+    fig.canvas.draw()
+    return bytes(fig.canvas.buffer_rgba())
+
 class DialogChart(wx.Dialog):
     # 상수 정의
     BAR_HEIGHT_PX = 60
     VERTICAL_PADDING_PX = 30
+    TOP_N = 30 # 항목이 이보다 많으면 기본으로 상위 항목만 표시
+    SAVE_MAX_HEIGHT_PX = 30000 # 전체 차트 저장 시 이미지 높이 한도 (Agg 렌더러 한도보다 작게)
     
     # ----------------------------------------------------------------------
     # 초기화 및 기본 설정
@@ -305,7 +462,11 @@ class DialogChart(wx.Dialog):
             title=title,
             style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER
         )
-        self.__items = items
+        self.__items = _ChartItems(items)
+        self.__view: _ChartView | None = None
+        self.__first_row = 0 # 화면 맨 위에 보이는 행 (0: 가장 큰 항목)
+        self.__bitmap: wx.Bitmap | None = None
+        self.__render_key = ("dialog_chart", id(self)) # ComputeExecutor key
 
         self.__setup_ui()
         self.__bind_events()
@@ -321,7 +482,7 @@ class DialogChart(wx.Dialog):
         # 1. 좌측 설정 패널
         pn_left = self.__create_left_panel()
         
-        # 2. 우측 차트 패널 (직접 정의한 Canvas 포함)
+        # 2. 우측 차트 패널
         pn_right = self.__create_right_panel()
 
         sz_horz.Add(pn_left, 0, wx.EXPAND)
@@ -334,7 +495,8 @@ class DialogChart(wx.Dialog):
         
     def __create_left_panel(self) -> wx.Panel:
         """좌측 설정 패널과 위젯을 생성하고 저장합니다."""
-        pn_left = wx.Panel(self, style=wx.BORDER_RAISED)
+        # 항목이 많으면 체크박스가 창을 넘으므로 스크롤
+        pn_left = ScrolledPanel(self, style=wx.BORDER_RAISED)
         pn_left.SetMinSize((200, -1))
         
         sz_vert = wx.BoxSizer(wx.VERTICAL)
@@ -354,50 +516,50 @@ class DialogChart(wx.Dialog):
         self.__ck_sum = wx.CheckBox(pn_left, label="합계")
         self.__ck_sum.SetValue(True)
         sz_vert.Add(self.__ck_sum, 0, wx.BOTTOM, 5)
+
+        # 상위 N개 + 기타
+        item_count = len(self.__items.labels)
+        self.__ck_top = wx.CheckBox(pn_left, label="상위 항목만 (나머지 기타)")
+        self.__ck_top.SetValue(item_count > self.TOP_N)
+        self.__sp_top = wx.SpinCtrl(pn_left, min=1, max=max(self.TOP_N, item_count), initial=self.TOP_N)
+        sz_vert.AddMany((
+            (self.__ck_top, 0, wx.BOTTOM, 5),
+            (self.__sp_top, 0, wx.BOTTOM, 15)
+        ))
         
         # 항목별 체크박스
         self.__cks: dict[str, wx.CheckBox] = {}
-        for item in self.__items:
-            # Type Check가 필요한 경우 (ItemCategory/ItemCtr는 외부 정의 타입으로 가정)
-            obj = item.category if isinstance(item, ItemCategory) else item.ctr 
-            ck = wx.CheckBox(pn_left, label=obj.name)
+        for label in self.__items.labels:
+            ck = wx.CheckBox(pn_left, label=label)
             ck.SetValue(True)
             sz_vert.Add(ck, 0, wx.BOTTOM, 5)
-            self.__cks[obj.name] = ck
+            self.__cks[label] = ck
             
         sz_left = wx.BoxSizer(wx.HORIZONTAL)
         sz_left.Add(sz_vert, 1, wx.EXPAND | wx.ALL, 10)
         pn_left.SetSizer(sz_left)
+        pn_left.SetupScrolling(False, True)
         
         return pn_left
 
     def __create_right_panel(self) -> wx.Panel:
-        """Matplotlib Figure와 Canvas를 직접 생성하여 스크롤 윈도우에 배치합니다."""
+        """차트 bitmap을 그릴 패널과 세로 스크롤바를 배치합니다.
+        차트는 보이는 영역 크기로 워커 스레드에서 그려지고, 완성된 bitmap만 이 패널에 그립니다.
+        """
         pn_right = wx.Panel(self)
         pn_right.SetBackgroundColour(wx.WHITE)
 
-        # 스크롤 윈도우 생성
-        self.__scroll = wx.ScrolledWindow(pn_right, style=wx.VSCROLL)
-        self.__scroll.SetScrollRate(0, 10)
-        self.__scroll.AlwaysShowScrollbars(False, True)
+        self.__pn_chart = wx.Panel(pn_right)
+        self.__pn_chart.SetBackgroundStyle(wx.BG_STYLE_PAINT)
+        self.__pn_chart.SetMinSize((50, 50))
 
-        # 1. Figure 생성 (배경 흰색)
-        self.fig = Figure(facecolor='white', constrained_layout=True) # 초기 사이즈는 임의 설정
-        
-        # 2. Axes 추가
-        self.ax = self.fig.add_subplot(111)
-        
-        # 3. Canvas 생성 (ScrollWindow를 부모로)
-        self.__canvas = FigureCanvas(self.__scroll, -1, self.fig)
-
-        # 스크롤 패널의 Sizer 설정
-        s_scroll = wx.BoxSizer(wx.VERTICAL)
-        s_scroll.Add(self.__canvas, 0, wx.EXPAND) # 0으로 설정하여 Sizer가 늘리지 않게 함 (직접 크기 지정 예정)
-        self.__scroll.SetSizer(s_scroll)
+        # 세로 스크롤바 (단위: 행)
+        self.__scroll = wx.ScrollBar(pn_right, style=wx.SB_VERTICAL)
 
         # 우측 패널 전체 Sizer
         sz_right = wx.BoxSizer(wx.HORIZONTAL)
-        sz_right.Add(self.__scroll, 1, wx.EXPAND | wx.ALL, 15)
+        sz_right.Add(self.__pn_chart, 1, wx.EXPAND | wx.TOP | wx.BOTTOM | wx.LEFT, 15)
+        sz_right.Add(self.__scroll, 0, wx.EXPAND | wx.TOP | wx.BOTTOM | wx.RIGHT, 15)
         pn_right.SetSizer(sz_right)
         
         return pn_right
@@ -413,25 +575,53 @@ class DialogChart(wx.Dialog):
             
         # 체크박스 이벤트 (합계 및 항목)
         self.__ck_sum.Bind(wx.EVT_CHECKBOX, self.__on_control_changed)
+        self.__ck_top.Bind(wx.EVT_CHECKBOX, self.__on_control_changed)
+        self.__sp_top.Bind(wx.EVT_SPINCTRL, self.__on_control_changed)
         for ck in self.__cks.values():
-            ck.Bind(wx.EVT_CHECKBOX, self.__on_control_changed)
+            ck.Bind(wx.EVT_CHECKBOX, self.__on_item_checked)
 
-        self.__canvas.Bind(wx.EVT_RIGHT_DOWN, self.__on_right_click)
-        self.Bind(wx.EVT_SIZE, self.__on_resize)
+        self.__scroll.Bind(wx.EVT_SCROLL, self.__on_scroll)
+        self.__pn_chart.Bind(wx.EVT_PAINT, self.__on_paint)
+        self.__pn_chart.Bind(wx.EVT_MOUSEWHEEL, self.__on_mouse_wheel)
+        self.__pn_chart.Bind(wx.EVT_RIGHT_DOWN, self.__on_right_click)
+        self.__pn_chart.Bind(wx.EVT_SIZE, self.__on_resize)
         self.Bind(wx.EVT_WINDOW_DESTROY, self.__on_destroy)
+        # 크기 변경, 스크롤이 연속으로 들어와도 한 번만 그림
+        RedrawScheduler.register(self.__render_key, self.__pn_chart, self.__draw_viewport)
     
     def __on_control_changed(self, event):
         """라디오 버튼이나 체크박스 상태가 변경될 때 차트를 다시 그립니다."""
         self.draw()
 
+    def __on_item_checked(self, event):
+        ck: wx.CheckBox = event.GetEventObject()
+        self.__items.set_checked(ck.GetLabel(), ck.GetValue())
+        self.draw()
+
     def __on_destroy(self, event):
-        plt.close(self.fig)
+        if event.GetEventObject() is self:
+            ComputeExecutor.cancel(self.__render_key)
         event.Skip()
 
+    def __on_paint(self, event):
+        dc = wx.AutoBufferedPaintDC(self.__pn_chart)
+        dc.SetBackground(wx.WHITE_BRUSH)
+        dc.Clear()
+        if self.__bitmap is not None:
+            dc.DrawBitmap(self.__bitmap, 0, 0)
+
     def __on_resize(self, event):
-        if self.__data_to_draw:
-            self.__update_canvas_size()
         event.Skip()
+        RedrawScheduler.request(self.__render_key)
+
+    def __on_scroll(self, event):
+        self.__first_row = self.__scroll.GetThumbPosition()
+        RedrawScheduler.request(self.__render_key)
+
+    def __on_mouse_wheel(self, event):
+        rows = -event.GetWheelRotation() // max(1, event.GetWheelDelta()) * event.GetLinesPerAction()
+        self.__first_row += rows
+        RedrawScheduler.request(self.__render_key)
 
     def __on_right_click(self, event):
         menu = wx.Menu()
@@ -445,177 +635,79 @@ class DialogChart(wx.Dialog):
         res = dlg.ShowModal()
         filepath = dlg.GetPath()
         dlg.Destroy()
-        if res != wx.ID_OK:
+        if res != wx.ID_OK or self.__view is None:
             return
-        self.fig.savefig(filepath, dpi=300)
+        with wx.BusyCursor():
+            self.__save_full_chart(filepath)
         wx.MessageBox("이미지를 저장하였습니다.", "안내", wx.OK|wx.ICON_INFORMATION)
 
+    def __save_full_chart(self, filepath: str):
+        """화면에 보이는 부분이 아니라 모든 행을 한 이미지로 저장"""
+        row_count = len(self.__view.labels)
+        height_px = max(1, row_count) * self.BAR_HEIGHT_PX + self.VERTICAL_PADDING_PX
+        width_px = max(self.__pn_chart.GetClientSize().width, 600)
+        fig, ax = _new_chart_figure(width_px, height_px)
+        _draw_chart_rows(ax, self.__view, 0, row_count, row_count)
+        fig.savefig(filepath, dpi=min(300, self.SAVE_MAX_HEIGHT_PX * fig.dpi / height_px))
+
     # ----------------------------------------------------------------------
     # 차트 드로잉 및 크기 조정
     # ----------------------------------------------------------------------
 
     def draw(self):
-        """현재 UI 상태에 따라 적절한 차트 드로잉 메서드를 호출합니다."""
-        self.ax.clear()
-
+        """현재 UI 상태의 view로 바꾸고 맨 위부터 다시 그립니다."""
         if self.__rb_both.GetValue():
-            self.__draw_both()
+            mode = "모두"
         elif self.__rb_actual.GetValue():
-            self.__draw_single(True) # 실적
+            mode = "실적"
         else:
-            self.__draw_single(False) # 계획
-            
-        self.__update_canvas_size()
-        self.__canvas.draw()
-
-    def __update_canvas_size(self):
+            mode = "계획"
+        top_n = self.__sp_top.GetValue() if self.__ck_top.GetValue() else None
+        self.__view = self.__items.get_view(mode, self.__ck_sum.GetValue(), top_n)
+        self.__first_row = 0
+        self.__draw_viewport()
+
+    def __get_visible_rows(self) -> int:
+        """차트 패널 높이에 들어가는 행 수"""
+        height_px = self.__pn_chart.GetClientSize().height
+        return max(1, (height_px - self.VERTICAL_PADDING_PX) // self.BAR_HEIGHT_PX)
+
+    def __draw_viewport(self):
+        """스크롤 위치에서 보이는 행을 워커 스레드에서 그리도록 요청
+        같은 view, 스크롤 위치와 크기로 그린 적이 있으면 캐시된 bitmap을 바로 사용
         """
-        데이터 개수에 따라 높이(픽셀)만 계산해서 Figure에 할당합니다.
-        좌우 여백은 'constrained layout'이 알아서 처리합니다.
-        """
-        row_count = len(self.__data_to_draw)
-        
-        if row_count == 0:
-            total_height_px = 200
-        else:
-            # 여백 계산을 단순화 (상하 패딩 정도만 추가)
-            total_height_px = (row_count * self.BAR_HEIGHT_PX) + self.VERTICAL_PADDING_PX
-
-        # 스크롤 윈도우의 현재 너비
-        width_px = self.__scroll.GetClientSize().width
-        if width_px < 50: width_px = 600
-
-        dpi = self.fig.get_dpi()
-        
-        # Figure 사이즈 적용 (inch)
-        self.fig.set_size_inches(width_px / dpi, total_height_px / dpi, forward=True)
-        
-        # Canvas 위젯 MinSize 적용
-        self.__canvas.SetMinSize((width_px, int(total_height_px)))
-        self.__scroll.FitInside()
-
-    def __get_filtered_sorted_data(self, mode: Literal["모두", "계획", "실적"]) -> dict[str, tuple[float, float] | float]:
-        data = {}
-        for item in self.__items:
-            # 항목명 추출
-            label = item.category.name if isinstance(item, ItemCategory) else item.ctr.name
-            
-            # 체크되지 않은 항목은 제외
-            if not self.__cks[label].GetValue():
-                continue
-            
-            match mode:
-                case "모두":
-                    data[label] = (item.plan, item.actual)
-                case "계획":
-                    data[label] = item.plan
-                case "실적":
-                    data[label] = item.actual
-
-        # 합계 옵션 처리
-        if data:
-            if mode == "모두":
-                if self.__ck_sum.GetValue():
-                    # (계획, 실적)의 합계
-                    plans = [v[0] for v in data.values()]
-                    actuals = [v[1] for v in data.values()]
-                    s = (np.nansum(plans), np.nansum(actuals))
-                    data = {"합계": s, **data}
-                # 정렬 (계획 기준 오름차순) -> barh에서는 오름차순이 bottom부터 그려짐
-                data = dict(sorted(data.items(), key=lambda kv: kv[1][0]))
-            else:
-                if self.__ck_sum.GetValue():
-                    # 단일 값의 합계
-                    data["합계"] = np.nansum(list(data.values()))
-                # 정렬 (값 기준 오름차순)
-                data = dict(sorted(data.items(), key=lambda kv: kv[1]))
-                
-        # 리팩토링된 draw()에서 사용할 수 있도록 데이터를 저장
-        self.__data_to_draw = data
-        return data
-
-    def __draw_single(self, actual: bool):
-        data = self.__get_filtered_sorted_data("실적" if actual else "계획")
-        
-        if not data:
-            self.ax.set_yticks([])
-            self.ax.set_xticks([])
-            for spine in self.ax.spines.values():
-                spine.set_visible(False)
-            self.ax.text(0.5, 0.5, "데이터 없음", ha="center", va="center")
+        view = self.__view
+        if view is None:
             return
-            
-        labels = list(data.keys())
-        values = list(data.values())
-        y = np.arange(len(labels))
-
-        self.ax.barh(y, values, height=0.6, color=COLORMAP[0], edgecolor="none")
-        
-        self.ax.set_yticks(y)
-        self.ax.set_yticklabels(labels)
-        
-        # 스타일 적용 (Bold)
-        self.ax.tick_params(axis='y', labelsize=10, left=False) # left=False로 눈금(tick) 선은 숨김
-        # for label in self.ax.get_yticklabels():
-        #     label.set_fontweight('bold')
-
-        # 값 텍스트 표시
-        max_v = max(values) if values else 1
-        for yi, val in enumerate(values):
-            self.ax.text(val + (max_v * 0.01), yi, simplify_won(val), ha='left', va='center')
-
-        self.__finalize_axes(len(labels), max_v)
-
-    def __draw_both(self):
-        data = self.__get_filtered_sorted_data("모두")
-        
-        if not data:
-            self.ax.set_yticks([])
-            self.ax.set_xticks([])
-            for spine in self.ax.spines.values():
-                spine.set_visible(False)
-            self.ax.text(0.5, 0.5, "데이터 없음", ha="center", va="center")
+        row_count = len(view.labels)
+        visible_rows = self.__get_visible_rows()
+        first_row = self.__first_row = max(0, min(self.__first_row, row_count - visible_rows))
+        self.__scroll.SetScrollbar(first_row, visible_rows, max(row_count, visible_rows), visible_rows)
+        self.__scroll.Enable(row_count > visible_rows)
+
+        width_px, height_px = self.__pn_chart.GetClientSize()
+        if width_px < 10 or height_px < 10:
+            return
+        key = ("rgba", "dialog_chart", view.key, first_row, visible_rows, width_px, height_px)
+        data = ImageCache.get(key)
+        if data is not None:
+            # 진행 중인 이전 렌더링 결과가 덮어쓰지 않도록 취소
+            ComputeExecutor.cancel(self.__render_key)
+            self.__show_bitmap(width_px, height_px, data)
             return
 
-        labels = list(data.keys())
-        plans  = [v[0] for v in data.values()]
-        actual = [v[1] for v in data.values()]
-        
-        y = np.arange(len(labels))
-
-        self.ax.barh(y, plans,  height=0.6, color=COLORMAP[0], label='계획')
-        self.ax.barh(y, actual, height=0.3, color=COLORMAP[2], label='실적')
+        def work(token: CancelToken) -> bytes:
+            return _render_chart_rows(view, first_row, visible_rows, width_px, height_px)
 
-        # [핵심 변경 2] ax.text 대신 yticks 사용
-        self.ax.set_yticks(y)
-        self.ax.set_yticklabels(labels)
-        
-        self.ax.tick_params(axis='y', labelsize=10, left=False)
-        # for label in self.ax.get_yticklabels():
-        #     label.set_fontweight('bold')
-
-        max_val = max(plans + actual) if plans + actual else 1
-        
-        for yi, (p, a) in enumerate(zip(plans, actual)):
-            xx = max(p, a) + (max_val * 0.02)
-            text = f"{simplify_won(a)} / {simplify_won(p)}\n"
-            if p > 0:
-                text += f"{a/p*100:0.1f}%"
-            else:
-                text += "-"
-            self.ax.text(xx, yi, text, ha='left', va='center', fontsize=9)
+        def on_done(data: bytes):
+            ImageCache.put(key, data)
+            self.__show_bitmap(width_px, height_px, data)
 
-        self.__finalize_axes(len(labels), max_val)
+        ComputeExecutor.submit(self.__render_key, work, on_done, owner=self)
 
-    def __finalize_axes(self, item_count, max_val):
-        """축의 공통 설정 (테두리 제거, 범위 설정)"""
-        self.ax.set_xticks([])
-        
-        for spine in self.ax.spines.values():
-            spine.set_visible(False)
-            
-        self.ax.set_ylim(-0.5, item_count - 0.5)
-        self.ax.set_xlim(0, max_val * 1.3)
+    def __show_bitmap(self, width_px: int, height_px: int, data: bytes):
+        self.__bitmap = wx.Bitmap.FromBufferRGBA(width_px, height_px, data)
+        self.__pn_chart.Refresh(False)
 
 class PanelViewer(wx.Panel):
     def __init__(self, parent: wx.Panel):
@@ -750,6 +842,8 @@ class PanelViewer(wx.Panel):
         self.__menu_ctr_excel = self.__popup_menu_ctr.Append(wx.ID_ANY, "엑셀로 저장")
 
     def __bind_events(self):
+        RedrawScheduler.register((id(self), "update_values"), self, self.__update_values)
+        RedrawScheduler.register((id(self), "refresh"), self, self.Refresh)
         self.__cb_period.Bind(wx.EVT_COMBOBOX, self.__on_period)
         self.__cb_unit  .Bind(wx.EVT_COMBOBOX, self.__on_unit  )
         self.__tr_category.Bind(DV.EVT_DATAVIEW_ITEM_CONTEXT_MENU, self.__on_right_click_category)
@@ -775,7 +869,7 @@ class PanelViewer(wx.Panel):
 
     def __on_unit(self, event):
         _Config.UNIT = self.__cb_unit.GetValue()
-        self.Refresh()
+        RedrawScheduler.request((id(self), "refresh"))
 
     def __on_right_click_category(self, event):
         item = event.GetItem()
@@ -838,146 +932,49 @@ class PanelViewer(wx.Panel):
         ret = dlg.ShowModal()
         filepath = dlg.GetPath()
         dlg.Destroy()
-        selected_item = tree.model.get_view_item(node)
         if ret != wx.ID_OK \
-            or not selected_item.IsOk():
+            or node is None:
             return
-        
-        def get_value_of_node_category(n: TreeListNode, column: int):
-            item: ItemCategory = n.item
-            match column:
-                case 0:
-                    return item.category.name
-                case 1:
-                    return item.plan
-                case 2:
-                    return item.actual
-                case 3:
-                    return item.rem
-                case 4:
-                    return item.exe
-
-        def get_value_of_node_ctr(n: TreeListNode, column: int):
-            item: ItemCtr = n.item
-            match column:
-                case 0:
-                    return item.ctr.name
-                case 1:
-                    return "" if item.total else item.ctr.code
-                case 2:
-                    return "" if item.total else item.ctr.rnd
-                case 3:
-                    return "" if item.total else item.ctr.oe
-                case 4:
-                    return item.plan
-                case 5:
-                    return item.actual
-                case 6:
-                    return item.rem
-                case 7:
-                    return item.exe
-        
-        get_method = get_value_of_node_category if isinstance(node.item, ItemCategory) else get_value_of_node_ctr
 
-        result = []
-        def work():
-            try:
-                wb = xl.Workbook()
-                ws = wb.worksheets[0]
-
-                # ---- (1) 헤더 작성 ----
-                col_count = tree.GetColumnCount()
-                headers = [tree.GetColumn(i).GetTitle() for i in range(col_count)]
-                ws.append(headers)
-
-                # --- (2) 트리 재귀 순회 함수 정의 ---
-                def traverse(item: DV.DataViewItem, depth: int):
-                    """
-                    node: 현재 DataViewItem
-                    depth: 트리 깊이 (시작 item을 0으로)
-                    """
-                    node_id = int(item.GetID())
-                    node = tree.model.nodes[node_id]
-
-                    # (2-1) 현재 노드 한 줄 쓰기
-                    row = []
-                    for col in range(col_count):
-                        # 첫 번째 컬럼에만 indent 적용
-                        if col == 0:
-                            indent_str = " " * (depth * 2)   # depth당 4칸 공백
-                            row.append(f"{indent_str}{get_method(node, col)}")
-                        else:
-                            row.append(get_method(node, col))
-
-                    ws.append(row)
-
-                    # (2-2) 자식 노드 순회
-                    # PyDataViewModel: GetChildren(self, item, children)
-                    # DataViewTreeStore: GetChildren(self, item) -> list
-                    children = []
-                    count = tree.model.GetChildren(item, children)  # children 리스트를 채워주는 형태
-                    iterable = children[:count]
-
-                    for child in iterable:
-                        if isinstance(child, DV.DataViewItem):
-                            traverse(child, depth + 1)
-
-                # --- (3) 시작 item 이하 전체 순회 ---
-                traverse(selected_item, depth=0)
-
-                # --- (A) column width 설정 (DataViewCtrl의 실제 폭 기준 비례 적용) ---
-                # DataViewCtrl column width는 px 단위, Excel은 약 1 = 7px 정도라고 보면 됨
-                for i in range(col_count):
-                    dv_width = tree.GetColumn(i).GetWidth()    # pixel
-                    excel_width = dv_width * 0.15             # 적절한 비율 (조정 가능)
-                    col_letter = get_column_letter(i + 1)
-                    ws.column_dimensions[col_letter].width = excel_width
-
-                # --- (B) 중앙 정렬 및 테두리 ---
-                thin = Side(border_style="thin", color="000000")
-                border = Border(left=thin, right=thin, top=thin, bottom=thin)
-                center = Alignment(horizontal="center", vertical="center")
-
-                max_row = ws.max_row
-                max_col = ws.max_column
-
-                for r in range(1, max_row + 1):
-                    for c in range(1, max_col + 1):
-                        cell = ws.cell(row=r, column=c)
-                        cell.border = border
-                        if r == 1 or c != 1:
-                            cell.alignment = center
-
-                # --- (C) 헤더 배경색 ---
-                header_fill = PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
-                for c in range(1, max_col + 1):
-                    ws.cell(row=1, column=c).fill = header_fill
-
-                wb.save(filepath)
-                wb.close()
+        def get_row_of_category(item: ItemCategory) -> tuple:
+            return (item.category.name, item.plan, item.actual, item.rem, item.exe)
 
-            except Exception as err:
-                result.append(err)
+        def get_row_of_ctr(item: ItemCtr) -> tuple:
+            if item.total:
+                return (item.ctr.name, "", "", "", item.plan, item.actual, item.rem, item.exe)
+            return (item.ctr.name, item.ctr.code, item.ctr.rnd, item.ctr.oe, item.plan, item.actual, item.rem, item.exe)
+
+        get_row = get_row_of_category if isinstance(node.item, ItemCategory) else get_row_of_ctr
+
+        # 위젯 대신 노드에 반영된 집계 값으로 행 목록을 만든 뒤 워커 스레드에서 저장
+        col_count = tree.GetColumnCount()
+        headers = [tree.GetColumn(i).GetTitle() for i in range(col_count)]
+        # DataViewCtrl column width는 px 단위, Excel은 약 1 = 7px 정도라고 보면 됨
+        widths = [tree.GetColumn(i).GetWidth()*0.15 for i in range(col_count)]
+        rows = []
+        stack = [(node, 0)]
+        while stack:
+            n, depth = stack.pop()
+            row = get_row(n.item)
+            rows.append((f"{' '*(depth*2)}{row[0]}",) + row[1:]) # 첫 번째 컬럼에만 indent 적용
+            stack.extend((child, depth+1) for child in reversed(n.children))
+
+        dlgp = wx.ProgressDialog("안내", "엑셀 파일을 생성 중입니다.", parent=self)
+        dlgp.Pulse()
 
-            else:
-                result.append(None)
-        
-        dlg = wx.ProgressDialog("안내", "엑셀 파일을 생성 중입니다.", parent=self)
-        dlg.Pulse()
-        Thread(target=work, daemon=True).start()
-        while not result:
-            wx.YieldIfNeeded()
-            time.sleep(0.01)
-        ret = result.pop(0)
-        dlg.Destroy()
+        def work(token: CancelToken) -> int:
+            from util.excel import write_xlsx # openpyxl은 처음 사용할 때 import
+            return write_xlsx(filepath, headers, rows, widths)
 
-        def done():
-            if ret is None:
-                wx.MessageBox("엑셀 저장을 완료했습니다.", "안내", parent=self)
-            else:
-                wx.MessageBox(f"엑셀 저장 도중 오류가 발생했습니다.\n{ret}", "안내", parent=self)
-            tree.Refresh()
-        wx.CallAfter(done)
+        def on_done(count: int):
+            dlgp.Destroy()
+            wx.MessageBox("엑셀 저장을 완료했습니다.", "안내", parent=self)
+
+        def on_fail(msg: str):
+            dlgp.Destroy()
+            wx.MessageBox(f"엑셀 저장 도중 오류가 발생했습니다.\n{msg}", "안내", parent=self)
+
+        ComputeExecutor.submit((id(self), "save_excel"), work, on_done, on_fail, owner=self)
 
     def __on_category_up(self, event):
         tr = self.__tr_category
@@ -1060,6 +1057,8 @@ class PanelViewer(wx.Panel):
         self.__on_ai("Claude")
 
     def __on_ai(self, ai_type: Literal["ChatGPT", "Claude"]):
+        # AI 관련 모듈은 시작 시간에 영향이 커서 처음 사용할 때 import
+        from ui.component.ai_analysis import DialogAIResult, DialogModels
         if LoadedData.df.empty:
             wx.MessageBox("분석할 데이터가 없습니다.\n먼저 데이터를 로드하세요.", "안내", parent=self)
             return
@@ -1075,49 +1074,36 @@ class PanelViewer(wx.Panel):
                 if not key:
                     wx.MessageBox("OpenAI API Key를 설정하세요.", "안내", parent=self)
                     return
-                dlg = DialogModels(self, Config.GPT_MODELS, Config.LAST_USED_GPT_MODEL)
+                dlg = DialogModels(self, Config.GPT_MODELS, Config.LAST_USED_GPT_MODEL, Config.AI_DELTA)
                 ret = dlg.ShowModal()
                 model = dlg.get_model()
+                delta = dlg.get_delta()
                 dlg.Destroy()
                 if ret != wx.ID_OK:
                     return
                 Config.LAST_USED_GPT_MODEL = model
-                analyze = analyze_by_gpt
             case "Claude":
                 key = Config.CLAUDE_API_KEY
                 if not key:
                     wx.MessageBox("Claude API Key를 설정하세요.", "안내")
                     return
-                dlg = DialogModels(self, Config.CLAUDE_MODELS, Config.LAST_USED_CLAUDE_MODEL)
+                dlg = DialogModels(self, Config.CLAUDE_MODELS, Config.LAST_USED_CLAUDE_MODEL, Config.AI_DELTA)
                 ret = dlg.ShowModal()
                 model = dlg.get_model()
+                delta = dlg.get_delta()
                 dlg.Destroy()
                 if ret != wx.ID_OK:
                     return
                 Config.LAST_USED_CLAUDE_MODEL = model
-                analyze = analyze_by_claude
             case _:
                 raise RuntimeError
+        Config.AI_DELTA = delta
         
-        dlgp = wx.ProgressDialog("안내", f"{ai_type}을 이용하여 분석 중입니다.", parent=self)
-        dlgp.Pulse()
-
-        def on_success(json_data: str, result: str):
-            dlgp.Destroy()
-            wx.Yield()
-            dlg = DialogAIResult(self, ai_type, model, json_data, result)
-            wx.MessageBox("분석을 완료했습니다.", "안내", parent=self)
-            wx.Yield()
-            dlg.ShowModal()
-            dlg.Destroy()
-        
-        def on_fail(msg: str):
-            dlgp.Destroy()
-            wx.Yield()
-            wx.MessageBox(msg, "안내", parent=self)
-
-        def work():
+        def work(dlg: DialogAIResult, refresh: bool):
+            cancel_event = dlg.cancel_event
             try:
+                # AI SDK는 UI가 멈추지 않도록 워커 스레드에서 로드
+                from ai.scope import analyze_scope
                 ctrs = ctr.get_descendant()
                 ctr_codes = set([c.code for c in ctrs])
 
@@ -1133,97 +1119,40 @@ class PanelViewer(wx.Panel):
                 #     elements = CostElement.get_involved_in_categories(list(CostCategory.get_all().values()))
                 # element_codes = set([elem.code for elem in elements])
 
-                filtered_df = LoadedData.df.loc[
-                    LoadedData.df["Cost Center"].isin(ctr_codes) \
-                    & LoadedData.df["Cost Element"].isin(element_codes)
-                ]
-
-                assert not filtered_df.empty, "분석할 데이터가 없습니다."
-
-                months = Config.get_months()
-                # all_categories = CostCategory.get_all()
-                all_elements = CostElement.get_all()
-                all_ctrs = CostCtr.get_all()
-
-                category_list = [
-                    _CostCategory(
-                        pk=cat.pk,
-                        parent_pk=cat.parent_pk,
-                        name=cat.name
-                    ) for cat in category_descendant
-                ]
-                element_list = [
-                    _CostElement(
-                        code=elem.code,
-                        description=elem.description,
-                        category_pk=elem.category_pk
-                    ) for elem in all_elements.values() if elem.code in element_codes
-                ]
-                ctr_list = [
-                    _CostCtr(
-                        code=ctr.code,
-                        parent_code=ctr.parent_code,
-                        name=ctr.name,
-                        rnd=["Research", "Develop"].index(ctr.rnd),
-                        oe=["공통비", "RE", "OE"].index(ctr.oe)
-                    ) for ctr in all_ctrs.values()
-                ]
-
-                df = filtered_df.fillna(0)
-                cols = {name: i for i, name in enumerate(df.columns)}
-                by_elem_code = {}
-                by_ctr_code = {}
-                for row in df.itertuples(index=False, name=None):
-                    ctr_code = row[cols["Cost Center"]]
-                    elem_code = row[cols["Cost Element"]]
-                    if ctr_code not in ctr_codes \
-                        or elem_code not in all_elements:
-                        continue
-                    if elem_code not in by_elem_code:
-                        by_elem_code[elem_code] = {"code": elem_code, "planned": 0, "executed": 0}
-                    if ctr_code not in by_ctr_code:
-                        by_ctr_code[ctr_code] = {"code": ctr_code, "planned": 0, "executed": 0}
-                    for month in months:
-                        planned = row[cols[f"ConvPlan({month})"]]
-                        executed = row[cols[f"ConvActual({month})"]]
-                        by_elem_code[elem_code]["planned"] += planned
-                        by_elem_code[elem_code]["executed"] += executed
-                        by_ctr_code[ctr_code]["planned"] += planned
-                        by_ctr_code[ctr_code]["executed"] += executed
-
-                system_prompt, user_prompt, json_data = get_prompts_for_ai(
-                    category_list,
-                    element_list,
-                    ctr_list,
-                    [
-                        _BudgetByElement(
-                            cost_element_code=item["code"],
-                            planned=item["planned"],
-                            executed=item["executed"]
-                        ) for item in by_elem_code.values()
-                    ],
-                    [
-                        _BudgetByCtr(
-                            cost_ctr_code=item["code"],
-                            planned=item["planned"],
-                            executed=item["executed"]
-                        ) for item in by_ctr_code.values()
-                    ]
+                # 항목이 많으면 나눠서 분석한 뒤 종합. '새로 분석'은 변경분이 아닌 전체를 다시 분석
+                res, cached_at = analyze_scope(
+                    ai_type, key, model, Config.get_months(), ctr_codes, element_codes, category_descendant,
+                    refresh=refresh,
+                    delta=delta and not refresh,
+                    on_data=lambda json_data, tokens: wx.CallAfter(dlg.set_data, json_data, tokens),
+                    on_progress=lambda done, total: wx.CallAfter(
+                        dlg.set_status, f"나눠서 분석하는 중입니다... ({done}/{total})"
+                    ),
+                    on_chunk=lambda text: wx.CallAfter(dlg.append_result, text),
+                    cancel_event=cancel_event
                 )
 
-                res = analyze(system_prompt, user_prompt, key, model)
-
             except Exception as err:
-                if isinstance(err, AssertionError):
+                if isinstance(err, ExceptionWithMessage):
                     msg = str(err)
                 else:
                     msg = f"AI 분석 중 오류가 발생했습니니다.\n\n{format_exc()}"
-                wx.CallAfter(on_fail, msg)
+                wx.CallAfter(dlg.fail, msg)
             
             else:
-                wx.CallAfter(on_success, json_data, res)
-
-        Thread(target=work, daemon=True).start()
+                wx.CallAfter(dlg.finish, res, cached_at)
+
+        # 결과 창을 먼저 띄우고 받는 대로 표시. '새로 분석'이면 캐시를 무시하고 다시 요청
+        refresh = False
+        while True:
+            dlg = DialogAIResult(self, ai_type, model)
+            Thread(target=work, args=(dlg, refresh), daemon=True).start()
+            ret = dlg.ShowModal()
+            dlg.cancel_event.set()
+            dlg.Destroy()
+            if ret != wx.ID_REFRESH:
+                break
+            refresh = True
 
     def redraw_trees(self):
         """노드를 초기화 후 재생성"""
@@ -1259,111 +1188,65 @@ class PanelViewer(wx.Panel):
             )
 
     def update_values(self):
-        """노드는 유치한 체로 plan과 actual 값을 재계산"""
+        """값 재계산 예약. 연속 호출은 합쳐지며 화면에 보일 때 계산됨"""
+        RedrawScheduler.request((id(self), "update_values"))
+
+    def __update_values(self):
+        """노드는 유치한 체로 plan과 actual 값을 재계산
+        집계는 워커 스레드에서 수행하며 연속으로 호출되면 마지막 요청의 결과만 반영됨
+        """
         if not self.__category_filter:
             self.__category_filter = CostCategory.get_root_category(False)
         if not self.__ctr_filter:
             self.__ctr_filter = CostCtr.get_root_ctr()
         self.__tc_category_filter.SetValue(" > ".join([cat.name for cat in self.__category_filter.get_path()]))
         self.__tc_ctr_filter.SetValue(" > ".join([ctr.name for ctr in self.__ctr_filter.get_path()]))
-        df = LoadedData.get_filtered_df()
-        category_descendant = self.__category_filter.get_descendant()
-        elements = CostElement.get_involved_in_categories(category_descendant)
-        element_codes = [elem.code for elem in elements]
-        ctr_descendant = self.__ctr_filter.get_descendant()
-        ctr_codes = [ctr.code for ctr in ctr_descendant]
-        mask_element = df["Cost Element"].isin(element_codes)
-        mask_ctr = df["Cost Center"].isin(ctr_codes)
-        period = self.__cb_period.GetValue()
-        match period:
-            case "전체":
-                months = list(range(1, 13))
-            case "1Q":
-                months = [1, 2, 3]
-            case "2Q":
-                months = [4, 5, 6]
-            case "3Q":
-                months = [7, 8, 9]
-            case "4Q":
-                months = [10, 11, 12]
-            case _:
-                months = [int(period[:-1]),]
-        cols_plan = [f"ConvPlan({i})" for i in months]
-        cols_actual = [f"ConvActual({i})" for i in months]
+        df = LoadedData.df
+        category_filter = self.__category_filter
+        ctr_filter = self.__ctr_filter
+        months = Config.get_months(self.__cb_period.GetValue())
+
+        def work(token: CancelToken):
+            category_descendant = category_filter.get_descendant()
+            elements = CostElement.get_involved_in_categories(category_descendant)
+            element_codes = [elem.code for elem in elements]
+            ctr_codes = [ctr.code for ctr in ctr_filter.get_descendant()]
+            token.raise_if_cancelled()
+            fact = build_fact_frame(LoadedData.get_filtered_df(df))
+            token.raise_if_cancelled()
+            return aggregate_viewer(fact, months, ctr_codes, element_codes)
+
+        ComputeExecutor.submit((id(self), "update_values"), work, self.__apply_values, owner=self)
+
+    @staticmethod
+    def __set_amounts(item: ItemCategory|ItemCtr, plan: float|None, actual: float|None):
+        item.plan   = plan  
+        item.actual = actual
+        if plan is None:
+            item.rem = None
+            item.exe = None
+        elif actual is None:
+            item.rem = plan
+            item.exe = None
+        else:
+            item.rem = plan-actual
+            item.exe = None
+            if plan:
+                item.exe = actual/plan
+
+    def __apply_values(self, result: tuple[dict, dict]):
+        pk_vs_amounts, code_vs_amounts = result
 
         tr = self.__tr_category
-        pk_vs_amounts = {}
         for nid, node in tr.model.nodes.items():
             item: ItemCategory = node.item
             if item is None:
                 continue
-            category: CostCategory = item.category
-            level = LoadedData.get_level_of_category_from_cache(category)
-            if level < MAXIMUM_DEPTH_OF_CATEGORY:
-                if category.pk not in pk_vs_amounts:
-                    pk_vs_amounts[category.pk] = {"plan": 0, "actual": 0}
-                continue
-            element_codes_of_category = [
-                elem_code 
-                for elem_code, elem in LoadedData.cached_cost_element.items()
-                if elem.category_pk == category.pk
-            ]
-            mask = (df["Cost Element"].isin(element_codes_of_category)) & (mask_ctr)
-            plan = df[mask][cols_plan].fillna(0).sum().sum()
-            actual = df[mask][cols_actual].fillna(0).sum().sum()
-            pk_vs_amounts[category.pk] = {"plan": plan, "actual": actual}
-            parent_pk = category.parent_pk
-            while parent_pk is not None:
-                pk_vs_amounts[parent_pk]["plan"] += plan
-                pk_vs_amounts[parent_pk]["actual"] += actual
-                parent_pk = LoadedData.cached_cost_category[parent_pk].parent_pk
-        for nid, node in tr.model.nodes.items():
-            item: ItemCategory = node.item
-            if item is None:
-                continue
-            category = item.category
-            plan   = pk_vs_amounts[category.pk]["plan"]
-            actual = pk_vs_amounts[category.pk]["actual"]
-            item.plan   = plan  
-            item.actual = actual
-            if plan is None:
-                item.rem = None
-                item.exe = None
-            elif actual is None:
-                item.rem = plan
-                item.exe = None
-            else:
-                item.rem = plan-actual
-                item.exe = None
-                if plan:
-                    item.exe = actual/plan
+            plan, actual = pk_vs_amounts.get(item.category.pk, (0, 0))
+            self.__set_amounts(item, plan, actual)
             tr.update_node(node)
 
         tr = self.__tr_ctr
-        code_vs_amounts = {}
-        for nid, node in tr.model.nodes.items():
-            item: ItemCtr = node.item
-            if item is None:
-                continue
-            ctr: CostCtr = item.ctr
-            if item.total:
-                code_vs_amounts[f"TOTAL-{ctr.code}"] = {"plan": 0, "actual": 0}
-                continue
-            mask = (df["Cost Center"] == ctr.code) & (mask_element)
-            plan = int(df[mask][cols_plan].fillna(0).sum().sum())
-            actual = int(df[mask][cols_actual].fillna(0).sum().sum())
-            code_vs_amounts[ctr.code] = {"plan": plan, "actual": actual}
-            key = f"TOTAL-{ctr.code}"
-            if key in code_vs_amounts:
-                code_vs_amounts[key]["plan"] += plan
-                code_vs_amounts[key]["actual"] += actual
-            parent_code = ctr.parent_code
-            while parent_code:
-                parent_ctr = LoadedData.cached_cost_ctr[parent_code]
-                key = f"TOTAL-{parent_ctr.code}"
-                code_vs_amounts[key]["plan"] += plan
-                code_vs_amounts[key]["actual"] += actual
-                parent_code = parent_ctr.parent_code
         for nid, node in tr.model.nodes.items():
             item: ItemCtr = node.item
             if item is None:
@@ -1373,21 +1256,8 @@ class PanelViewer(wx.Panel):
                 key = f"TOTAL-{ctr.code}"
             else:
                 key = ctr.code
-            plan   = code_vs_amounts[key]["plan"]
-            actual = code_vs_amounts[key]["actual"]
-            item.plan   = plan  
-            item.actual = actual
-            if plan is None:
-                item.rem = None
-                item.exe = None
-            elif actual is None:
-                item.rem = plan
-                item.exe = None
-            else:
-                item.rem = plan-actual
-                item.exe = None
-                if plan:
-                    item.exe = actual/plan
+            plan, actual = code_vs_amounts.get(key, (0, 0))
+            self.__set_amounts(item, plan, actual)
             tr.update_node(node)
 
     def set_ctr_filter(self, ctr: CostCtr):
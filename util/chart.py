@@ -1,10 +1,15 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
-from typing import Literal
+from typing import Hashable, Literal
 from itertools import cycle
+from weakref import WeakKeyDictionary
+from matplotlib.artist import Artist
 from matplotlib.axes import Axes
-from matplotlib.patches import Rectangle
+from matplotlib.collections import PolyCollection
+from matplotlib.container import BarContainer
+from matplotlib.patches import Rectangle, Wedge
+from matplotlib.text import Text
 
 from util import simplify_won, COLORMAP, Config, pastel_gradient
 
@@ -18,6 +23,8 @@ LEGEND_KWARGS = {
     "labelspacing": 1.5
 }
 VGAP = 40
+STACKED_MAX_COLUMNS = 25 # 이보다 x축 항목이 많으면 상위 항목 외에는 '기타'로 합침
+OTHERS_LABEL = "기타"
 
 def hide_axis(ax: Axes):
     for spine in ax.spines.values():
@@ -26,35 +33,91 @@ def hide_axis(ax: Axes):
     ax.set_xticklabels([])
     ax.set_yticklabels([])
 
+class _ChartState:
+    """axes별로 유지되는 artist 묶음
+
+    signature가 같으면(범례 항목 구성, 막대 개수 등 구조가 같으면) 기존 artist의 값만 갱신하고
+    다르면 ax.clear() 후 다시 생성함
+    """
+    def __init__(self, signature: Hashable, sentinel: Artist, **artists):
+        self.signature = signature
+        self.sentinel = sentinel # 외부에서 ax.clear()가 호출되었는지 확인용
+        self.artists = artists
+
+_states: "WeakKeyDictionary[Axes, _ChartState]" = WeakKeyDictionary()
+
+def _get_state(ax: Axes, signature: Hashable) -> _ChartState | None:
+    """재사용할 수 있는 state 반환. 구조가 바뀌었거나 외부에서 지워졌으면 None"""
+    state = _states.get(ax)
+    if state is None or state.signature != signature:
+        return None
+    if state.sentinel.axes is not ax or state.sentinel not in ax.get_children():
+        return None
+    return state
+
+def _set_state(ax: Axes, signature: Hashable, sentinel: Artist, **artists) -> _ChartState:
+    state = _ChartState(signature, sentinel, **artists)
+    _states[ax] = state
+    return state
+
+def forget_chart(ax: Axes):
+    """ax에 유지 중인 artist 정보를 버림. 다음 draw_* 호출 시 새로 그림"""
+    _states.pop(ax, None)
+
+def _legend_text(label: str, raw_value: float, norm_value: float) -> str:
+    return f"{label}\n{simplify_won(raw_value)}\n{norm_value*100:0.1f}%"
+
+def _rescale_y(ax: Axes):
+    # 생성 시점의 높이로 잡힌 data limit을 갱신된 높이로 다시 계산
+    ax.relim()
+    ax.autoscale_view(scalex=False)
+
 def draw_stacked_single_bar(ax: Axes, data: dict[str, float] = {}, title: str = ""):
-    legend_labels = list(data)
-    legend_labels.sort()
-    for label in legend_labels:
+    for label in list(data):
         data[label] = max(0, data[label]) # bar 색상 통일성을 위해 0 이하도 유지해야함
-    # title = ax.get_title()
+    labels = list(data)
+    values = np.array(list(data.values()), dtype=float)
+    is_empty = not np.nansum(values)
+    signature = ("stacked_single_bar", title, None if is_empty else tuple(labels))
+    state = _get_state(ax, signature)
+    if state is None:
+        state = _build_stacked_single_bar(ax, signature, labels, title, is_empty)
+    if is_empty:
+        return
+    rects: dict[str, Rectangle] = state.artists["rects"]
+    legend_texts: dict[str, Text] = state.artists["legend_texts"]
+    normalized_values = values/np.sum(values)
+    y = 0
+    for idx in list(range(len(labels)))[::-1]:
+        label = labels[idx]
+        norm_value = normalized_values[idx]
+        rects[label].set_y(y)
+        rects[label].set_height(min(0, -norm_value))
+        legend_texts[label].set_text(_legend_text(label, values[idx], norm_value))
+        y -= norm_value
+    _rescale_y(ax)
+
+def _build_stacked_single_bar(
+        ax: Axes,
+        signature: Hashable,
+        labels: list[str,],
+        title: str,
+        is_empty: bool
+    ) -> _ChartState:
     ax.clear()
-    # ax.set_title(title, fontsize=TITLE_FONTSIZE)
     hide_axis(ax)
     ax.set_xlim(-1, 1.5)
-    if not np.nansum(list(data.values())):
+    rects: dict[str, Rectangle] = {}
+    legend_texts: dict[str, Text] = {}
+    if is_empty:
         p = ax.bar(0, -1, bottom=0, color="gray")
     else:
-        labels = list(data)
-        values = np.array(list(data.values()))
-        normalized_values = values/np.sum(values)
-        y = 0
-        colors = {}
         color_cycle = cycle(COLORMAP)
         for label in labels[::-1]:
-            colors[label] = next(color_cycle)
-        for idx in list(range(len(labels)))[::-1]:
-            label = labels[idx]
-            norm_value = normalized_values[idx]
-            raw_value = values[idx]
-        # for label, norm_value, raw_value in zip(labels, normalized_values, values):
-            p = ax.bar(0, min(0, -norm_value), label=f"{label}\n{simplify_won(raw_value)}\n{norm_value*100:0.1f}%", bottom=y, fc=colors[label])
-            y -= norm_value
-        ax.legend(loc="center right", **LEGEND_KWARGS)
+            p = ax.bar(0, 0, label=label, bottom=0, fc=next(color_cycle))
+            rects[label] = p[0]
+        legend = ax.legend(loc="center right", **LEGEND_KWARGS)
+        legend_texts = dict(zip(labels[::-1], legend.get_texts()))
     ax.text(
         p[0].get_x() + p[0].get_width()/2,
         0.03,
@@ -63,87 +126,128 @@ def draw_stacked_single_bar(ax: Axes, data: dict[str, float] = {}, title: str =
         va="bottom",
         fontsize=TITLE_FONTSIZE
     )
+    return _set_state(ax, signature, p[0], rects=rects, legend_texts=legend_texts)
 
 def draw_pie(
-        ax: Axes, 
-        data: dict[str, float] = {}, 
-        title: str = "", 
-        colors: list[str] | None = None, 
+        ax: Axes,
+        data: dict[str, float] = {},
+        title: str = "",
+        colors: list[str] | None = None,
         start_angle: float = 0.0,
         sort_by: Literal["label", "value"] = "label",
         desc: bool = False
     ):
     for label in list(data):
         data[label] = max(0, data[label]) # bar 색상 통일성을 위해 0 이하도 유지해야함
-    # title = ax.get_title()
-    ax.clear()
-    # ax.set_title(title, fontsize=TITLE_FONTSIZE)
-    # hide_axis(ax)
-    ax.text(
-        PIE_OFFSET, 0, title,
-        ha="center", va="center",
-        fontsize=TITLE_FONTSIZE
-    )
-    if not np.nansum(list(data.values())):
-        wedges, _ = ax.pie([1,], colors=["gray",]) # type: ignore
-        for w in wedges:
-            w.set_center((PIE_OFFSET, 0))
-        return
     sort_index = 0 if sort_by == "label" else 1
-    data = dict(sorted(data.items(), key=lambda x: x[sort_index], reverse=desc))
-    labels = data.keys()
-    values = np.array(list(data.values()))
-    normalized_values = values/np.sum(values)
-    wedges, _ = ax.pie(normalized_values, colors=colors, startangle=start_angle) # type: ignore
-    for w in wedges:
-        w.set_center((PIE_OFFSET, 0))
-    ax.legend(
-        wedges,
-        [f"{label}\n{simplify_won(raw_value)}\n{norm_value*100:0.1f}%" for label, norm_value, raw_value in zip(labels, normalized_values, values)],
-        loc="center left",
-        bbox_to_anchor=PIE_LEGEND_BBOX_TO_ANCHOR,
-        **LEGEND_KWARGS
-    )
+    _draw_pie(ax, dict(sorted(data.items(), key=lambda x: x[sort_index], reverse=desc)), title, colors, start_angle)
 
 def draw_donut(ax: Axes, data: dict[str, float] = {}, title: str = ""):
     for label in list(data):
         data[label] = max(0, data[label]) # bar 색상 통일성을 위해 0 이하도 유지해야함
-    # title = ax.get_title()
+    _draw_pie(ax, dict(sorted(data.items(), key=lambda x: x[0])), title, wedge_width=0.5)
+
+def _draw_pie(
+        ax: Axes,
+        data: dict[str, float],
+        title: str,
+        colors: list[str] | None = None,
+        start_angle: float = 0.0,
+        wedge_width: float | None = None
+    ):
+    """data 순서대로 wedge를 그림
+    wedge 색상과 범례 위치는 순서로 정해지므로 값 정렬로 순서만 바뀐 경우에도 재사용함
+    """
+    values = np.array(list(data.values()), dtype=float)
+    is_empty = not np.nansum(values)
+    signature = (
+        "pie", title, None if is_empty else frozenset(data), None if colors is None else tuple(colors),
+        start_angle, wedge_width
+    )
+    state = _get_state(ax, signature)
+    if state is None:
+        state = _build_pie(ax, signature, len(data), title, colors, start_angle, wedge_width, is_empty)
+    if is_empty:
+        return
+    wedges: list[Wedge] = state.artists["wedges"]
+    legend_texts: list[Text] = state.artists["legend_texts"]
+    normalized_values = values/np.sum(values)
+    # ax.pie와 같은 방식으로 각도 계산 (반시계 방향)
+    theta1 = start_angle/360
+    for w, text, label, norm_value, raw_value in zip(wedges, legend_texts, data, normalized_values, values):
+        theta2 = theta1 + norm_value
+        w.set_theta1(360*theta1)
+        w.set_theta2(360*theta2)
+        text.set_text(_legend_text(label, raw_value, norm_value))
+        theta1 = theta2
+
+def _build_pie(
+        ax: Axes,
+        signature: Hashable,
+        count: int,
+        title: str,
+        colors: list[str] | None,
+        start_angle: float,
+        wedge_width: float | None,
+        is_empty: bool
+    ) -> _ChartState:
     ax.clear()
-    # ax.set_title(title, fontsize=TITLE_FONTSIZE)
-    # hide_axis(ax)
     ax.text(
         PIE_OFFSET, 0, title,
         ha="center", va="center",
         fontsize=TITLE_FONTSIZE
     )
-    if not np.nansum(list(data.values())):
-        wedges, _ = ax.pie([1,], colors=["gray",], wedgeprops=dict(width=0.5)) # type: ignore
+    wedgeprops = None if wedge_width is None else dict(width=wedge_width)
+    if is_empty:
+        wedges, _ = ax.pie([1,], colors=["gray",], wedgeprops=wedgeprops) # type: ignore
         for w in wedges:
             w.set_center((PIE_OFFSET, 0))
-        return
-    data = dict(sorted(data.items(), key=lambda x: x[0]))
-    labels = data.keys()
-    values = np.array(list(data.values()))
-    normalized_values = values/np.sum(values)
-    wedges, _ = ax.pie(normalized_values, wedgeprops=dict(width=0.5)) # type: ignore
+        return _set_state(ax, signature, wedges[0])
+    wedges, _ = ax.pie(np.full(count, 1/count), colors=colors, startangle=start_angle, wedgeprops=wedgeprops) # type: ignore
     for w in wedges:
         w.set_center((PIE_OFFSET, 0))
-    ax.legend(
+    legend = ax.legend(
         wedges,
-        [f"{label}\n{simplify_won(raw_value)}\n{norm_value*100:0.1f}%" for label, norm_value, raw_value in zip(labels, normalized_values, values)],
+        [""]*count,
         loc="center left",
         bbox_to_anchor=PIE_LEGEND_BBOX_TO_ANCHOR,
         **LEGEND_KWARGS
     )
+    return _set_state(ax, signature, wedges[0], wedges=wedges, legend_texts=legend.get_texts())
+
+def others_label(count: int) -> str:
+    """'기타'로 합친 항목의 이름"""
+    return f"{OTHERS_LABEL} ({count}개)"
+
+def _bucket_columns(
+        data: dict[str, np.ndarray],
+        x_labels: list[str,],
+        max_columns: int
+    ) -> tuple[dict[str, np.ndarray], list[str,]]:
+    """x축 항목 합계 상위 max_columns - 1개는 원래 순서대로 두고 나머지는 마지막 '기타' 항목 하나로 합침"""
+    arrays = {label: np.asarray(values, dtype=float) for label, values in data.items()}
+    total = np.zeros(len(x_labels))
+    for arr in arrays.values():
+        total += np.nan_to_num(arr)
+    order = np.argsort(-np.abs(total), kind="stable")
+    keep = np.sort(order[:max_columns - 1])
+    rest = order[max_columns - 1:]
+    bucketed = {label: np.append(arr[keep], np.nansum(arr[rest])) for label, arr in arrays.items()}
+    return bucketed, [x_labels[i] for i in keep] + [others_label(len(rest))]
 
 def draw_stacked_multiple_bar(
         ax: Axes,
         data: dict[str, np.ndarray] = {},
         x_labels: list[str,] = [],
         is_percentage: bool = False,
-        show_summation_on_top: bool = False
+        show_summation_on_top: bool = False,
+        max_columns: int | None = STACKED_MAX_COLUMNS
     ):
+    """x축 항목은 위치로만 구분하므로 기간 변경 등으로 x_labels 순서만 바뀐 경우에도 재사용함
+    x축 항목이 max_columns보다 많으면 합계 상위 항목만 그리고 나머지는 '기타'로 합침 (None이면 모두 그림)
+    """
+    if max_columns is not None and len(x_labels) > max_columns:
+        data, x_labels = _bucket_columns(data, x_labels, max_columns)
     cleaned_data: dict[str, np.ndarray] = {}
     # value legend label로 정렬하고 음수를 clean
     legend_labels = list(data)
@@ -151,37 +255,35 @@ def draw_stacked_multiple_bar(
     for label in legend_labels:
         arr = np.array(data[label])
         cleaned_data[label] = arr
-    title = ax.get_title()
-    ax.clear()
-    ax.set_title(title, fontsize=TITLE_FONTSIZE)
-    hide_axis(ax)
     total = np.zeros(len(x_labels))
     for val in cleaned_data.values():
         total += val
-    if not x_labels or not np.nansum(total):
-        for i in range(8):
-            ax.bar(i, 1, bottom=0, color="gray")
-        ax.set_xlim(-1, 1.1*8)
+    is_empty = not x_labels or not np.nansum(total)
+    signature = (
+        "stacked_multiple_bar",
+        None if is_empty else (tuple(legend_labels), len(x_labels), is_percentage, show_summation_on_top)
+    )
+    state = _get_state(ax, signature)
+    if state is None:
+        state = _build_stacked_multiple_bar(ax, signature, legend_labels, len(x_labels), show_summation_on_top, is_empty)
+    if is_empty:
         return
+    containers: dict[str, BarContainer] = state.artists["containers"]
+    value_texts: dict[str, list[Text]] = state.artists["value_texts"]
     y = np.zeros(len(x_labels))
-    handles = []
-    labels = []
-    bar_patches: list[Rectangle] = []
-    label_texts: list[str] = []
-    colors = {}
-    color_cycle = cycle(COLORMAP)
-    for cat in legend_labels:
-        colors[cat] = next(color_cycle)
+    label_texts: dict[str, list[str]] = {}
     for cat in legend_labels[::-1]:
         values = cleaned_data[cat]
         eff_values = np.array(values) / (total if is_percentage else 1)
-        p = ax.bar(x_labels, eff_values, label=cat, bottom=y, fc=colors[cat])
+        for rect, bottom, height in zip(containers[cat].patches, y, eff_values):
+            rect.set_y(bottom)
+            rect.set_height(height)
         y += eff_values
-        handles.append(p)
-        labels.append(cat)
-        for i, (rect, v) in enumerate(zip(p.patches, values)):
-            bar_patches.append(rect)
-            label_texts.append(f"{v/total[i]*100:0.1f}%" if is_percentage else simplify_won(v))
+        label_texts[cat] = [
+            f"{v/total[i]*100:0.1f}%" if is_percentage else simplify_won(v)
+            for i, v in enumerate(values)
+        ]
+    _rescale_y(ax)
 
     MIN_H_PX = 14
     fig = ax.figure
@@ -190,44 +292,112 @@ def draw_stacked_multiple_bar(
     ymin, ymax = ax.get_ylim()
     yrange = ymax - ymin if ymax > ymin else 1.0
 
-    for rect, text in zip(bar_patches, label_texts):
-        h_data = abs(rect.get_height())
-        h_px = (h_data / yrange) * axes_px_h
-        if not np.isfinite(h_px) or h_px < MIN_H_PX or h_data == 0:
-            continue
+    for cat in legend_labels:
+        for rect, txt, text in zip(containers[cat].patches, value_texts[cat], label_texts[cat]):
+            h_data = abs(rect.get_height())
+            h_px = (h_data / yrange) * axes_px_h
+            if not np.isfinite(h_px) or h_px < MIN_H_PX or h_data == 0:
+                txt.set_visible(False)
+                continue
+            # 중앙 좌표
+            txt.set_position((rect.get_x() + rect.get_width()/2.0, rect.get_y() + rect.get_height()/2.0))
+            txt.set_text(text)
+            txt.set_visible(True)
+
+    # 합계 텍스트 표시
+    if show_summation_on_top:
+        max_y = np.max(y)
+        for txt, value, y_pos in zip(state.artists["sum_texts"], total, y):
+            txt.set_y(y_pos+max_y*0.02)
+            txt.set_text(simplify_won(value))
 
-        # 중앙 좌표
-        cx = rect.get_x() + rect.get_width()/2.0
-        cy = rect.get_y() + rect.get_height()/2.0
+    ax.set_xticks(range(len(x_labels)))
+    ax.set_xticklabels(x_labels, rotation=45)
 
+def _build_stacked_multiple_bar(
+        ax: Axes,
+        signature: Hashable,
+        legend_labels: list[str,],
+        count: int,
+        show_summation_on_top: bool,
+        is_empty: bool
+    ) -> _ChartState:
+    title = ax.get_title()
+    ax.clear()
+    ax.set_title(title, fontsize=TITLE_FONTSIZE)
+    hide_axis(ax)
+    if is_empty:
+        for i in range(8):
+            p = ax.bar(i, 1, bottom=0, color="gray")
+        ax.set_xlim(-1, 1.1*8)
+        return _set_state(ax, signature, p[0])
+    x = np.arange(count)
+    containers: dict[str, BarContainer] = {}
+    value_texts: dict[str, list[Text]] = {}
+    colors = {}
+    color_cycle = cycle(COLORMAP)
+    for cat in legend_labels:
+        colors[cat] = next(color_cycle)
+    for cat in legend_labels[::-1]:
+        p = ax.bar(x, np.zeros(count), label=cat, bottom=0, fc=colors[cat])
+        containers[cat] = p
         # facecolor 밝기 기반 텍스트 색 자동 선택
-        r, g, b, a = rect.get_facecolor() # type: ignore
+        r, g, b, a = p.patches[0].get_facecolor() # type: ignore
         L = 0.2126*r + 0.7152*g + 0.0722*b # type: ignore
         txt_color = "white" if L < 0.7 else "black"
-
-        ax.text(
-            cx, cy, text,
-            ha="center", va="center",
-            color=txt_color, fontsize=9, clip_on=True
-        )
-
-    # 합계 텍스트 표시
+        value_texts[cat] = [
+            ax.text(
+                0, 0, "",
+                ha="center", va="center",
+                color=txt_color, fontsize=9, clip_on=True, visible=False
+            )
+            for _ in range(count)
+        ]
+    sum_texts = []
     if show_summation_on_top:
-        max_y = np.max(y)
-        for i, (value, y_pos) in enumerate(zip(total, y)):
+        sum_texts = [
             ax.text(
-                i, y_pos+max_y*0.02,
-                simplify_won(value),
+                i, 0, "",
                 ha="center",
                 va="bottom",
                 fontsize=9,
                 fontweight="bold"
             )
+            for i in range(count)
+        ]
+    ax.set_xlim(-1, 1.1*count)
+    ax.legend([containers[cat] for cat in legend_labels], legend_labels, loc="center right", **LEGEND_KWARGS)
+    return _set_state(
+        ax, signature, containers[legend_labels[0]].patches[0],
+        containers=containers, value_texts=value_texts, sum_texts=sum_texts
+    )
 
-    ax.set_xlim(-1, 1.1*len(x_labels))
-    ax.set_xticks(range(len(x_labels)))
-    ax.set_xticklabels(x_labels, rotation=45)
-    ax.legend(handles[::-1], labels[::-1], loc="center right", **LEGEND_KWARGS)
+def _horizontal_bar_verts(y: np.ndarray, widths: np.ndarray, height: float) -> np.ndarray:
+    """barh와 같은 사각형 꼭짓점 배열 (N, 4, 2). 막대는 x=0에서 시작함"""
+    y = np.asarray(y, dtype=float)
+    widths = np.nan_to_num(np.asarray(widths, dtype=float))
+    lefts = np.zeros_like(widths)
+    bottoms, tops = y - height/2, y + height/2
+    return np.stack((
+        np.column_stack((lefts, bottoms)),
+        np.column_stack((lefts, tops)),
+        np.column_stack((widths, tops)),
+        np.column_stack((widths, bottoms)),
+    ), axis=1)
+
+def draw_horizontal_bar_collection(
+        ax: Axes,
+        y: np.ndarray,
+        widths: np.ndarray,
+        height: float = HORIZONTAL_BAR_HEIGHT,
+        **kwargs
+    ) -> PolyCollection:
+    """막대마다 Rectangle을 만드는 barh 대신 막대 전체를 PolyCollection 하나로 그림
+    막대가 수백 개여도 artist는 하나이며, 축 범위는 호출하는 쪽에서 지정해야 함
+    """
+    collection = PolyCollection(_horizontal_bar_verts(y, widths, height), **kwargs)
+    ax.add_collection(collection, autolim=False)
+    return collection
 
 def draw_multiple_bar(ax: Axes, title: str|None = None, data: dict[str, float] = {}, color: str|None = None):
     for key in list(data):
@@ -264,19 +434,27 @@ def draw_multiple_bar(ax: Axes, title: str|None = None, data: dict[str, float] =
     ax.set_xticks(range(len(x_labels)))
     ax.set_xticklabels(x_labels, rotation=45)
 
-def draw_horizontal_overlapped_bar(ax: Axes, data: dict[str, tuple[float, float]] = {}):
-    ax.clear()
-    for spine in ax.spines.values():
-        spine.set_visible(False)
-    ax.tick_params(left=False, bottom=False)
-    ax.set_xticks([]); ax.set_yticks([])
-    ax.set_xticklabels([]); ax.set_yticklabels([])
+def _fmt_money(v: float) -> str:
+    try:
+        return simplify_won(v)  # 사용자가 정의한 포맷터 있으면 활용
+    except Exception:
+        return f"{v:,.0f}"
+
+# 바 상단 "계획: 값  집행: 값  집행률: 값  잔액: 값" 항목별 스타일
+_OVERLAPPED_BAR_TEXT_STYLES = (
+    dict(fontweight="bold"), dict(),
+    dict(fontweight="bold"), dict(),
+    dict(fontweight="bold"), dict(),
+    dict(fontweight="bold"), dict(),
+)
 
+def draw_horizontal_overlapped_bar(ax: Axes, data: dict[str, tuple[float, float]] = {}):
+    """막대 개수가 같으면 카테고리명이 바뀌어도 재사용함"""
+    signature = ("horizontal_overlapped_bar", len(data) or None)
+    state = _get_state(ax, signature)
+    if state is None:
+        state = _build_horizontal_overlapped_bar(ax, signature, len(data))
     if not data:
-        for i in range(3):
-            ax.barh(i, 1, left=0, color="gray", height=HORIZONTAL_BAR_HEIGHT)
-        ax.set_ylim(-0.4, 2.4)
-        ax.set_xlim(0, 1.05)
         return
 
     # 데이터
@@ -290,65 +468,122 @@ def draw_horizontal_overlapped_bar(ax: Axes, data: dict[str, tuple[float, float]
     plan_n = plan / max_val
     execu_n = execu / max_val
 
-    y = np.arange(len(labels))
+    # 계획/집행 바
+    for rect, width in zip(state.artists["bars_plan"].patches, plan_n):
+        rect.set_width(width)
+    for rect, width in zip(state.artists["bars_exec"].patches, execu_n):
+        rect.set_width(width)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rates = np.where(plan > 0, execu / plan * 100.0, 0.0)
+
+    # 좌측에 카테고리명만 표시
+    for txt, lbl in zip(state.artists["label_texts"], labels):
+        txt.set_text(lbl)
+
+    # 바 상단에 항목을 일렬로 표시하므로 앞 항목의 폭을 측정하여 위치를 정함
+    renderer = ax.figure.canvas.get_renderer() # type: ignore
+    for row_texts, p, e, r in zip(state.artists["value_texts"], plan, execu, rates):
+        texts = (
+            "계획: ", _fmt_money(p) + "    ",
+            "실적: ", _fmt_money(e) + "    ",
+            "집행률: ", f"{r:.1f}%    ",
+            "잔액: ", _fmt_money(p-e),
+        )
+        x_cur = 0.0
+        for txt, t in zip(row_texts, texts):
+            txt.set_text(t)
+            txt.set_x(x_cur)
+            bb = txt.get_window_extent(renderer=renderer)
+            dx_axes = bb.width / ax.bbox.width
+            x_cur += dx_axes
+
+def _build_horizontal_overlapped_bar(ax: Axes, signature: Hashable, count: int) -> _ChartState:
+    ax.clear()
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    ax.tick_params(left=False, bottom=False)
+    ax.set_xticks([]); ax.set_yticks([])
+    ax.set_xticklabels([]); ax.set_yticklabels([])
+
+    if not count:
+        for i in range(3):
+            p = ax.barh(i, 1, left=0, color="gray", height=HORIZONTAL_BAR_HEIGHT)
+        ax.set_ylim(-0.4, 2.4)
+        ax.set_xlim(0, 1.05)
+        return _set_state(ax, signature, p[0])
+
+    y = np.arange(count)
     left_pad = 0.01
     right_pad = 0.01
     ax.set_xlim(-left_pad, 1.0 + right_pad)
-    ax.set_ylim(-0.6, len(labels) - 1 + 0.6)
+    ax.set_ylim(-0.6, count - 1 + 0.6)
 
     color1 = COLORMAP[0]
     color2 = COLORMAP[2]
 
-    arr_plan_n = np.array(plan_n)
-    arr_execu_n = np.array(execu_n)
-    # 계획/집행 바
-    bars1 = ax.barh(
-        y, arr_plan_n, left=0, height=HORIZONTAL_BAR_HEIGHT,
+    bars_plan = ax.barh(
+        y, np.zeros(count), left=0, height=HORIZONTAL_BAR_HEIGHT,
         label='계획', color=color1
     )
-    bars2 = ax.barh(
-        y, arr_execu_n, left=0, height=HORIZONTAL_BAR_HEIGHT*0.6,
+    bars_exec = ax.barh(
+        y, np.zeros(count), left=0, height=HORIZONTAL_BAR_HEIGHT*0.6,
         label='집행', color=color2
     )
-
-    def fmt_money(v: float) -> str:
-        try:
-            return simplify_won(v)  # 사용자가 정의한 포맷터 있으면 활용
-        except Exception:
-            return f"{v:,.0f}"
-
-    with np.errstate(divide="ignore", invalid="ignore"):
-        rates = np.where(plan > 0, execu / plan * 100.0, 0.0)
-
-    # 좌측에 카테고리명만 표시
-    for i, lbl in enumerate(labels):
+    label_texts = [
         ax.text(
             -left_pad*0.95, y[i],
-            lbl, ha="right", va="center", fontsize=12, fontweight="bold"
+            "", ha="right", va="center", fontsize=12, fontweight="bold"
         )
-
-    # 바 상단에 "계획: 값  집행: 값  집행률: 값  잔액: 값" 일렬 표시
-    renderer = ax.figure.canvas.get_renderer() # type: ignore
-    for i, (p, e, r) in enumerate(zip(plan, execu, rates)):
-        y_top = y[i] + 0.38
-        # 네 개의 항목 정의
-        texts = [
-            ("계획: ", dict(fontweight="bold")),
-            (fmt_money(p) + "    ", dict()),
-            ("실적: ", dict(fontweight="bold")),
-            (fmt_money(e) + "    ", dict()),
-            ("집행률: ", dict(fontweight="bold")),
-            (f"{r:.1f}%    ", dict()),
-            ("잔액: ", dict(fontweight="bold")),
-            (fmt_money(p-e), dict()),
-        ]
-        x_cur = 0.0
-        for t, style in texts:
-            txt = ax.text(
-                x_cur, y_top, t,
+        for i in range(count)
+    ]
+    value_texts = [
+        [
+            ax.text(
+                0, y[i] + 0.38, "",
                 ha="left", va="center", fontsize=10,
                 **style
             )
-            bb = txt.get_window_extent(renderer=renderer)
-            dx_axes = bb.width / ax.bbox.width
-            x_cur += dx_axes
+            for style in _OVERLAPPED_BAR_TEXT_STYLES
+        ]
+        for i in range(count)
+    ]
+    return _set_state(
+        ax, signature, bars_plan.patches[0],
+        bars_plan=bars_plan, bars_exec=bars_exec, label_texts=label_texts, value_texts=value_texts
+    )
+
+def draw_horizontal_bar(ax: Axes, data: dict[str, float] = {}, colors: list[str] | None = None):
+    """항목별 가로 막대. 위에서부터 data 순서로 그리며 항목 개수가 같으면 재사용함"""
+    signature = ("horizontal_bar", len(data) or None, None if colors is None else tuple(colors))
+    state = _get_state(ax, signature)
+    if state is None:
+        state = _build_horizontal_bar(ax, signature, len(data), colors)
+    if not data:
+        return
+    labels = list(data.keys())
+    values = list(data.values())
+    max_v = max(values) if values else 1
+    for rect, txt, yi, val in zip(state.artists["bars"].patches, state.artists["value_texts"], range(len(values)), values):
+        rect.set_width(val)
+        txt.set_position((val + (max_v * 0.01), yi))
+        txt.set_text(simplify_won(val))
+    ax.set_yticks(range(len(labels)))
+    ax.set_yticklabels(labels)
+    ax.set_xlim(0, max_v * 1.3)
+
+def _build_horizontal_bar(ax: Axes, signature: Hashable, count: int, colors: list[str] | None) -> _ChartState:
+    ax.clear()
+    ax.set_yticks([])
+    ax.set_xticks([])
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    if not count:
+        # 빈 축에는 그린 artist가 없으므로 보이지 않는 text를 sentinel로 사용
+        return _set_state(ax, signature, ax.text(0, 0, "", visible=False))
+    y = np.arange(count)
+    bars = ax.barh(y, np.zeros(count), height=0.6, color=colors, edgecolor="none")
+    ax.tick_params(axis='y', labelsize=10, left=False)
+    value_texts = [ax.text(0, yi, "", ha='left', va='center') for yi in y]
+    ax.set_ylim(count - 0.5, -0.5)
+    return _set_state(ax, signature, bars.patches[0], bars=bars, value_texts=value_texts)
@@ -0,0 +1,207 @@
+"""화면과 무관하게 Agg figure로 차트 이미지 파일 생성
+
+대시보드/BS 화면의 집계 결과(db.aggregation 반환값)로 차트를 다시 구성하므로
+화면 크기나 표시 여부와 관계없이 같은 이미지를 얻음
+이미지마다 별도 프로세스에서 그려 여러 장을 병렬로 저장함
+"""
+import os
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from itertools import cycle
+from typing import Callable, Literal
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from .util import COLORMAP, initialize_matplotlib, pastel_gradient, simplify_won
+from .chart import (
+    draw_pie, draw_horizontal_bar, draw_horizontal_overlapped_bar, draw_stacked_single_bar, draw_donut,
+    draw_stacked_multiple_bar,
+    DPI, TITLE_FONTSIZE,
+)
+
+FORMATS = ("png", "svg", "pdf")
+EXPORT_DPI = 300
+FIG_WIDTH = 1000/DPI # 화면의 차트 최대 폭(1000px)과 같은 크기 (inch)
+
+@dataclass
+class RenderJob:
+    """이미지 한 장
+
+    kind별 payload
+        exe_portion: header({title, items: [(label, text, color),]}), data(집행률 dict)
+        lv1: data({제목: 값 dict})
+        donut: data({제목: 값 dict}), 2x3 배치
+        stacked: data, xlabels, is_percentage, show_summation_on_top
+        pie_and_bar: pie, bar, color
+    """
+    kind: Literal["exe_portion", "lv1", "donut", "stacked", "pie_and_bar"]
+    filepath: str
+    payload: dict = field(default_factory=dict)
+    dpi: int = EXPORT_DPI
+
+def _new_figure(aspect_ratio: float, nrows: int = 1, ncols: int = 1, **gridspec_kw) -> tuple[Figure, object]:
+    """화면의 PanelAspectRatio와 같은 비율(w/h)의 figure"""
+    fig = Figure(figsize=(FIG_WIDTH, FIG_WIDTH/aspect_ratio), dpi=DPI, constrained_layout=True)
+    FigureCanvasAgg(fig) # 텍스트 폭 측정에 renderer가 필요함
+    ax = fig.subplots(nrows, ncols, gridspec_kw=gridspec_kw or None)
+    return fig, ax
+
+def _draw_header(ax, header: dict):
+    """화면의 총계 표(제목, 계획, 실적, 집행률, 잔액)를 텍스트로 그림"""
+    ax.set_axis_off()
+    columns = [("", header["title"], "#000000"), *header["items"]]
+    for i, (label, text, color) in enumerate(columns):
+        x = (i + 0.5)/len(columns)
+        if label:
+            ax.text(x, 0.8, label, ha="center", va="center", fontsize=TITLE_FONTSIZE, transform=ax.transAxes)
+            ax.text(
+                x, 0.3, text, ha="center", va="center", fontsize=TITLE_FONTSIZE*2, fontweight="bold", color=color,
+                transform=ax.transAxes
+            )
+        else:
+            ax.text(x, 0.3, text, ha="center", va="center", fontsize=TITLE_FONTSIZE, transform=ax.transAxes)
+
+def render(job: RenderJob) -> str:
+    """job을 그려서 저장하고 파일 경로 반환 (워커 프로세스에서 실행됨)"""
+    payload = job.payload
+    match job.kind:
+        case "exe_portion":
+            fig, (ax_header, ax) = _new_figure(3/1.4, 2, 1, height_ratios=[0.4, 1])
+            _draw_header(ax_header, payload["header"])
+            draw_horizontal_overlapped_bar(ax, payload["data"])
+        case "lv1":
+            fig, axes = _new_figure(3, 1, len(payload["data"]))
+            for ax, (title, data) in zip(axes, payload["data"].items()):
+                draw_stacked_single_bar(ax, dict(data), title)
+        case "donut":
+            fig, axes = _new_figure(2, 2, 3)
+            fig.set_constrained_layout_pads(wspace=0.2)
+            for ax, (title, data) in zip(axes.flat, payload["data"].items()):
+                draw_donut(ax, dict(data), title)
+        case "stacked":
+            fig, ax = _new_figure(2)
+            draw_stacked_multiple_bar(
+                ax, payload["data"], payload["xlabels"],
+                payload.get("is_percentage", False), payload.get("show_summation_on_top", False)
+            )
+        case "pie_and_bar":
+            fig, (ax_pie, ax_bar) = _new_figure(4, 1, 2, width_ratios=[2, 3])
+            color = payload["color"]
+            pie, bar = dict(payload["pie"]), payload["bar"]
+            draw_pie(ax_pie, pie, colors=pastel_gradient(color, max(1, len(pie))), start_angle=90.0, sort_by="value", desc=True)
+            draw_horizontal_bar(ax_bar, bar, pastel_gradient(color, len(bar)) if bar else None)
+        case _:
+            raise ValueError(f"Unknown chart kind: {job.kind}")
+    fig.savefig(job.filepath, dpi=job.dpi)
+    return job.filepath
+
+def summary_header(title: str, total_plan: float, total_actual: float, colors: dict[str, str]) -> dict:
+    """화면 총계 표와 같은 exe_portion job의 header
+
+    Args:
+        colors
+            "low", "mid", "high": 집행률 50% 미만, 90% 미만, 90% 이상 색상
+            "negative": 음수 잔액 색상
+    """
+    if total_plan:
+        portion = total_actual/total_plan
+        exe_text = f"{portion*100:0.1f}%"
+        exe_color = colors["high"] if portion >= 0.9 else colors["mid"] if portion >= 0.5 else colors["low"]
+    else:
+        exe_text = "-"
+        exe_color = colors["low"]
+    remainder = total_plan-total_actual
+    return {
+        "title": title,
+        "items": [
+            ("계획", simplify_won(total_plan), "#000000"),
+            ("실적", simplify_won(total_actual), "#000000"),
+            ("집행률", exe_text, exe_color),
+            ("잔액", simplify_won(remainder), colors["negative"] if remainder < 0 else "#000000"),
+        ],
+    }
+
+def pie_and_bar_jobs(pie_and_bars: list[dict], get_filepath: Callable[[int], str], dpi: int = EXPORT_DPI) -> list[RenderJob]:
+    """aggregate_dashboard/aggregate_bs의 pie_and_bars로부터 job 생성 (화면과 같은 색상 순서)
+
+    Args:
+        get_filepath
+            0부터 시작하는 순번을 받아 저장 경로 반환
+    """
+    colors = cycle(COLORMAP)
+    return [
+        RenderJob("pie_and_bar", get_filepath(i), {
+            "pie": dat["lv2_data"],
+            "bar": dat["lv3_data"],
+            "color": next(colors),
+        }, dpi)
+        for i, dat in enumerate(pie_and_bars)
+    ]
+
+def dashboard_jobs(data: dict, header: dict, get_filepath: Callable[[int], str], dpi: int = EXPORT_DPI) -> list[RenderJob]:
+    """aggregate_dashboard 결과의 전체 차트 job (화면 순서)
+
+    Args:
+        get_filepath
+            1부터 시작하는 순번을 받아 저장 경로 반환
+    """
+    dev = data["dev"] or {"data": {}, "xlabels": []}
+    jobs = [
+        RenderJob("exe_portion", get_filepath(1), {"header": header, "data": data["exe_portion"]}, dpi),
+        RenderJob("lv1", get_filepath(2), {"data": data["lv1"]}, dpi),
+        RenderJob("donut", get_filepath(3), {"data": data["donut"]}, dpi),
+        RenderJob("stacked", get_filepath(4), {**data["bs"], "show_summation_on_top": True}, dpi),
+        RenderJob("stacked", get_filepath(5), {**dev, "is_percentage": True, "show_summation_on_top": True}, dpi),
+    ]
+    jobs.extend(pie_and_bar_jobs(data["pie_and_bars"], lambda i: get_filepath(6+i), dpi))
+    return jobs
+
+def bs_jobs(data: dict, header: dict, get_filepath: Callable[[int], str], dpi: int = EXPORT_DPI) -> list[RenderJob]:
+    """aggregate_bs 결과의 전체 차트 job (화면 순서)
+
+    Args:
+        get_filepath
+            1부터 시작하는 순번을 받아 저장 경로 반환
+    """
+    dev = data["dev"] or {"data": {}, "xlabels": []}
+    jobs = [
+        RenderJob("exe_portion", get_filepath(1), {"header": header, "data": data["exe_portion"]}, dpi),
+        RenderJob("stacked", get_filepath(2), {**data["team"], "show_summation_on_top": True}, dpi),
+        RenderJob("stacked", get_filepath(3), {**dev, "is_percentage": True, "show_summation_on_top": True}, dpi),
+    ]
+    jobs.extend(pie_and_bar_jobs(data["pie_and_bars"], lambda i: get_filepath(4+i), dpi))
+    return jobs
+
+def render_all(
+        jobs: list[RenderJob],
+        on_progress: Callable[[int, int, str], None] | None = None,
+        max_workers: int | None = None
+    ) -> list[str]:
+    """job들을 프로세스 풀에서 병렬로 그려서 저장하고 파일 경로 목록 반환 (job 순서)
+
+    Args:
+        on_progress
+            이미지 한 장이 저장될 때마다 (완료 수, 전체 수, 파일 경로)로 호출됨
+        max_workers
+            None이면 CPU 수
+    """
+    if not jobs:
+        return []
+    for dir_path in {os.path.dirname(job.filepath) for job in jobs}:
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+    max_workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers, initializer=initialize_matplotlib) as pool:
+        futures = [pool.submit(render, job) for job in jobs]
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                filepath = future.result()
+                if on_progress:
+                    on_progress(done, len(jobs), filepath)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    return [job.filepath for job in jobs]
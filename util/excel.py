@@ -0,0 +1,139 @@
+"""openpyxl write-only 모드를 이용한 엑셀 내보내기
+
+셀 스타일은 NamedStyle로 한 번만 등록하고 행을 쓰는 시점에 이름으로 지정하므로
+행 수에 비례하는 시간과 일정한 메모리로 저장됨
+"""
+from copy import copy
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Sequence
+
+import openpyxl as xl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Side, PatternFill, NamedStyle
+from openpyxl.utils import get_column_letter
+
+STYLE_HEADER = "export_header"
+STYLE_CENTER = "export_center"
+STYLE_LEFT = "export_left"
+
+MAX_ROWS_PER_SHEET = 1048576 - 1 # 헤더 제외
+
+@dataclass
+class Sheet:
+    """write_xlsx_sheets에 넘길 시트 정의"""
+    title: str
+    headers: Sequence[str]
+    rows: Iterable[Sequence]
+    column_widths: Sequence[float] | None = None
+    left_aligned_columns: Iterable[int] = field(default_factory=lambda: (0,))
+    style_body: bool = True # False면 헤더에만 스타일을 지정 (대용량 저장 시 약 2배 빠름)
+
+def _add_named_styles(wb: xl.Workbook):
+    thin = Side(border_style="thin", color="000000")
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    center = Alignment(horizontal="center", vertical="center")
+    wb.add_named_style(NamedStyle(
+        STYLE_HEADER,
+        border=border,
+        alignment=center,
+        fill=PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
+    ))
+    wb.add_named_style(NamedStyle(STYLE_CENTER, border=border, alignment=center))
+    wb.add_named_style(NamedStyle(STYLE_LEFT, border=border))
+
+def _append_sheet(
+        wb: xl.Workbook,
+        sheet: Sheet,
+        on_progress: Callable[[str, int], None] | None,
+        progress_interval: int
+    ) -> int:
+    """시트를 추가하고 행을 씀. 한 시트의 최대 행 수를 넘으면 '제목(2)' 형식의 시트로 이어서 씀"""
+    left_aligned_columns = set(sheet.left_aligned_columns)
+    col_styles = [
+        STYLE_LEFT if i in left_aligned_columns else STYLE_CENTER
+        for i in range(len(sheet.headers))
+    ]
+    style_arrays = {}
+
+    def styled(ws, value, style: str) -> WriteOnlyCell:
+        cell = WriteOnlyCell(ws, value=value)
+        cell._style = copy(style_arrays[style])
+        return cell
+
+    def new_sheet(title: str):
+        ws = wb.create_sheet(title)
+        if sheet.column_widths:
+            for i, width in enumerate(sheet.column_widths):
+                ws.column_dimensions[get_column_letter(i + 1)].width = width
+        # 스타일 이름 조회는 느리므로 스타일별로 한 번만 조회한 StyleArray를 복사하여 지정
+        if not style_arrays:
+            for name in (STYLE_HEADER, STYLE_CENTER, STYLE_LEFT):
+                proto = WriteOnlyCell(ws)
+                proto.style = name
+                style_arrays[name] = proto._style
+        ws.append([styled(ws, header, STYLE_HEADER) for header in sheet.headers])
+        return ws
+
+    ws = new_sheet(sheet.title)
+    count = 0
+    for row in sheet.rows:
+        if count and count % MAX_ROWS_PER_SHEET == 0:
+            ws = new_sheet(f"{sheet.title}({count//MAX_ROWS_PER_SHEET + 1})")
+        if sheet.style_body:
+            ws.append([styled(ws, value, style) for value, style in zip(row, col_styles)])
+        else:
+            ws.append(row)
+        count += 1
+        if on_progress and count % progress_interval == 0:
+            on_progress(sheet.title, count)
+    return count
+
+def write_xlsx_sheets(
+        filepath: str,
+        sheets: Iterable[Sheet],
+        on_progress: Callable[[str, int], None] | None = None,
+        progress_interval: int = 10000
+    ) -> dict[str, int]:
+    """여러 시트를 테두리가 있는 표 형태로 저장
+
+    Args:
+        sheets
+            시트 정의. rows에 generator를 넘기면 전체 데이터를 메모리에 올리지 않음
+        on_progress
+            progress_interval 행마다 (시트 제목, 지금까지 쓴 행 수)로 호출됨
+
+    Returns:
+        { 시트 제목: 헤더를 제외한 행 수 }
+    """
+    wb = xl.Workbook(write_only=True)
+    _add_named_styles(wb)
+    counts = {}
+    for sheet in sheets:
+        counts[sheet.title] = _append_sheet(wb, sheet, on_progress, progress_interval)
+    wb.save(filepath)
+    wb.close()
+    return counts
+
+def write_xlsx(
+        filepath: str,
+        headers: Sequence[str],
+        rows: Iterable[Sequence],
+        column_widths: Sequence[float] | None = None,
+        left_aligned_columns: Iterable[int] = (0,),
+        sheet_title: str = "Sheet"
+    ) -> int:
+    """헤더와 행들을 테두리가 있는 표 형태로 한 시트에 저장
+
+    Args:
+        rows
+            한 행씩 생성되는 값 목록. generator를 넘기면 전체 데이터를 메모리에 올리지 않음
+        column_widths
+            엑셀 기준 열 너비
+        left_aligned_columns
+            좌측 정렬할 열 index. 그 외 열은 가운데 정렬
+
+    Returns:
+        헤더를 제외한 행 수
+    """
+    sheet = Sheet(sheet_title, headers, rows, column_widths, left_aligned_columns)
+    return write_xlsx_sheets(filepath, [sheet])[sheet_title]
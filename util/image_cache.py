@@ -0,0 +1,72 @@
+import pickle
+
+from collections import OrderedDict
+from hashlib import blake2b
+from threading import Lock
+from typing import Hashable
+
+def fingerprint(*parts) -> str:
+    """차트 데이터(dict, list, ndarray, 숫자, 문자열 등)의 내용으로 만든 hash
+    값과 순서가 같으면 같은 결과를 반환함
+    """
+    return blake2b(pickle.dumps(parts, protocol=4), digest_size=16).hexdigest()
+
+class ImageCache:
+    """렌더링된 이미지(RGBA 버퍼, PNG 바이트 등) LRU 캐시
+
+    key는 (차트 종류, 데이터 fingerprint, 크기, dpi) 등 결과 이미지를 결정하는 값으로 구성하며,
+    저장된 바이트 합계가 MAX_BYTES를 넘으면 가장 오래 사용하지 않은 항목부터 제거함
+    """
+    MAX_BYTES = 256*1024*1024
+
+    _items: "OrderedDict[Hashable, bytes]" = OrderedDict()
+    _size = 0
+    _hits = 0
+    _misses = 0
+    _lock = Lock()
+
+    @classmethod
+    def get(cls, key: Hashable) -> bytes | None:
+        with cls._lock:
+            data = cls._items.get(key)
+            if data is None:
+                cls._misses += 1
+                return
+            cls._items.move_to_end(key)
+            cls._hits += 1
+            return data
+
+    @classmethod
+    def put(cls, key: Hashable, data: bytes):
+        if len(data) > cls.MAX_BYTES:
+            return
+        with cls._lock:
+            old = cls._items.pop(key, None)
+            if old is not None:
+                cls._size -= len(old)
+            cls._items[key] = data
+            cls._size += len(data)
+            while cls._size > cls.MAX_BYTES:
+                _, evicted = cls._items.popitem(last=False)
+                cls._size -= len(evicted)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._items.clear()
+            cls._size = 0
+
+    @classmethod
+    def get_stats(cls) -> dict[str, int]:
+        """튜닝용 카운터
+        items: 저장된 항목 수
+        bytes: 저장된 바이트 합계
+        hits, misses: 조회 성공/실패 횟수
+        """
+        with cls._lock:
+            return {
+                "items": len(cls._items),
+                "bytes": cls._size,
+                "hits": cls._hits,
+                "misses": cls._misses,
+            }
@@ -0,0 +1,271 @@
+"""예산 집행 PDF 보고서 생성 (GPT.make_report)
+
+reportlab으로 문서를 구성하는 작업은 CPU를 오래 쓰므로 워커 프로세스 하나(PDFRenderer)에서 실행하여
+UI 스레드와 GIL을 나눠 쓰지 않게 함. 워커는 보고서마다 새로 만들지 않고 재사용하며 한글 폰트는 프로세스당 한 번만 등록함
+항목 표는 TABLE_CHUNK_ROWS행씩 나눈 LongTable(제목 행 반복)로 만들어 수천 행이어도 페이지 나눔 계산이 길어지지 않음
+"""
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from io import BytesIO
+from threading import Lock
+from typing import Iterator
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.lib.units import mm
+from reportlab.platypus import (
+    SimpleDocTemplate, Paragraph, Table, LongTable, TableStyle, Spacer
+)
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+FONT_CANDIDATES = (
+    r"C:\Windows\Fonts\malgun.ttf",
+    r"C:\Windows\Fonts\malgunbd.ttf",
+)
+TABLE_CHUNK_ROWS = 40 # 항목 표 하나의 최대 행 수 (A4 한 페이지 정도)
+ITEM_ROW_HEIGHT = 5.5 * mm # 고정하여 셀 크기 계산을 생략
+
+class PDFRenderer:
+    """보고서를 워커 프로세스에서 생성. 워커가 비정상 종료되면 다음 요청에서 다시 만듦"""
+    _pool: ProcessPoolExecutor | None = None
+    _lock = Lock()
+
+    @classmethod
+    def render(
+            cls,
+            title: str,
+            date: str,
+            ai: dict,
+            cat_totals: dict, team_totals: dict,
+            cat_items: list[dict], team_items: list[dict]
+        ) -> bytes:
+        """render_report()를 워커 프로세스에서 실행하고 끝날 때까지 대기 (워커 스레드에서 호출)"""
+        args = (title, date, ai, cat_totals, team_totals, cat_items, team_items)
+        try:
+            return cls._get_pool().submit(render_report, *args).result()
+        except BrokenProcessPool:
+            with cls._lock:
+                cls._pool = None
+            raise
+
+    @classmethod
+    def shutdown(cls):
+        with cls._lock:
+            pool, cls._pool = cls._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def _get_pool(cls) -> ProcessPoolExecutor:
+        with cls._lock:
+            if cls._pool is None:
+                cls._pool = ProcessPoolExecutor(max_workers=1, initializer=get_font_name)
+            return cls._pool
+
+@lru_cache(maxsize=None)
+def get_font_name() -> str:
+    """시스템의 한글 폰트를 등록하고 이름 반환 (프로세스당 한 번). 없으면 기본 Helvetica"""
+    for path in FONT_CANDIDATES:
+        try:
+            if os.path.exists(path):
+                font_name = "KRBody"
+                pdfmetrics.registerFont(TTFont(font_name, path))
+                return font_name
+        except Exception:
+            continue
+    return "Helvetica"
+
+def render_report(
+        title: str,
+        date: str,
+        ai: dict,
+        cat_totals: dict, team_totals: dict,
+        cat_items: list[dict], team_items: list[dict]
+    ) -> bytes:
+    """PDF 보고서(바이트)
+
+    Args:
+        ai
+            {title, executive_summary, insights, risks, recommendations}
+        cat_totals, team_totals
+            {planned, actual, remaining, execution_rate}
+        cat_items, team_items
+            {path, depth, planned, actual, remaining, execution_rate} 리스트
+    """
+    font_name = get_font_name()
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer, pagesize=A4,
+        leftMargin=20 * mm, rightMargin=20 * mm,
+        topMargin=18 * mm, bottomMargin=18 * mm
+    )
+    styles = _build_styles(font_name)
+
+    story = []
+
+    # 제목/메타
+    story.append(Paragraph(title, styles["Title"]))
+    story.append(Paragraph(date, styles["Meta"]))
+    story.append(Spacer(1, 6 * mm))
+
+    # 핵심 KPI (카테고리/조직)
+    story.append(Paragraph("핵심 지표 (카테고리 기준)", styles["Heading"]))
+    story.append(_kpi_table(cat_totals, font_name))
+    story.append(Spacer(1, 3 * mm))
+    story.append(Paragraph("핵심 지표 (조직/팀 기준)", styles["Heading"]))
+    story.append(_kpi_table(team_totals, font_name))
+    story.append(Spacer(1, 6 * mm))
+
+    # 모델 요약
+    if ai.get("executive_summary"):
+        story.append(Paragraph("요약", styles["Heading"]))
+        for p in ai["executive_summary"]:
+            story.append(Paragraph(f"• {p}", styles["Bullet"]))
+        story.append(Spacer(1, 4 * mm))
+
+    # 항목 테이블 (카테고리)
+    story.append(Paragraph("항목별 현황 (카테고리 트리)", styles["Heading"]))
+    story.extend(_items_tables(cat_items, font_name))
+    story.append(Spacer(1, 6 * mm))
+
+    # 항목 테이블 (팀)
+    story.append(Paragraph("항목별 현황 (조직/팀 트리)", styles["Heading"]))
+    story.extend(_items_tables(team_items, font_name))
+    story.append(Spacer(1, 6 * mm))
+
+    # 인사이트 / 리스크 / 권고
+    def add_section(title_k: str, key: str):
+        vals = ai.get(key) or []
+        if not vals:
+            return
+        story.append(Paragraph(title_k, styles["Heading"]))
+        for v in vals:
+            story.append(Paragraph(f"• {v}", styles["Bullet"]))
+        story.append(Spacer(1, 4 * mm))
+
+    add_section("인사이트", "insights")
+    add_section("리스크", "risks")
+    add_section("권고사항", "recommendations")
+
+    doc.build(story)
+    return buffer.getvalue()
+
+def _kpi_table(totals: dict, font_name: str) -> Table:
+    rows = [
+        ["총 계획", _fmt_money(totals["planned"])],
+        ["총 집행", _fmt_money(totals["actual"])],
+        ["집행률", f'{totals["execution_rate"]:.1f}%'],
+        ["잔액", _fmt_money(totals["remaining"])],
+    ]
+    t = Table(rows, colWidths=[35 * mm, 120 * mm])
+    t.setStyle(TableStyle([
+        ("FONTNAME", (0, 0), (-1, -1), font_name),
+        ("FONTSIZE", (0, 0), (-1, -1), 10),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+        ("ALIGN", (1, 0), (1, -1), "RIGHT"),
+        ("LEFTPADDING", (0, 0), (-1, -1), 6),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+        ("TOPPADDING", (0, 0), (-1, -1), 4),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+    ]))
+    return t
+
+def _items_tables(items: list[dict], font_name: str) -> Iterator[LongTable]:
+    """TABLE_CHUNK_ROWS행씩 나눈 표. 표마다 제목 행이 있고 페이지가 나뉘면 제목 행을 반복함"""
+    header = ["경로", "계획", "집행", "집행률", "잔액"]
+    style = TableStyle([
+        ("FONTNAME", (0, 0), (-1, -1), font_name),
+        ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+        ("ALIGN", (1, 1), (-1, -1), "RIGHT"),
+        ("ALIGN", (0, 0), (0, -1), "LEFT"),
+        ("TOPPADDING", (0, 0), (-1, -1), 3),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 3),
+    ])
+    col_widths = [70 * mm, 28 * mm, 28 * mm, 22 * mm, 27 * mm]
+    for start in range(0, max(1, len(items)), TABLE_CHUNK_ROWS):
+        data = [header]
+        data.extend(_item_row(it) for it in items[start:start + TABLE_CHUNK_ROWS])
+        tbl = LongTable(data, colWidths=col_widths, rowHeights=[ITEM_ROW_HEIGHT] * len(data), repeatRows=1)
+        tbl.setStyle(style)
+        yield tbl
+
+def _item_row(it: dict) -> list[str]:
+    path = it["path"]
+    # 깊이에 따라 살짝 들여쓰기 표기
+    indent = "· " * max(0, it.get("depth", 1) - 1)
+    return [
+        indent + path.split(" > ")[-1] if indent else path,
+        _fmt_money(it["planned"]),
+        _fmt_money(it["actual"]),
+        f'{it["execution_rate"]:.1f}%',
+        _fmt_money(it["remaining"]),
+    ]
+
+def _build_styles(font_name: str):
+    styles = getSampleStyleSheet()
+
+    # 기본 폰트/본체
+    styles["Normal"].fontName = font_name
+    styles["Normal"].fontSize = 10
+    styles["Normal"].leading = 14
+
+    # 기존 Title, Bullet이 이미 있음: 추가하지 말고 수정만
+    if "Title" in styles.byName:
+        s = styles["Title"]
+        s.fontName = font_name
+        s.fontSize = 18
+        s.leading = 22
+        s.spaceAfter = 6
+        s.alignment = 0  # LEFT
+    if "Bullet" in styles.byName:
+        s = styles["Bullet"]
+        s.fontName = font_name
+        s.leftIndent = 8
+        s.spaceBefore = 2
+        s.spaceAfter = 0
+        # s.fontSize 그대로 두거나 필요 시 조정
+
+    # Meta: 없으면 생성, 있으면 수정
+    if "Meta" in styles.byName:
+        s = styles["Meta"]
+        s.fontName = font_name
+        s.fontSize = 9
+        s.textColor = colors.grey
+        s.spaceAfter = 6
+    else:
+        styles.add(ParagraphStyle(
+            name="Meta", parent=styles["Normal"],
+            fontSize=9, textColor=colors.grey, spaceAfter=6
+        ))
+
+    # Heading: 없으면 생성, 있으면 수정
+    if "Heading" in styles.byName:
+        s = styles["Heading"]
+        s.fontName = font_name
+        s.fontSize = 12
+        s.leading = 16
+        s.spaceBefore = 6
+        s.spaceAfter = 4
+        s.textColor = colors.black
+    else:
+        styles.add(ParagraphStyle(
+            name="Heading", parent=styles["Normal"],
+            fontSize=12, leading=16, spaceBefore=6, spaceAfter=4,
+            textColor=colors.black
+        ))
+
+    return styles
+
+def _fmt_money(x: float) -> str:
+    try:
+        return f"{int(round(x)):,} 원"
+    except Exception:
+        return str(x)
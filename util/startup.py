@@ -0,0 +1,101 @@
+"""프로그램 시작 시간 측정
+
+run.py에서 다른 모듈을 import하기 전에 StartupProfile.start()를 호출하면
+finish()까지 새로 import된 모듈별 시간(python -X importtime과 같은 누적/자체 시간)과
+mark()로 구분한 단계별 시간을 기록함. 결과는 정보 창에서 확인할 수 있음
+(PyInstaller 빌드는 콘솔이 없으므로 -X importtime 대신 사용)
+"""
+import builtins
+import sys
+
+from importlib.util import resolve_name
+from threading import local, Lock
+from time import perf_counter
+
+class StartupProfile:
+    REPORT_MODULES = 30 # 보고서에 표시할 모듈 수
+
+    _started_at: float | None = None
+    _last_mark_at = 0.0
+    _finished_at: float | None = None
+    _stages: list[tuple[str, float]] = [] # [(단계, 소요 시간)]
+    _modules: dict[str, tuple[float, float]] = {} # { 모듈: (누적, 자체) }
+    _local = local() # 스레드별 진행 중인 import 스택
+    _lock = Lock()
+    _original_import = None
+    _installed_import = None
+
+    @classmethod
+    def start(cls):
+        """측정 시작. builtins.__import__를 감싸며 finish()에서 되돌림"""
+        if cls._started_at is not None:
+            return
+        cls._started_at = cls._last_mark_at = perf_counter()
+        cls._original_import = builtins.__import__
+        builtins.__import__ = cls._installed_import = cls._import
+
+    @classmethod
+    def mark(cls, stage: str):
+        """직전 mark()(또는 start())부터 지금까지를 stage로 기록"""
+        if cls._started_at is None or cls._finished_at is not None:
+            return
+        now = perf_counter()
+        with cls._lock:
+            cls._stages.append((stage, now - cls._last_mark_at))
+            cls._last_mark_at = now
+
+    @classmethod
+    def finish(cls, stage: str = "첫 화면 표시"):
+        """마지막 단계를 기록하고 import 측정을 끝냄"""
+        if cls._started_at is None or cls._finished_at is not None:
+            return
+        cls.mark(stage)
+        cls._finished_at = cls._last_mark_at
+        if builtins.__import__ is cls._installed_import:
+            builtins.__import__ = cls._original_import
+
+    @classmethod
+    def _import(cls, name, globals=None, locals=None, fromlist=(), level=0):
+        fullname = name
+        if level:
+            try:
+                fullname = resolve_name("." * level + name, (globals or {}).get("__package__"))
+            except (ImportError, ValueError):
+                pass
+        if fullname in sys.modules:
+            return cls._original_import(name, globals, locals, fromlist, level)
+
+        stack: list[list[float]] = cls._local.__dict__.setdefault("stack", [])
+        frame = [perf_counter(), 0.0] # [시작 시각, 하위 import 누적]
+        stack.append(frame)
+        try:
+            return cls._original_import(name, globals, locals, fromlist, level)
+        finally:
+            stack.pop()
+            elapsed = perf_counter() - frame[0]
+            if stack:
+                stack[-1][1] += elapsed
+            with cls._lock:
+                cls._modules.setdefault(fullname, (elapsed, elapsed - frame[1]))
+
+    @classmethod
+    def get_report(cls) -> str:
+        """단계별 시간과 import 시간 상위 모듈"""
+        if cls._started_at is None:
+            return "시작 시간이 측정되지 않았습니다."
+        with cls._lock:
+            stages = cls._stages.copy()
+            modules = sorted(cls._modules.items(), key=lambda kv: kv[1][0], reverse=True)
+        lines = ["[단계별 시간 (초)]"]
+        width = max((len(stage) for stage, _ in stages), default=0) + 2
+        for stage, elapsed in stages:
+            lines.append(f"{stage:<{width}}{elapsed:8.3f}")
+        if cls._finished_at is not None:
+            lines.append(f"{'합계':<{width}}{cls._finished_at - cls._started_at:8.3f}")
+        else:
+            lines.append("(시작 진행 중)")
+        lines.append("")
+        lines.append(f"[import 시간 상위 {cls.REPORT_MODULES}개 (누적 / 자체, 초)]")
+        for name, (cumulative, own) in modules[:cls.REPORT_MODULES]:
+            lines.append(f"{cumulative:8.3f} / {own:8.3f}  {name}")
+        return "\n".join(lines)
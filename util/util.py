@@ -1,7 +1,5 @@
-import numpy as np
-import matplotlib.pyplot as plt
+import math
 from traceback import format_exc
-from matplotlib import rc, font_manager
 
 class Config:
     PERIOD: str = "전체"
@@ -11,6 +9,7 @@ class Config:
     LAST_USED_GPT_MODEL: str = ""
     CLAUDE_MODELS: list[str] = []
     LAST_USED_CLAUDE_MODEL: str = ""
+    AI_DELTA: bool = False # 마지막으로 선택한 '바뀐 항목만 분석'
 
     @classmethod
     def get_months(cls, period: str | None = None) -> list[int,]:
@@ -55,7 +54,7 @@ def simplify_won(won: float, unit: str = "자동") -> str:
         unit
             자동|억원|백만원|천원|원
     """
-    if np.isnan(won):
+    if math.isnan(won):
         return ""
     prefix = "-" if won < 0 else ""
     won = abs(won)
@@ -76,6 +75,9 @@ COLORMAP = (
 )
 
 def initialize_matplotlib():
+    # matplotlib은 시작 시간에 영향이 커서 처음 사용할 때 import
+    import matplotlib.pyplot as plt
+    from matplotlib import rc, font_manager
     rc("font", family="Malgun Gothic")
     # font_manager.fontManager.addfont("./fonts/NotoSans-Regular.ttf")
     # plt.rcParams["font.family"] = [
@@ -84,6 +86,8 @@ def initialize_matplotlib():
     # ]
     # plt.rcParams["axes.unicode_minus"] = False
     plt.rcParams['axes.prop_cycle'] = plt.cycler(color=COLORMAP)
+    # 글꼴 검색 결과를 미리 캐시하여 처음 차트를 그릴 때 지연되지 않도록 함
+    font_manager.findfont(font_manager.FontProperties(family=plt.rcParams["font.family"]))
 
 def pastel_gradient(hex_color: str, length: int, max_pastel: float = 0.7) -> list[str]:
     """기준 hex 색상에서 시작해서, 흰색 쪽으로 점점 파스텔톤으로 변하는 hex 색상 리스트를 반환"""